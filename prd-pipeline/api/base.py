@@ -1,13 +1,56 @@
-"""Base HTTP client with timeout and retries."""
+"""
+Base HTTP client with timeout and retries, plus a process-wide pool of clients per upstream host.
+All GETs are paced by the host's shared limiter (api.ratelimit), retried on 429/5xx,
+served from the on-disk response cache (api.cache) while fresh, and coalesced with
+identical in-flight requests (api.singleflight). stream / async_stream hand uncached list pages
+to the parser (api.jsonstream) while their body is still arriving.
+"""
+import asyncio
+import atexit
+import contextlib
 import logging
-from typing import Any, Optional
+import threading
+import time
+from typing import Any, AsyncIterator, Iterator, Optional
 
 import httpx
 
-from app.config import HTTP_MAX_RETRIES, HTTP_TIMEOUT
+from api.cache import CachedResponse, ResponseCache, cache_key, get_cache, ttl_for
+from api.ratelimit import RETRY_STATUSES, backoff_delay, get_limiter, parse_retry_after
+from api.singleflight import requests_in_flight
+from app.config import (
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_MAX_RETRIES,
+    HTTP_STATUS_RETRIES,
+    HTTP_TIMEOUT,
+)
 
 logger = logging.getLogger(__name__)
 
+# One long-lived client per upstream origin (scheme://host:port). httpx.Client is thread-safe,
+# so Streamlit sessions and worker threads share connections instead of re-doing TLS per call.
+_clients: dict[str, httpx.Client] = {}
+_clients_lock = threading.Lock()
+# Optional transports replacing the network for every client (see set_transports)
+_transport: Optional[httpx.BaseTransport] = None
+_async_transport: Optional[httpx.AsyncBaseTransport] = None
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def _origin(url: str) -> str:
+    """Pool key for a URL: scheme://host[:port]."""
+    u = httpx.URL(url)
+    return f"{u.scheme}://{u.netloc.decode('ascii')}"
+
 
 def create_client(
     timeout: float = HTTP_TIMEOUT,
@@ -15,7 +58,7 @@ def create_client(
     headers: Optional[dict[str, str]] = None,
 ) -> httpx.Client:
     """Create a sync httpx client with timeout and retry transport."""
-    transport = httpx.HTTPTransport(retries=max_retries)
+    transport = _transport or httpx.HTTPTransport(retries=max_retries, limits=_limits())
     return httpx.Client(
         timeout=timeout,
         transport=transport,
@@ -23,14 +66,324 @@ def create_client(
     )
 
 
+def get_client(url: str) -> httpx.Client:
+    """
+    Return the pooled client for the URL's host, creating it on first use.
+    Do not close the returned client; call close_clients() on shutdown instead.
+    """
+    key = _origin(url)
+    client = _clients.get(key)
+    if client is not None and not client.is_closed:
+        return client
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None or client.is_closed:
+            client = create_client()
+            _clients[key] = client
+            logger.debug("Created pooled HTTP client for %s", key)
+        return client
+
+
+def close_clients() -> None:
+    """Close all pooled clients. Registered with atexit; safe to call more than once."""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception as e:
+            logger.warning("Closing pooled HTTP client failed: %s", e)
+
+
+atexit.register(close_clients)
+
+
+def set_transports(
+    transport: Optional[httpx.BaseTransport] = None,
+    async_transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> None:
+    """
+    Route every new client through the given transports (e.g. mock_upstream for offline
+    tests and benchmarks). Call with no arguments to restore the network. Closes pooled clients.
+    """
+    global _transport, _async_transport
+    close_clients()
+    _transport, _async_transport = transport, async_transport
+
+
+def _retry_delay(r: Optional[httpx.Response], attempt: int, url: str) -> Optional[float]:
+    """
+    Seconds to wait before retrying after response r (None = transport error),
+    or None when the result is final. Also feeds the host's limiter.
+    """
+    limiter = get_limiter(_origin(url))
+    throttled = r is not None and r.status_code in RETRY_STATUSES
+    retry_after = parse_retry_after(r.headers.get("Retry-After")) if throttled else None
+    limiter.release(throttled=throttled, retry_after=retry_after, failed=r is None)
+    if (r is not None and not throttled) or attempt >= HTTP_STATUS_RETRIES:
+        return None
+    delay = backoff_delay(attempt, retry_after)
+    logger.info(
+        "GET %s %s; retry %s/%s in %.2fs",
+        url,
+        f"HTTP {r.status_code}" if r is not None else "failed",
+        attempt + 1,
+        HTTP_STATUS_RETRIES,
+        delay,
+    )
+    return delay
+
+
+def _send(
+    url: str,
+    headers: Optional[dict[str, str]],
+    params: Optional[dict[str, Any]],
+    stream: bool = False,
+) -> httpx.Response:
+    """
+    GET with host pacing and retries; returns the final response without raising on status.
+    With stream, its body is left unread (the caller reads and closes it).
+    """
+    limiter = get_limiter(_origin(url))
+    attempt = 0
+    while True:
+        limiter.acquire()
+        try:
+            client = get_client(url)
+            r = client.send(client.build_request("GET", url, headers=headers, params=params), stream=stream)
+        except httpx.TransportError:
+            delay = _retry_delay(None, attempt, url)
+            if delay is None:
+                raise
+        except BaseException:
+            limiter.release(failed=True)
+            raise
+        else:
+            delay = _retry_delay(r, attempt, url)
+            if delay is None:
+                return r
+            r.close()
+        time.sleep(delay)
+        attempt += 1
+
+
+def _cache_lookup(
+    url: str,
+    headers: Optional[dict[str, str]],
+    params: Optional[dict[str, Any]],
+    use_cache: bool,
+) -> tuple[Optional[ResponseCache], str, Optional[CachedResponse], Optional[dict[str, str]]]:
+    """Returns (cache, key, entry, request_headers); entry is only set when fresh or revalidatable."""
+    cache = get_cache() if use_cache else None
+    ttl = ttl_for(url) if cache else 0.0
+    if not cache or ttl <= 0:
+        return None, "", None, headers
+    key = cache_key(url, params, headers)
+    entry = cache.lookup(key)
+    if entry is not None and not entry.is_fresh(ttl):
+        validators = entry.validators()
+        if not validators:
+            return cache, key, None, headers
+        headers = {**(headers or {}), **validators}
+    return cache, key, entry, headers
+
+
+def _cache_result(
+    cache: Optional[ResponseCache],
+    key: str,
+    entry: Optional[CachedResponse],
+    r: httpx.Response,
+    url: str,
+    params: Optional[dict[str, Any]],
+) -> httpx.Response:
+    """Resolve a 304 against the entry, store fresh 200s, and raise on 4xx/5xx."""
+    if cache and entry is not None and r.status_code == 304:
+        cache.touch(key)
+        return entry.to_response(url, params)
+    r.raise_for_status()
+    if cache:
+        cache.store(key, r)
+    return r
+
+
+def _flight_key(
+    url: str,
+    headers: Optional[dict[str, str]],
+    params: Optional[dict[str, Any]],
+    use_cache: bool,
+) -> str:
+    """Coalescing key: cache key plus the cache mode, so an uncached probe never joins a cached read."""
+    return f"{cache_key(url, params, headers)}:{int(use_cache)}"
+
+
 def get(
     url: str,
     *,
     headers: Optional[dict[str, str]] = None,
     params: Optional[dict[str, Any]] = None,
+    use_cache: bool = True,
 ) -> httpx.Response:
-    """Sync GET with shared timeout. Raises on 4xx/5xx."""
-    with create_client(headers=headers) as client:
-        r = client.get(url, params=params)
-        r.raise_for_status()
-        return r
+    """
+    Sync GET on the pooled client for the URL's host, paced by the host's shared limiter.
+    Retries 429/5xx and transport errors with backoff (honoring Retry-After). Raises on 4xx/5xx.
+    Served from the on-disk cache (api.cache) while fresh; stale entries are revalidated.
+    Concurrent identical calls (sync or async) share one in-flight request (api.singleflight).
+    """
+    def fetch() -> httpx.Response:
+        cache, key, entry, req_headers = _cache_lookup(url, headers, params, use_cache)
+        if entry is not None and entry.is_fresh(ttl_for(url)):
+            return entry.to_response(url, params)
+        r = _send(url, req_headers, params)
+        return _cache_result(cache, key, entry, r, url, params)
+
+    return requests_in_flight.do(_flight_key(url, headers, params, use_cache), fetch)
+
+
+def _streamable(url: str, use_cache: bool) -> bool:
+    """True when a GET of url would bypass the response cache, so its body need not be kept."""
+    return not use_cache or get_cache() is None or ttl_for(url) <= 0
+
+
+@contextlib.contextmanager
+def stream(
+    url: str,
+    *,
+    headers: Optional[dict[str, str]] = None,
+    params: Optional[dict[str, Any]] = None,
+    use_cache: bool = True,
+) -> Iterator[httpx.Response]:
+    """
+    get() for a body read as it arrives (r.iter_bytes(), e.g. api.jsonstream.read_list_page).
+    When the response would not be cached (use_cache off, cache disabled or no TTL for the
+    endpoint) the body is left unread and closed on exit, so it never has to be held whole;
+    such requests are not coalesced. Otherwise this is get(), body already read.
+    """
+    if not _streamable(url, use_cache):
+        yield get(url, headers=headers, params=params, use_cache=use_cache)
+        return
+    r = _send(url, headers, params, stream=True)
+    try:
+        if r.is_error:
+            r.read()
+            r.raise_for_status()
+        yield r
+    finally:
+        r.close()
+
+
+# --- Async (api.dovetail_async, api.productboard_async) ---
+
+
+def create_async_client(
+    timeout: float = HTTP_TIMEOUT,
+    max_retries: int = HTTP_MAX_RETRIES,
+    headers: Optional[dict[str, str]] = None,
+) -> httpx.AsyncClient:
+    """Create an async httpx client with timeout and retry transport. Bound to the running event loop."""
+    transport = _async_transport or httpx.AsyncHTTPTransport(retries=max_retries, limits=_limits())
+    return httpx.AsyncClient(
+        timeout=timeout,
+        transport=transport,
+        headers=headers or {},
+    )
+
+
+@contextlib.asynccontextmanager
+async def async_client_scope(client: Optional[httpx.AsyncClient] = None) -> AsyncIterator[httpx.AsyncClient]:
+    """Yield the caller's client, or a new one that is closed on exit."""
+    if client is not None:
+        yield client
+        return
+    async with create_async_client() as own:
+        yield own
+
+
+async def _asend(
+    client: httpx.AsyncClient,
+    url: str,
+    headers: Optional[dict[str, str]],
+    params: Optional[dict[str, Any]],
+    semaphore: Optional[asyncio.Semaphore],
+    stream: bool = False,
+) -> httpx.Response:
+    """Async counterpart of _send; holds the semaphore (if given) for each attempt."""
+    limiter = get_limiter(_origin(url))
+    attempt = 0
+    while True:
+        async with semaphore or contextlib.nullcontext():
+            await limiter.acquire_async()
+            try:
+                request = client.build_request("GET", url, headers=headers, params=params)
+                r = await client.send(request, stream=stream)
+            except httpx.TransportError:
+                delay = _retry_delay(None, attempt, url)
+                if delay is None:
+                    raise
+            except BaseException:
+                limiter.release(failed=True)
+                raise
+            else:
+                delay = _retry_delay(r, attempt, url)
+                if delay is None:
+                    return r
+                await r.aclose()
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+async def async_get(
+    client: httpx.AsyncClient,
+    url: str,
+    *,
+    headers: Optional[dict[str, str]] = None,
+    params: Optional[dict[str, Any]] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    use_cache: bool = True,
+) -> httpx.Response:
+    """
+    Async GET with the same limiter, retry policy, response cache and request coalescing
+    as get(). The semaphore (if given) bounds in-flight requests. Raises on 4xx/5xx.
+    """
+    async def fetch() -> httpx.Response:
+        # SQLite reads/writes run in worker threads so the event loop keeps other requests moving
+        if use_cache:
+            cache, key, entry, req_headers = await asyncio.to_thread(_cache_lookup, url, headers, params, use_cache)
+        else:
+            cache, key, entry, req_headers = None, "", None, headers
+        if entry is not None and entry.is_fresh(ttl_for(url)):
+            return entry.to_response(url, params)
+        r = await _asend(client, url, req_headers, params, semaphore)
+        if cache is None:
+            r.raise_for_status()
+            return r
+        return await asyncio.to_thread(_cache_result, cache, key, entry, r, url, params)
+
+    return await requests_in_flight.do_async(_flight_key(url, headers, params, use_cache), fetch)
+
+
+@contextlib.asynccontextmanager
+async def async_stream(
+    client: httpx.AsyncClient,
+    url: str,
+    *,
+    headers: Optional[dict[str, str]] = None,
+    params: Optional[dict[str, Any]] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    use_cache: bool = True,
+) -> AsyncIterator[httpx.Response]:
+    """
+    Async counterpart of stream(): an uncached response's body is left unread for
+    r.aiter_bytes() (e.g. api.jsonstream.aread_list_page); otherwise this is async_get().
+    """
+    if not _streamable(url, use_cache):
+        yield await async_get(client, url, headers=headers, params=params, semaphore=semaphore, use_cache=use_cache)
+        return
+    r = await _asend(client, url, headers, params, semaphore, stream=True)
+    try:
+        if r.is_error:
+            await r.aread()
+            r.raise_for_status()
+        yield r
+    finally:
+        await r.aclose()
@@ -0,0 +1,251 @@
+"""
+Persistent SQLite cache for upstream GET responses.
+
+Entries are keyed by URL, sorted params and a hash of the Authorization header (keys never
+hit disk). Each endpoint has its own TTL (HTTP_CACHE_TTLS); stale entries with an ETag or
+Last-Modified are revalidated with If-None-Match / If-Modified-Since, and the file is kept
+under HTTP_CACHE_MAX_BYTES by evicting least-recently-used entries.
+
+Cache hits are reads only: their access times are buffered and written in one batch
+(every _ACCESS_BATCH hits, before any eviction, and on flush()), so concurrent readers
+never queue on the write lock. The stored size is tracked in memory and only summed in
+SQLite when it may be over budget. Async callers run all of this off the event loop
+(api.base.async_get).
+"""
+from __future__ import annotations
+
+import atexit
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+import httpx
+
+from app.config import HTTP_CACHE_ENABLED, HTTP_CACHE_MAX_BYTES, HTTP_CACHE_PATH, HTTP_CACHE_TTLS
+
+logger = logging.getLogger(__name__)
+
+# Response headers worth keeping with the body
+_KEPT_HEADERS = ("content-type", "etag", "last-modified")
+# Buffered hit access times written per batch
+_ACCESS_BATCH = 256
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+
+def cache_key(url: str, params: Optional[dict[str, Any]], headers: Optional[dict[str, str]]) -> str:
+    """Stable key for a GET: URL + sorted params + sha256 of the Authorization header."""
+    auth = (headers or {}).get("Authorization", "")
+    key_hash = hashlib.sha256(auth.encode()).hexdigest() if auth else ""
+    parts = [url, json.dumps(sorted((params or {}).items()), default=str), key_hash]
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+def ttl_for(url: str) -> float:
+    """
+    TTL in seconds for a URL, from the last path segment named in HTTP_CACHE_TTLS, i.e. the
+    resource actually returned (/projects/{id}/highlights is highlights). 0 = don't cache.
+    """
+    for segment in reversed(httpx.URL(url).path.split("/")):
+        if segment in HTTP_CACHE_TTLS:
+            return HTTP_CACHE_TTLS[segment]
+    return 0.0
+
+
+@dataclass
+class CachedResponse:
+    """One stored response."""
+    status: int
+    headers: dict[str, str]
+    body: bytes
+    stored_at: float
+
+    def is_fresh(self, ttl: float) -> bool:
+        return time.time() - self.stored_at < ttl
+
+    def validators(self) -> dict[str, str]:
+        """Conditional request headers for revalidation."""
+        out: dict[str, str] = {}
+        if self.headers.get("etag"):
+            out["If-None-Match"] = self.headers["etag"]
+        if self.headers.get("last-modified"):
+            out["If-Modified-Since"] = self.headers["last-modified"]
+        return out
+
+    def to_response(self, url: str, params: Optional[dict[str, Any]] = None) -> httpx.Response:
+        return httpx.Response(
+            self.status,
+            headers=self.headers,
+            content=self.body,
+            request=httpx.Request("GET", url, params=params),
+        )
+
+
+class ResponseCache:
+    """SQLite-backed response store. One connection per thread; WAL so readers don't block writers."""
+
+    def __init__(self, path: Path = HTTP_CACHE_PATH, max_bytes: int = HTTP_CACHE_MAX_BYTES) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._accessed: dict[str, float] = {}  # key -> last hit time, not yet written
+        self._accessed_lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._write_lock:
+            conn = self._conn()
+            conn.executescript(_SCHEMA)
+            conn.commit()
+            self._size = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def lookup(self, key: str) -> Optional[CachedResponse]:
+        row = self._conn().execute(
+            "SELECT status, headers, body, stored_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        with self._accessed_lock:
+            self._accessed[key] = time.time()
+            full = len(self._accessed) >= _ACCESS_BATCH
+        if full:
+            self.flush()
+        return CachedResponse(status=row[0], headers=json.loads(row[1]), body=row[2], stored_at=row[3])
+
+    def store(self, key: str, response: httpx.Response) -> None:
+        """Store a 200 response (unless it says no-store), then evict LRU entries over max_bytes."""
+        if response.status_code != 200 or "no-store" in response.headers.get("cache-control", ""):
+            return
+        headers = {h: response.headers[h] for h in _KEPT_HEADERS if h in response.headers}
+        body = response.content
+        now = time.time()
+        with self._write_lock:
+            conn = self._conn()
+            old = conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, url, status, headers, body, size, stored_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, str(response.url), response.status_code, json.dumps(headers), body, len(body), now, now),
+            )
+            self._size += len(body) - (old[0] if old else 0)
+            if self._size > self.max_bytes:
+                self._write_accessed(conn)
+                self._evict(conn)
+            conn.commit()
+
+    def flush(self) -> None:
+        """Write buffered hit access times."""
+        with self._write_lock:
+            conn = self._conn()
+            self._write_accessed(conn)
+            conn.commit()
+
+    def _write_accessed(self, conn: sqlite3.Connection) -> None:
+        with self._accessed_lock:
+            accessed, self._accessed = self._accessed, {}
+        if accessed:
+            conn.executemany(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", [(t, k) for k, t in accessed.items()]
+            )
+
+    def touch(self, key: str) -> None:
+        """Mark an entry fresh again (after a 304)."""
+        now = time.time()
+        with self._write_lock:
+            conn = self._conn()
+            conn.execute("UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?", (now, now, key))
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        # Other processes may share the file, so the in-memory size is only a trigger
+        total = self._size = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop oldest-accessed entries until under 90% of the budget
+        target = total - int(self.max_bytes * 0.9)
+        freed = 0
+        keys: list[str] = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            keys.append(key)
+            freed += size
+            if freed >= target:
+                break
+        conn.executemany("DELETE FROM responses WHERE key = ?", [(k,) for k in keys])
+        self._size = total - freed
+        logger.debug("HTTP cache evicted %s entries (%s bytes)", len(keys), freed)
+
+    def clear(self) -> None:
+        with self._write_lock:
+            with self._accessed_lock:
+                self._accessed.clear()
+            conn = self._conn()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+            self._size = 0
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+_enabled = HTTP_CACHE_ENABLED
+
+
+def configure(enabled: bool = HTTP_CACHE_ENABLED, path: Optional[Path] = None) -> None:
+    """Turn the process-wide cache on/off, or point it at another file (tests, benchmarks)."""
+    global _cache, _enabled
+    with _cache_lock:
+        _enabled = enabled
+        _cache = ResponseCache(path) if enabled and path is not None else None
+
+
+def _flush_on_exit() -> None:
+    """Write buffered access times of the process-wide cache (eviction order only)."""
+    if _cache is not None:
+        try:
+            _cache.flush()
+        except sqlite3.Error as e:
+            logger.debug("HTTP cache flush on exit failed: %s", e)
+
+
+atexit.register(_flush_on_exit)
+
+
+def get_cache() -> Optional[ResponseCache]:
+    """Process-wide cache, or None when disabled (HTTP_CACHE_ENABLED / configure) or the file can't be opened."""
+    global _cache
+    if not _enabled:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                try:
+                    _cache = ResponseCache()
+                except (OSError, sqlite3.Error) as e:
+                    logger.warning("HTTP cache unavailable (%s); continuing without it.", e)
+                    return None
+    return _cache
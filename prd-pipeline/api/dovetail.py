@@ -1,21 +1,18 @@
 """Dovetail API client. Projects and highlights (insights) with cursor pagination."""
 import json
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import os
 from typing import Any, Optional
 
 import httpx
 
-from api.base import create_client
-from app.config import HTTP_TIMEOUT
+from api.base import get, stream
+from api.jsonstream import ItemTransform, read_list_page
 
 logger = logging.getLogger(__name__)
 
-DOVETAIL_BASE = "https://dovetail.com/api/v1"
+DOVETAIL_BASE = os.environ.get("DOVETAIL_BASE_URL", "https://dovetail.com/api/v1").rstrip("/")
 PAGE_LIMIT = 100
-# Cap insights per project (load only first N for Step 2)
-MAX_INSIGHTS_PER_PROJECT = 20
-MAX_CONCURRENT_REQUESTS = 5
 
 
 def _headers(api_key: str) -> dict[str, str]:
@@ -24,6 +21,29 @@ def _headers(api_key: str) -> dict[str, str]:
     return {"Authorization": f"Bearer {api_key.strip()}"}
 
 
+def highlight_filter_params(created_from: str = "", created_to: str = "") -> dict[str, Any]:
+    """
+    GET /v1/highlights params filtering on created_at: filter[created_at][gte] / [lte], each
+    day widened to its UTC start or end so both ends are inclusive. Dates are YYYY-MM-DD (any
+    time part is ignored); empty means unbounded. Dovetail has no tag filter on highlights,
+    so tag filters are applied to the downloaded highlights only.
+    """
+    params: dict[str, Any] = {}
+    if created_from:
+        params["filter[created_at][gte]"] = f"{created_from[:10]}T00:00:00.000Z"
+    if created_to:
+        params["filter[created_at][lte]"] = f"{created_to[:10]}T23:59:59.999Z"
+    return params
+
+
+def _with_project_id(project_id: str, transform: Optional[ItemTransform] = None) -> ItemTransform:
+    """Item transform setting project_id on each highlight as it is parsed, then applying transform."""
+    def apply(ins: dict[str, Any]) -> Any:
+        ins.setdefault("project_id", project_id)
+        return transform(ins) if transform is not None else ins
+    return apply
+
+
 def _parse_list_response(data: Any) -> tuple[list[dict[str, Any]], Optional[str]]:
     """Extract data list and next_cursor from API response. Handles missing/malformed page."""
     items: list[dict[str, Any]] = []
@@ -46,13 +66,12 @@ def test_connection(api_key: str) -> tuple[bool, str]:
     if not api_key or not api_key.strip():
         return False, "API key is empty"
     try:
-        with create_client(timeout=HTTP_TIMEOUT) as client:
-            r = client.get(
-                f"{DOVETAIL_BASE}/projects",
-                headers=_headers(api_key),
-                params={"page[limit]": 1},
-            )
-            r.raise_for_status()
+        get(
+            f"{DOVETAIL_BASE}/projects",
+            headers=_headers(api_key),
+            params={"page[limit]": 1},
+            use_cache=False,
+        )
         return True, ""
     except httpx.HTTPStatusError as e:
         msg = f"HTTP {e.response.status_code}"
@@ -71,36 +90,30 @@ def test_connection(api_key: str) -> tuple[bool, str]:
         return False, str(e)
 
 
-def get_projects(api_key: str) -> list[dict[str, Any]]:
+def get_projects(api_key: str, use_cache: bool = True) -> list[dict[str, Any]]:
     """
     Fetch ALL projects from GET /v1/projects using cursor pagination (next_cursor) until no more pages.
-    Returns list of project dicts with id, name, etc.
+    Returns list of project dicts with id, name, etc. use_cache=False skips the response cache.
     """
     if not api_key or not api_key.strip():
         return []
     all_projects: list[dict[str, Any]] = []
     start_cursor: Optional[str] = None
     try:
-        with create_client(timeout=HTTP_TIMEOUT) as client:
-            while True:
-                params: dict[str, Any] = {"page[limit]": PAGE_LIMIT}
-                if start_cursor:
-                    params["page[start_cursor]"] = start_cursor
-                r = client.get(
-                    f"{DOVETAIL_BASE}/projects",
-                    headers=_headers(api_key),
-                    params=params,
-                )
-                r.raise_for_status()
-                data = r.json()
-                items, next_cursor = _parse_list_response(data)
-                for p in items:
-                    if isinstance(p, dict) and (p.get("id") is not None or p.get("id") != ""):
-                        all_projects.append(dict(p))
-                if not next_cursor:
-                    break
-                start_cursor = next_cursor
-                logger.debug("Projects next_cursor: %s", start_cursor[:20] if start_cursor else None)
+        while True:
+            params: dict[str, Any] = {"page[limit]": PAGE_LIMIT}
+            if start_cursor:
+                params["page[start_cursor]"] = start_cursor
+            url = f"{DOVETAIL_BASE}/projects"
+            with stream(url, headers=_headers(api_key), params=params, use_cache=use_cache) as r:
+                items, next_cursor = _parse_list_response(read_list_page(r, "dovetail/projects"))
+            for p in items:
+                if isinstance(p, dict) and (p.get("id") is not None or p.get("id") != ""):
+                    all_projects.append(p)
+            if not next_cursor:
+                break
+            start_cursor = next_cursor
+            logger.debug("Projects next_cursor: %s", start_cursor[:20] if start_cursor else None)
         return all_projects
     except httpx.HTTPStatusError as e:
         logger.exception("Dovetail get_projects HTTP error: %s %s", e.response.status_code, e.response.text)
@@ -110,52 +123,97 @@ def get_projects(api_key: str) -> list[dict[str, Any]]:
         return all_projects
 
 
-def _get_highlights_page(
-    client: httpx.Client,
+def fetch_highlights_page(
     api_key: str,
     project_id: str,
     start_cursor: Optional[str] = None,
-) -> tuple[list[dict[str, Any]], Optional[str]]:
+    sort: Optional[str] = None,
+    filters: Optional[dict[str, Any]] = None,
+    transform: Optional[ItemTransform] = None,
+) -> tuple[list[Any], Optional[str]]:
     """
     Fetch one page of highlights for a project from GET /v1/highlights?project_id={project_id}.
-    Uses cursor pagination. Returns (items, next_cursor).
+    Uses cursor pagination. filters are extra query params (see highlight_filter_params).
+    Items are projected (api.projection) and owned by the caller; transform, if given, is
+    applied to each as it is parsed (see api.jsonstream.read_list_page).
+    Returns (items, next_cursor). Raises on HTTP/transport errors.
     """
-    params: dict[str, Any] = {"project_id": project_id, "page[limit]": PAGE_LIMIT}
+    params: dict[str, Any] = {"project_id": project_id, "page[limit]": PAGE_LIMIT, **(filters or {})}
     if start_cursor:
         params["page[start_cursor]"] = start_cursor
+    if sort:
+        params["sort"] = sort
+    # Parsed item by item as the body arrives (api.jsonstream), so the page is never decoded as one tree
+    with stream(f"{DOVETAIL_BASE}/highlights", headers=_headers(api_key), params=params) as r:
+        return _parse_list_response(read_list_page(r, "dovetail/highlights", transform=transform))
+
+
+def _get_highlights_page(
+    api_key: str,
+    project_id: str,
+    start_cursor: Optional[str] = None,
+    filters: Optional[dict[str, Any]] = None,
+) -> tuple[list[dict[str, Any]], Optional[str]]:
+    """Like fetch_highlights_page, but logs and returns ([], None) on failure."""
     try:
-        r = client.get(
-            f"{DOVETAIL_BASE}/highlights",
-            headers=_headers(api_key),
-            params=params,
-        )
-        r.raise_for_status()
-        data = r.json()
-        # logger.info("Dovetail highlights API response (project_id=%s): %s", project_id, json.dumps(data, default=str))
-        return _parse_list_response(data)
+        return fetch_highlights_page(api_key, project_id, start_cursor, filters=filters)
     except Exception as e:
         logger.warning("Dovetail _get_highlights_page failed for project %s: %s", project_id, e)
         return [], None
 
 
 def _get_insights_page(
-    client: httpx.Client,
     api_key: str,
     project_id: str,
     start_cursor: Optional[str] = None,
+    filters: Optional[dict[str, Any]] = None,
 ) -> tuple[list[dict[str, Any]], Optional[str]]:
     """
     Fetch one page of insights (highlights) for a project.
     Uses GET /v1/highlights?project_id={project_id} per Dovetail API.
     """
-    return _get_highlights_page(client, api_key, project_id, start_cursor)
+    return _get_highlights_page(api_key, project_id, start_cursor, filters)
 
 
-def get_all_insights(api_key: str, page_size: int = 100) -> list[dict[str, Any]]:
+def get_insights_page(
+    api_key: str,
+    project_id: str,
+    cursor: Optional[str] = None,
+    filters: Optional[dict[str, Any]] = None,
+    transform: Optional[ItemTransform] = None,
+) -> tuple[list[Any], Optional[str]]:
+    """
+    One page of insights (highlights) for a project, with project_id set, plus the opaque
+    cursor to resume from (None once the project is exhausted). Pass cursor=None for the
+    first page. transform (e.g. a normalizer) is applied to each highlight as it is parsed.
+    On failure logs and returns ([], cursor), so the same page can be retried.
+    """
+    if not api_key or not api_key.strip() or not project_id:
+        return [], None
+    try:
+        return fetch_highlights_page(
+            api_key, project_id, cursor, filters=filters, transform=_with_project_id(project_id, transform)
+        )
+    except Exception as e:
+        logger.warning("Dovetail get_insights_page failed for project %s: %s", project_id, e)
+        return [], cursor
+
+
+def get_all_insights(
+    api_key: str,
+    page_size: int = 100,
+    incremental: bool = False,
+    full_sync: bool = False,
+) -> list[dict[str, Any]]:
     """
     Fetch all insights (highlights) by project. Uses GET /v1/highlights?project_id={id} per project
     (no single "all highlights" endpoint). Returns combined list with project_id set on each item.
+    With incremental=True, only highlights changed since the last sync are downloaded and merged
+    into the local store (api.dovetail_sync), which is then read back; full_sync forces a
+    full reconcile of the store (dropping highlights deleted upstream).
     """
+    from api import dovetail_sync  # imports this module, so not at module level
+
     if not api_key or not api_key.strip():
         return []
     projects = get_projects(api_key)
@@ -163,23 +221,24 @@ def get_all_insights(api_key: str, page_size: int = 100) -> list[dict[str, Any]]
         return []
     all_items: list[dict[str, Any]] = []
     try:
-        with create_client(timeout=HTTP_TIMEOUT) as client:
-            for p in projects:
-                pid = p.get("id")
-                if pid is None or str(pid).strip() == "":
-                    continue
-                pid = str(pid).strip()
-                start_cursor: Optional[str] = None
-                while True:
-                    items, next_cursor = _get_highlights_page(client, api_key, pid, start_cursor)
-                    for ins in items:
-                        if isinstance(ins, dict):
-                            rec = dict(ins)
-                            rec.setdefault("project_id", pid)
-                            all_items.append(rec)
-                    if not next_cursor:
-                        break
-                    start_cursor = next_cursor
+        for p in projects:
+            pid = p.get("id")
+            if pid is None or str(pid).strip() == "":
+                continue
+            pid = str(pid).strip()
+            if incremental:
+                all_items.extend(dovetail_sync.sync_and_load(api_key, pid, full=full_sync))
+                continue
+            start_cursor: Optional[str] = None
+            while True:
+                items, next_cursor = _get_highlights_page(api_key, pid, start_cursor)
+                for ins in items:
+                    if isinstance(ins, dict):
+                        ins.setdefault("project_id", pid)
+                        all_items.append(ins)
+                if not next_cursor:
+                    break
+                start_cursor = next_cursor
         return all_items
     except Exception as e:
         logger.exception("Dovetail get_all_insights (highlights by project) failed: %s", e)
@@ -199,10 +258,13 @@ def get_insights(
     project_id: Optional[str] = None,
     per_page: int = 50,
     page: int = 1,
+    filters: Optional[dict[str, Any]] = None,
 ) -> list[dict[str, Any]]:
     """
     Fetch insights (highlights) with pagination. If project_id is given, uses
-    GET /v1/highlights?project_id={project_id} with cursor pagination until no more pages.
+    GET /v1/highlights?project_id={project_id} with cursor pagination until no more pages
+    (use get_insights_page to load a project page by page instead).
+    filters (see highlight_filter_params) apply to the per-project request only.
     Returns list of highlight/insight dicts with project_id set.
     """
     if not api_key or not api_key.strip():
@@ -212,19 +274,15 @@ def get_insights(
     all_insights: list[dict[str, Any]] = []
     start_cursor: Optional[str] = None
     try:
-        with create_client(timeout=HTTP_TIMEOUT) as client:
-            while True:
-                items, next_cursor = _get_insights_page(client, api_key, project_id, start_cursor)
-                for ins in items:
-                    if isinstance(ins, dict):
-                        ins = dict(ins)
-                        ins.setdefault("project_id", project_id)
-                        all_insights.append(ins)
-                if not next_cursor or len(all_insights) >= MAX_INSIGHTS_PER_PROJECT:
-                    break
-                start_cursor = next_cursor
-        if len(all_insights) >= MAX_INSIGHTS_PER_PROJECT:
-            logger.info("Dovetail get_insights for project %s capped at %s insights.", project_id, MAX_INSIGHTS_PER_PROJECT)
+        while True:
+            items, next_cursor = _get_insights_page(api_key, project_id, start_cursor, filters)
+            for ins in items:
+                if isinstance(ins, dict):
+                    ins.setdefault("project_id", project_id)
+                    all_insights.append(ins)
+            if not next_cursor:
+                break
+            start_cursor = next_cursor
         return all_insights
     except Exception as e:
         logger.exception("Dovetail get_insights for project %s failed: %s", project_id, e)
@@ -239,17 +297,15 @@ def get_insight(api_key: str, insight_id: str) -> Optional[dict[str, Any]]:
     if not api_key or not api_key.strip() or not insight_id or not str(insight_id).strip():
         return None
     try:
-        with create_client(timeout=HTTP_TIMEOUT) as client:
-            r = client.get(
-                f"{DOVETAIL_BASE}/insights/{insight_id.strip()}",
-                headers=_headers(api_key),
-            )
-            r.raise_for_status()
-            data = r.json()
-            logger.info("Dovetail insight API response (insight_id=%s): %s", insight_id, json.dumps(data, default=str))
-            if isinstance(data, dict) and "data" in data:
-                return dict(data["data"]) if isinstance(data["data"], dict) else None
-            return dict(data) if isinstance(data, dict) else None
+        r = get(
+            f"{DOVETAIL_BASE}/insights/{insight_id.strip()}",
+            headers=_headers(api_key),
+        )
+        data = r.json()
+        logger.info("Dovetail insight API response (insight_id=%s): %s", insight_id, json.dumps(data, default=str))
+        if isinstance(data, dict) and "data" in data:
+            return dict(data["data"]) if isinstance(data["data"], dict) else None
+        return dict(data) if isinstance(data, dict) else None
     except httpx.HTTPStatusError as e:
         logger.warning("Dovetail get_insight %s: HTTP %s", insight_id, e.response.status_code)
         return None
@@ -258,64 +314,55 @@ def get_insight(api_key: str, insight_id: str) -> Optional[dict[str, Any]]:
         return None
 
 
-def sync_dovetail_projects(api_key: str) -> dict[str, Any]:
+def _get_item(api_key: str, path: str, item_id: str) -> Optional[dict[str, Any]]:
+    """GET /v1/{path}/{item_id}. Returns the object, or None on failure/missing."""
+    if not api_key or not api_key.strip() or not item_id or not str(item_id).strip():
+        return None
+    try:
+        r = get(f"{DOVETAIL_BASE}/{path}/{str(item_id).strip()}", headers=_headers(api_key))
+        data = r.json()
+        if isinstance(data, dict) and "data" in data:
+            return dict(data["data"]) if isinstance(data["data"], dict) else None
+        return dict(data) if isinstance(data, dict) else None
+    except httpx.HTTPStatusError as e:
+        logger.warning("Dovetail get %s/%s: HTTP %s", path, item_id, e.response.status_code)
+        return None
+    except Exception as e:
+        logger.warning("Dovetail get %s/%s failed: %s", path, item_id, e)
+        return None
+
+
+def get_highlight(api_key: str, highlight_id: str) -> Optional[dict[str, Any]]:
+    """Fetch one highlight from GET /v1/highlights/{highlight_id}. None on failure/missing."""
+    return _get_item(api_key, "highlights", highlight_id)
+
+
+def get_project(api_key: str, project_id: str) -> Optional[dict[str, Any]]:
+    """Fetch one project from GET /v1/projects/{project_id}. None on failure/missing."""
+    return _get_item(api_key, "projects", project_id)
+
+
+def sync_dovetail_projects(api_key: str, incremental: bool = False, full_sync: bool = False) -> dict[str, Any]:
     """
     Fetch all projects, then for each project fetch highlights (GET /v1/highlights?project_id=...),
     then fetch full insight details per item. Returns structure with projects and nested insights.
+    Runs the pipelined engine in api.dovetail_async.sync_projects (projects, highlight pages and
+    detail fetches overlap under one concurrency budget; each insight ID is fetched once).
+    With incremental=True, highlights come from a delta sync against the local store
+    (full_sync: a full reconcile).
     """
-    result: dict[str, Any] = {"projects": []}
+    from api import dovetail_async
+    from app.run_async import run_async
+
     if not api_key or not api_key.strip():
         logger.warning("sync_dovetail_projects: empty API key")
-        return result
+        return {"projects": []}
 
-    projects = get_projects(api_key)
-    if not projects:
+    result = run_async(dovetail_async.sync_projects(api_key, incremental=incremental, full_sync=full_sync))
+    if not result["projects"]:
         logger.info("sync_dovetail_projects: no projects returned")
         return result
 
-    for proj in projects:
-        pid = proj.get("id")
-        if pid is None or str(pid).strip() == "":
-            continue
-        pid = str(pid).strip()
-        name = proj.get("name") or proj.get("title") or ""
-        project_node: dict[str, Any] = {
-            "id": pid,
-            "name": name,
-            "insights": [],
-        }
-
-        insight_refs = get_insights(api_key, project_id=pid)
-        if not insight_refs:
-            result["projects"].append(project_node)
-            continue
-
-        def fetch_one(ins_ref: dict[str, Any]) -> Optional[dict[str, Any]]:
-            iid = ins_ref.get("id") if isinstance(ins_ref, dict) else None
-            if not iid:
-                return None
-            details = get_insight(api_key, str(iid))
-            if details is None:
-                return {"id": str(iid), "title": ins_ref.get("title") or ins_ref.get("name") or "", "details": {}}
-            return {
-                "id": str(iid),
-                "title": details.get("title") or details.get("name") or "",
-                "details": details,
-            }
-
-        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
-            futures = {executor.submit(fetch_one, ref): ref for ref in insight_refs}
-            for future in as_completed(futures):
-                try:
-                    item = future.result()
-                    if item:
-                        project_node["insights"].append(item)
-                except Exception as e:
-                    ref = futures.get(future)
-                    logger.warning("sync_dovetail_projects: insight fetch failed for %s: %s", ref, e)
-
-        result["projects"].append(project_node)
-
     logger.info("sync_dovetail_projects: fetched %s projects", len(result["projects"]))
     try:
         logger.info("sync_dovetail_projects result (structured JSON):\n%s", json.dumps(result, indent=2, default=str))
@@ -325,7 +372,6 @@ def sync_dovetail_projects(api_key: str) -> dict[str, Any]:
 
 
 if __name__ == "__main__":
-    import os
     import sys
     from pathlib import Path
     sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -334,5 +380,5 @@ if __name__ == "__main__":
     if not key:
         print("Set DOVETAIL_API_KEY in environment to run sync.", file=sys.stderr)
         sys.exit(1)
-    out = sync_dovetail_projects(key)
+    out = sync_dovetail_projects(key, incremental="--incremental" in sys.argv)
     print(json.dumps(out, indent=2, default=str))
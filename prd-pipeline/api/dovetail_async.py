@@ -0,0 +1,462 @@
+"""
+Asyncio Dovetail client. Same return shapes as api.dovetail; use when fanning out many
+highlight/insight requests from one event loop (e.g. via app.run_async.run_async).
+Every function takes an optional shared AsyncClient and Semaphore so callers can bound
+total in-flight requests across a whole fan-out.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Optional
+
+import httpx
+
+from api import dovetail_sync
+from api.base import async_client_scope, async_get, async_stream
+from api.dovetail import (
+    DOVETAIL_BASE,
+    PAGE_LIMIT,
+    _headers,
+    _parse_list_response,
+    _with_project_id,
+)
+from api.jsonstream import ItemTransform, aread_list_page
+from app.config import MAX_CONCURRENT_ASYNC_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+async def _iter_project_pages(
+    api_key: str,
+    client: httpx.AsyncClient,
+    semaphore: Optional[asyncio.Semaphore],
+) -> AsyncIterator[list[dict[str, Any]]]:
+    """Yield pages of projects (with an id) from GET /v1/projects. Stops (after logging) on failure."""
+    start_cursor: Optional[str] = None
+    while True:
+        params: dict[str, Any] = {"page[limit]": PAGE_LIMIT}
+        if start_cursor:
+            params["page[start_cursor]"] = start_cursor
+        try:
+            async with async_stream(
+                client,
+                f"{DOVETAIL_BASE}/projects",
+                headers=_headers(api_key),
+                params=params,
+                semaphore=semaphore,
+            ) as r:
+                items, next_cursor = _parse_list_response(await aread_list_page(r, "dovetail/projects"))
+        except Exception as e:
+            logger.exception("Dovetail async get_projects failed: %s", e)
+            return
+        yield [p for p in items if isinstance(p, dict) and p.get("id") not in (None, "")]
+        if not next_cursor:
+            return
+        start_cursor = next_cursor
+
+
+async def get_projects(
+    api_key: str,
+    *,
+    client: Optional[httpx.AsyncClient] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+) -> list[dict[str, Any]]:
+    """Fetch ALL projects from GET /v1/projects using cursor pagination. See api.dovetail.get_projects."""
+    if not api_key or not api_key.strip():
+        return []
+    all_projects: list[dict[str, Any]] = []
+    async with async_client_scope(client) as c:
+        async for page in _iter_project_pages(api_key, c, semaphore):
+            all_projects.extend(page)
+    return all_projects
+
+
+async def _get_highlights_page(
+    client: httpx.AsyncClient,
+    api_key: str,
+    project_id: str,
+    start_cursor: Optional[str] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    filters: Optional[dict[str, Any]] = None,
+    transform: Optional[ItemTransform] = None,
+) -> tuple[list[Any], Optional[str]]:
+    """Fetch one page of highlights for a project. Returns (items, next_cursor)."""
+    try:
+        return await _fetch_highlights_page(client, api_key, project_id, start_cursor, semaphore, filters, transform)
+    except Exception as e:
+        logger.warning("Dovetail async _get_highlights_page failed for project %s: %s", project_id, e)
+        return [], None
+
+
+async def _fetch_highlights_page(
+    client: httpx.AsyncClient,
+    api_key: str,
+    project_id: str,
+    start_cursor: Optional[str],
+    semaphore: Optional[asyncio.Semaphore],
+    filters: Optional[dict[str, Any]],
+    transform: Optional[ItemTransform] = None,
+    use_cache: bool = True,
+) -> tuple[list[Any], Optional[str]]:
+    """Like _get_highlights_page, but raises on HTTP/transport errors."""
+    params: dict[str, Any] = {"project_id": project_id, "page[limit]": PAGE_LIMIT, **(filters or {})}
+    if start_cursor:
+        params["page[start_cursor]"] = start_cursor
+    async with async_stream(
+        client,
+        f"{DOVETAIL_BASE}/highlights",
+        headers=_headers(api_key),
+        params=params,
+        semaphore=semaphore,
+        use_cache=use_cache,
+    ) as r:
+        return _parse_list_response(await aread_list_page(r, "dovetail/highlights", transform=transform))
+
+
+async def get_insights_page(
+    api_key: str,
+    project_id: str,
+    cursor: Optional[str] = None,
+    *,
+    client: Optional[httpx.AsyncClient] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    filters: Optional[dict[str, Any]] = None,
+    transform: Optional[ItemTransform] = None,
+    use_cache: bool = True,
+) -> tuple[list[Any], Optional[str]]:
+    """
+    One page of highlights plus the cursor to resume from. See api.dovetail.get_insights_page.
+    use_cache=False skips the response cache.
+    """
+    if not api_key or not api_key.strip() or not project_id:
+        return [], None
+    try:
+        async with async_client_scope(client) as c:
+            return await _fetch_highlights_page(
+                c, api_key, project_id, cursor, semaphore, filters, _with_project_id(project_id, transform), use_cache
+            )
+    except Exception as e:
+        logger.warning("Dovetail async get_insights_page failed for project %s: %s", project_id, e)
+        return [], cursor
+
+
+async def get_insight_pages(
+    api_key: str,
+    cursors: dict[str, Optional[str]],
+    *,
+    max_concurrency: int = MAX_CONCURRENT_ASYNC_REQUESTS,
+    filters: Optional[dict[str, Any]] = None,
+    transform: Optional[ItemTransform] = None,
+    use_cache: bool = True,
+) -> dict[str, tuple[list[Any], Optional[str]]]:
+    """
+    Next page for each project in cursors (project_id -> resume cursor, None for the first
+    page), concurrently on one client. Returns project_id -> (highlights, next cursor).
+    transform is applied to each highlight as it is parsed (see get_insights_page).
+    use_cache=False skips the response cache.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    project_ids = list(cursors)
+    async with async_client_scope() as client:
+        results = await asyncio.gather(
+            *(
+                get_insights_page(
+                    api_key,
+                    pid,
+                    cursors[pid],
+                    client=client,
+                    semaphore=semaphore,
+                    filters=filters,
+                    transform=transform,
+                    use_cache=use_cache,
+                )
+                for pid in project_ids
+            ),
+            return_exceptions=True,
+        )
+    out: dict[str, tuple[list[Any], Optional[str]]] = {}
+    for pid, res in zip(project_ids, results):
+        if isinstance(res, BaseException):
+            logger.warning("Dovetail async insights page for project %s failed: %s", pid, res)
+            res = ([], cursors[pid])
+        out[pid] = res
+    return out
+
+
+async def get_insights(
+    api_key: str,
+    project_id: str,
+    *,
+    client: Optional[httpx.AsyncClient] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    filters: Optional[dict[str, Any]] = None,
+    transform: Optional[ItemTransform] = None,
+) -> list[Any]:
+    """
+    Fetch highlights for one project with cursor pagination. See api.dovetail.get_insights.
+    transform is applied to each highlight (project_id set) as it is parsed.
+    """
+    if not api_key or not api_key.strip() or not project_id:
+        return []
+    all_insights: list[Any] = []
+    start_cursor: Optional[str] = None
+    item_transform = _with_project_id(project_id, transform)
+    async with async_client_scope(client) as c:
+        while True:
+            items, next_cursor = await _get_highlights_page(
+                c, api_key, project_id, start_cursor, semaphore, filters, item_transform
+            )
+            all_insights.extend(items)
+            if not next_cursor:
+                break
+            start_cursor = next_cursor
+    return all_insights
+
+
+async def _get_item(
+    api_key: str,
+    path: str,
+    item_id: str,
+    client: Optional[httpx.AsyncClient],
+    semaphore: Optional[asyncio.Semaphore],
+) -> Optional[dict[str, Any]]:
+    """GET /v1/{path}/{item_id}. Returns the object, or None on failure/missing."""
+    if not api_key or not api_key.strip() or not item_id or not str(item_id).strip():
+        return None
+    try:
+        async with async_client_scope(client) as c:
+            r = await async_get(
+                c,
+                f"{DOVETAIL_BASE}/{path}/{str(item_id).strip()}",
+                headers=_headers(api_key),
+                semaphore=semaphore,
+            )
+        data = r.json()
+        if isinstance(data, dict) and "data" in data:
+            return dict(data["data"]) if isinstance(data["data"], dict) else None
+        return dict(data) if isinstance(data, dict) else None
+    except httpx.HTTPStatusError as e:
+        logger.warning("Dovetail async get %s/%s: HTTP %s", path, item_id, e.response.status_code)
+        return None
+    except Exception as e:
+        logger.warning("Dovetail async get %s/%s failed: %s", path, item_id, e)
+        return None
+
+
+async def get_insight(
+    api_key: str,
+    insight_id: str,
+    *,
+    client: Optional[httpx.AsyncClient] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+) -> Optional[dict[str, Any]]:
+    """Fetch full insight details from GET /v1/insights/{insight_id}. None on failure/missing."""
+    return await _get_item(api_key, "insights", insight_id, client, semaphore)
+
+
+async def get_highlight(
+    api_key: str,
+    highlight_id: str,
+    *,
+    client: Optional[httpx.AsyncClient] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+) -> Optional[dict[str, Any]]:
+    """Fetch one highlight from GET /v1/highlights/{highlight_id}. None on failure/missing."""
+    return await _get_item(api_key, "highlights", highlight_id, client, semaphore)
+
+
+async def get_project(
+    api_key: str,
+    project_id: str,
+    *,
+    client: Optional[httpx.AsyncClient] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+) -> Optional[dict[str, Any]]:
+    """Fetch one project from GET /v1/projects/{project_id}. None on failure/missing."""
+    return await _get_item(api_key, "projects", project_id, client, semaphore)
+
+
+async def _get_many(
+    path: str,
+    api_key: str,
+    ids: list[str],
+    client: Optional[httpx.AsyncClient],
+    semaphore: Optional[asyncio.Semaphore],
+    max_concurrency: int,
+) -> dict[str, Optional[dict[str, Any]]]:
+    """
+    Fetch /v1/{path}/{id} for every ID in parallel on one client. The semaphore (the caller's,
+    else a new one of max_concurrency) bounds in-flight requests. Duplicate IDs are fetched once.
+    """
+    unique_ids = list(dict.fromkeys(str(i).strip() for i in ids if i and str(i).strip()))
+    semaphore = semaphore or asyncio.Semaphore(max(1, max_concurrency))
+    async with async_client_scope(client) as c:
+        results = await asyncio.gather(
+            *(_get_item(api_key, path, item_id, c, semaphore) for item_id in unique_ids),
+        )
+    return dict(zip(unique_ids, results))
+
+
+async def get_insights_for_projects(
+    api_key: str,
+    project_ids: list[str],
+    *,
+    max_concurrency: int = MAX_CONCURRENT_ASYNC_REQUESTS,
+    filters: Optional[dict[str, Any]] = None,
+    transform: Optional[ItemTransform] = None,
+) -> dict[str, list[Any]]:
+    """
+    Fetch highlights for many projects on one client under a shared semaphore.
+    filters (see api.dovetail.highlight_filter_params) are sent with every page; transform
+    is applied to each highlight as it is parsed.
+    Returns mapping project_id -> list of highlight dicts (empty list on failure).
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    async with async_client_scope() as client:
+        results = await asyncio.gather(
+            *(
+                get_insights(api_key, pid, client=client, semaphore=semaphore, filters=filters, transform=transform)
+                for pid in project_ids
+            ),
+            return_exceptions=True,
+        )
+    out: dict[str, list[Any]] = {}
+    for pid, res in zip(project_ids, results):
+        if isinstance(res, BaseException):
+            logger.warning("Dovetail async insights for project %s failed: %s", pid, res)
+            res = []
+        out[pid] = res
+    return out
+
+
+async def get_insights_by_ids(
+    api_key: str,
+    insight_ids: list[str],
+    *,
+    client: Optional[httpx.AsyncClient] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    max_concurrency: int = MAX_CONCURRENT_ASYNC_REQUESTS,
+) -> dict[str, Optional[dict[str, Any]]]:
+    """
+    Fetch full insight details for many IDs on one client under a shared semaphore.
+    Returns mapping insight_id -> details (None when missing/failed). Duplicate IDs are fetched once.
+    """
+    return await _get_many("insights", api_key, insight_ids, client, semaphore, max_concurrency)
+
+
+async def get_highlights_by_ids(
+    api_key: str,
+    highlight_ids: list[str],
+    *,
+    client: Optional[httpx.AsyncClient] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    max_concurrency: int = MAX_CONCURRENT_ASYNC_REQUESTS,
+) -> dict[str, Optional[dict[str, Any]]]:
+    """Fetch many highlights by ID in parallel. Returns mapping highlight_id -> highlight (None when missing/failed)."""
+    return await _get_many("highlights", api_key, highlight_ids, client, semaphore, max_concurrency)
+
+
+async def get_projects_by_ids(
+    api_key: str,
+    project_ids: list[str],
+    *,
+    client: Optional[httpx.AsyncClient] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    max_concurrency: int = MAX_CONCURRENT_ASYNC_REQUESTS,
+) -> dict[str, Optional[dict[str, Any]]]:
+    """Fetch many projects by ID in parallel. Returns mapping project_id -> project (None when missing/failed)."""
+    return await _get_many("projects", api_key, project_ids, client, semaphore, max_concurrency)
+
+
+async def sync_projects(
+    api_key: str,
+    *,
+    incremental: bool = False,
+    full_sync: bool = False,
+    max_concurrency: int = MAX_CONCURRENT_ASYNC_REQUESTS,
+) -> dict[str, Any]:
+    """
+    Pipelined equivalent of api.dovetail.sync_dovetail_projects (same output shape).
+
+    Project listing, per-project highlight paging and insight detail fetches all overlap
+    on one client under one semaphore: each project starts as soon as its listing page
+    lands, and each detail fetch starts as soon as its highlight page lands. Every insight
+    ID is fetched once even if it appears in several projects. Output keeps listing order
+    for projects and highlight order within each project. incremental / full_sync: see
+    api.dovetail_sync.sync_and_load.
+    """
+    result: dict[str, Any] = {"projects": []}
+    if not api_key or not api_key.strip():
+        return result
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    detail_tasks: dict[str, asyncio.Task[Optional[dict[str, Any]]]] = {}
+
+    async with async_client_scope() as client:
+
+        def detail(iid: str) -> asyncio.Task[Optional[dict[str, Any]]]:
+            task = detail_tasks.get(iid)
+            if task is None:
+                task = asyncio.ensure_future(get_insight(api_key, iid, client=client, semaphore=semaphore))
+                detail_tasks[iid] = task
+            return task
+
+        async def highlights_for(pid: str) -> list[dict[str, Any]]:
+            if incremental:
+                refs = await asyncio.to_thread(dovetail_sync.sync_and_load, api_key, pid, full=full_sync)
+                for ref in refs:
+                    if ref.get("id"):
+                        detail(str(ref["id"]))
+                return refs
+            refs = []
+            start_cursor: Optional[str] = None
+            while True:
+                items, next_cursor = await _get_highlights_page(client, api_key, pid, start_cursor, semaphore)
+                for ins in items:
+                    if isinstance(ins, dict):
+                        refs.append(ins)
+                        if ins.get("id"):
+                            detail(str(ins["id"]))
+                if not next_cursor:
+                    return refs
+                start_cursor = next_cursor
+
+        async def project_node(proj: dict[str, Any]) -> dict[str, Any]:
+            pid = str(proj["id"]).strip()
+            node: dict[str, Any] = {"id": pid, "name": proj.get("name") or proj.get("title") or "", "insights": []}
+            try:
+                refs = await highlights_for(pid)
+            except Exception as e:
+                logger.warning("Dovetail async sync: highlights for project %s failed: %s", pid, e)
+                return node
+            for ref in refs:
+                iid = ref.get("id")
+                if not iid:
+                    continue
+                details = await detail(str(iid))
+                if details is None:
+                    node["insights"].append({"id": str(iid), "title": ref.get("title") or ref.get("name") or "", "details": {}})
+                else:
+                    node["insights"].append({
+                        "id": str(iid),
+                        "title": details.get("title") or details.get("name") or "",
+                        "details": details,
+                    })
+            return node
+
+        project_tasks: list[asyncio.Task[dict[str, Any]]] = []
+        seen_pids: set[str] = set()
+        async for page in _iter_project_pages(api_key, client, semaphore):
+            for proj in page:
+                pid = str(proj["id"]).strip()
+                if pid and pid not in seen_pids:
+                    seen_pids.add(pid)
+                    project_tasks.append(asyncio.ensure_future(project_node(proj)))
+        result["projects"] = list(await asyncio.gather(*project_tasks))
+
+    logger.info(
+        "Dovetail async sync: %s projects, %s unique insights fetched",
+        len(result["projects"]),
+        len(detail_tasks),
+    )
+    return result
@@ -0,0 +1,277 @@
+"""
+Incremental (delta) sync of Dovetail highlights into a local SQLite store.
+
+Each project keeps a high-water mark: the latest updated_at/created_at seen. A delta sync
+pages highlights newest-first and stops at the first page that reaches the mark;
+highlights flagged deleted become tombstones. A full sync re-reads every page and also
+tombstones highlights the upstream no longer returns (hard deletes never show up in a delta
+page). A project's sync is full on first load, when the caller asks for it, and once its
+last full sync is older than HIGHLIGHT_FULL_SYNC_INTERVAL. Rows are scoped by a hash of the
+API key, so two workspaces never share data.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+from api.dovetail import fetch_highlights_page
+from app.config import HIGHLIGHT_FULL_SYNC_INTERVAL, HIGHLIGHT_STORE_PATH
+
+logger = logging.getLogger(__name__)
+
+# Newest-changed first, so a delta sync can stop once it reaches already-seen highlights
+DELTA_SORT = "updated_at:desc"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS highlights (
+    workspace TEXT NOT NULL,
+    project_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    changed_at REAL,
+    deleted INTEGER NOT NULL DEFAULT 0,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (workspace, id)
+);
+CREATE INDEX IF NOT EXISTS highlights_project ON highlights (workspace, project_id, deleted);
+CREATE TABLE IF NOT EXISTS watermarks (
+    workspace TEXT NOT NULL,
+    project_id TEXT NOT NULL,
+    watermark REAL,
+    full_synced_at REAL,
+    PRIMARY KEY (workspace, project_id)
+);
+"""
+
+
+@dataclass
+class SyncStats:
+    """Outcome of syncing one project."""
+    project_id: str
+    full: bool = False
+    pages: int = 0
+    fetched: int = 0
+    deleted: int = 0
+    watermark: Optional[float] = None
+
+
+def _workspace(api_key: str) -> str:
+    return hashlib.sha256(api_key.strip().encode()).hexdigest()[:16]
+
+
+def _changed_at(item: dict[str, Any]) -> Optional[float]:
+    """Epoch seconds of updated_at (or created_at), None if missing/unparseable."""
+    for key in ("updated_at", "updatedAt", "created_at", "createdAt"):
+        val = item.get(key)
+        if not isinstance(val, str) or not val.strip():
+            continue
+        try:
+            dt = datetime.fromisoformat(val.strip().replace("Z", "+00:00"))
+        except ValueError:
+            continue
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.timestamp()
+    return None
+
+
+def _is_deleted(item: dict[str, Any]) -> bool:
+    return bool(item.get("deleted") or item.get("deleted_at") or item.get("deletedAt"))
+
+
+class HighlightStore:
+    """SQLite store of highlights and per-project watermarks. One connection per thread."""
+
+    def __init__(self, path: Path = HIGHLIGHT_STORE_PATH) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        with self._write_lock:
+            conn = self._conn()
+            conn.executescript(_SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(watermarks)")}
+            if "full_synced_at" not in columns:  # stores created before age-based reconciles
+                conn.execute("ALTER TABLE watermarks ADD COLUMN full_synced_at REAL")
+            conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def watermark(self, workspace: str, project_id: str) -> Optional[float]:
+        row = self._conn().execute(
+            "SELECT watermark FROM watermarks WHERE workspace = ? AND project_id = ?", (workspace, project_id)
+        ).fetchone()
+        return row[0] if row else None
+
+    def full_synced_at(self, workspace: str, project_id: str) -> Optional[float]:
+        """Epoch seconds of the project's last full sync, None if there was none."""
+        row = self._conn().execute(
+            "SELECT full_synced_at FROM watermarks WHERE workspace = ? AND project_id = ?", (workspace, project_id)
+        ).fetchone()
+        return row[0] if row else None
+
+    def ids(self, workspace: str, project_id: str) -> set[str]:
+        rows = self._conn().execute(
+            "SELECT id FROM highlights WHERE workspace = ? AND project_id = ? AND deleted = 0", (workspace, project_id)
+        )
+        return {r[0] for r in rows}
+
+    def apply(
+        self,
+        workspace: str,
+        project_id: str,
+        items: list[dict[str, Any]],
+        tombstone_ids: set[str],
+        watermark: Optional[float],
+        full: bool = False,
+    ) -> int:
+        """
+        Upsert items, tombstone deleted ones, advance the watermark and (full) record the full
+        sync time in one transaction. Returns tombstones written.
+        """
+        upserts = []
+        tombstones = set(tombstone_ids)
+        for item in items:
+            iid = str(item.get("id", "")).strip()
+            if not iid:
+                continue
+            if _is_deleted(item):
+                tombstones.add(iid)
+                continue
+            upserts.append((workspace, project_id, iid, _changed_at(item), json.dumps(item, default=str)))
+        with self._write_lock:
+            conn = self._conn()
+            conn.executemany(
+                "INSERT INTO highlights (workspace, project_id, id, changed_at, deleted, payload) VALUES (?, ?, ?, ?, 0, ?)"
+                " ON CONFLICT (workspace, id) DO UPDATE SET project_id = excluded.project_id,"
+                " changed_at = excluded.changed_at, deleted = 0, payload = excluded.payload",
+                upserts,
+            )
+            conn.executemany(
+                "UPDATE highlights SET deleted = 1 WHERE workspace = ? AND id = ?",
+                [(workspace, iid) for iid in tombstones],
+            )
+            if watermark is not None or full:
+                conn.execute(
+                    "INSERT INTO watermarks (workspace, project_id, watermark, full_synced_at) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT (workspace, project_id) DO UPDATE SET"
+                    " watermark = CASE WHEN excluded.watermark IS NULL THEN watermark"
+                    " ELSE MAX(COALESCE(watermark, 0), excluded.watermark) END,"
+                    " full_synced_at = COALESCE(excluded.full_synced_at, full_synced_at)",
+                    (workspace, project_id, watermark, time.time() if full else None),
+                )
+            conn.commit()
+        return len(tombstones)
+
+    def load(self, workspace: str, project_id: str) -> list[dict[str, Any]]:
+        """Live (non-tombstoned) highlights for a project, newest first."""
+        rows = self._conn().execute(
+            "SELECT payload FROM highlights WHERE workspace = ? AND project_id = ? AND deleted = 0"
+            " ORDER BY changed_at DESC, id",
+            (workspace, project_id),
+        )
+        return [json.loads(r[0]) for r in rows]
+
+
+_store: Optional[HighlightStore] = None
+_store_lock = threading.Lock()
+
+
+def set_store(store: Optional[HighlightStore]) -> None:
+    """Use another store (e.g. a temp file for tests/benchmarks); None reverts to the default file."""
+    global _store
+    with _store_lock:
+        _store = store
+
+
+def get_store() -> HighlightStore:
+    """Process-wide highlight store."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = HighlightStore()
+    return _store
+
+
+def sync_project(api_key: str, project_id: str, *, full: bool = False) -> SyncStats:
+    """
+    Bring the local copy of one project's highlights up to date. Runs a full sync (every
+    page, tombstoning highlights no longer listed) when full is set, when the project has
+    no watermark yet, or when its last full sync is older than HIGHLIGHT_FULL_SYNC_INTERVAL.
+    Raises on upstream errors; the store and watermark are only updated once every needed
+    page has been read.
+    """
+    store = get_store()
+    ws = _workspace(api_key)
+    if not full and HIGHLIGHT_FULL_SYNC_INTERVAL > 0:
+        last_full = store.full_synced_at(ws, project_id)
+        full = last_full is None or time.time() - last_full >= HIGHLIGHT_FULL_SYNC_INTERVAL
+    watermark = None if full else store.watermark(ws, project_id)
+    stats = SyncStats(project_id=project_id, full=watermark is None)
+
+    items: list[dict[str, Any]] = []
+    newest = watermark
+    cursor: Optional[str] = None
+    while True:
+        page, cursor = fetch_highlights_page(api_key, project_id, cursor, sort=DELTA_SORT)
+        stats.pages += 1
+        page_times = []
+        for ins in page:
+            if not isinstance(ins, dict):
+                continue
+            ins.setdefault("project_id", project_id)
+            items.append(ins)
+            ts = _changed_at(ins)
+            page_times.append(ts)
+            if ts is not None and (newest is None or ts > newest):
+                newest = ts
+        if not cursor:
+            break
+        # Stop once a page that really is sorted newest-first reaches already-seen highlights
+        if watermark is not None and page_times and None not in page_times:
+            if page_times == sorted(page_times, reverse=True) and page_times[-1] <= watermark:
+                break
+
+    tombstones: set[str] = set()
+    if stats.full:
+        seen = {str(i.get("id", "")).strip() for i in items}
+        tombstones = store.ids(ws, project_id) - seen
+    stats.fetched = len(items)
+    stats.deleted = store.apply(ws, project_id, items, tombstones, newest, full=stats.full)
+    stats.watermark = newest
+    logger.info(
+        "Dovetail %s sync project %s: %s page(s), %s highlight(s), %s tombstone(s)",
+        "full" if stats.full else "delta", project_id, stats.pages, stats.fetched, stats.deleted,
+    )
+    return stats
+
+
+def load_highlights(api_key: str, project_id: str) -> list[dict[str, Any]]:
+    """Highlights for a project from the local store (no network)."""
+    return get_store().load(_workspace(api_key), project_id)
+
+
+def sync_and_load(api_key: str, project_id: str, *, full: bool = False) -> list[dict[str, Any]]:
+    """
+    Sync one project (delta, or full: see sync_project), then return its merged highlights.
+    On sync failure, returns the stored copy.
+    """
+    try:
+        sync_project(api_key, project_id, full=full)
+    except Exception as e:
+        logger.warning("Dovetail delta sync for project %s failed; using stored highlights: %s", project_id, e)
+    return load_highlights(api_key, project_id)
@@ -0,0 +1,270 @@
+"""
+Incremental parsing of list responses ({"data": [...], ...} or a bare list).
+
+r.json() decodes the whole body into one str and then builds the whole page as one object
+tree. read_list_page / aread_list_page instead feed the body in chunks (r.iter_bytes() /
+r.aiter_bytes()) to a parser that produces the data array one item at a time, projecting
+(api.projection) and optionally transforming each item before the next is parsed. Pages the
+response cache will not keep are fetched with api.base.stream / async_stream, so the chunks
+come off the network as they arrive and the body is never held whole: with a transform that
+normalizes into compact records, peak memory is one item plus the chunk buffer and the
+records. Cacheable pages are read in full first (the cache stores the body, and coalesced
+callers share one response); only their parse is incremental. Items are decoded by json's C
+scanner.
+"""
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+import httpx
+
+from api.projection import ProjectionSpec, project, spec_for
+from app.config import HTTP_STREAM_CHUNK_BYTES, HTTP_STREAM_JSON
+
+_WS = re.compile(r"[ \t\n\r]*")
+_decoder = json.JSONDecoder()
+
+# Applied to each (projected) dict item as it is parsed, e.g. a normalizer building records.
+# Items it maps to None are dropped.
+ItemTransform = Callable[[dict[str, Any]], Any]
+
+
+class _Incomplete(Exception):
+    """The buffered text ends inside the next token or value; feed more before retrying."""
+
+
+# Parser states: where the next step() resumes
+_START, _OBJ_FIRST, _OBJ_KEY, _OBJ_NEXT, _ARRAY_FIRST, _ARRAY_ITEM, _ARRAY_NEXT, _DONE = range(8)
+_NO_ITEM = object()
+
+
+class JSONPageStream:
+    """
+    Incremental parser for a list response body. Push bytes with feed() (and close() at the
+    end of the body) and take the items parsed so far from drain(); or pass the chunks in and
+    iterate. Once parsing finishes, .rest holds the other top-level fields (page, links,
+    pageCursor, ...), or None when the body was a bare list.
+    """
+
+    def __init__(self, chunks: Iterable[bytes] = (), array_key: str = "data") -> None:
+        self._chunks = chunks
+        self._utf8 = codecs.getincrementaldecoder("utf-8-sig")()
+        self._buf = ""
+        self._pos = 0
+        self._closed = False
+        self._state = _START
+        self._in_object = False
+        # After an incomplete value, wait until the unparsed text doubles before re-scanning it,
+        # so a large item is re-scanned O(log n) times rather than once per chunk
+        self._need = 0
+        self.array_key = array_key
+        self.rest: Optional[dict[str, Any]] = None
+        self.has_array = False  # array_key held a list (streamed, so not in rest)
+
+    def feed(self, chunk: bytes) -> None:
+        """Append the next chunk of the body (dropping consumed text)."""
+        self._buf = self._buf[self._pos:] + self._utf8.decode(chunk)
+        self._pos = 0
+
+    def close(self) -> None:
+        """Mark the end of the body; drain() then parses what is left or raises."""
+        self._buf = self._buf[self._pos:] + self._utf8.decode(b"", final=True)
+        self._pos = 0
+        self._closed = True
+
+    def drain(self) -> Iterator[Any]:
+        """
+        Yield the items that can be parsed from the text fed so far. Raises JSONDecodeError
+        on malformed JSON, or (after close()) a truncated body.
+        """
+        while self._state != _DONE:
+            if not self._closed and len(self._buf) - self._pos < self._need:
+                return
+            start = self._pos
+            try:
+                item = self._step()
+            except _Incomplete:
+                self._pos = start
+                self._need = 2 * (len(self._buf) - start)
+                return
+            self._need = 0
+            if item is not _NO_ITEM:
+                yield item
+
+    def __iter__(self) -> Iterator[Any]:
+        for chunk in self._chunks:
+            self.feed(chunk)
+            yield from self.drain()
+        self.close()
+        yield from self.drain()
+
+    def _peek(self) -> str:
+        """Next non-whitespace character ("" at end of body); does not consume it."""
+        self._pos = _WS.match(self._buf, self._pos).end()
+        if self._pos < len(self._buf):
+            return self._buf[self._pos]
+        if self._closed:
+            return ""
+        raise _Incomplete
+
+    def _expect(self, chars: str) -> str:
+        c = self._peek()
+        if not c or c not in chars:
+            raise json.JSONDecodeError(f"Expected one of {chars!r}", self._buf, self._pos)
+        self._pos += 1
+        return c
+
+    def _value(self) -> Any:
+        """Decode one complete JSON value."""
+        self._peek()
+        try:
+            value, end = _decoder.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            if self._closed:
+                raise
+            raise _Incomplete from None
+        # A value ending exactly at the buffer end may be a truncated number/literal
+        if end == len(self._buf) and not self._closed:
+            raise _Incomplete
+        self._pos = end
+        return value
+
+    def _after_array(self) -> int:
+        return _OBJ_NEXT if self._in_object else _DONE
+
+    def _step(self) -> Any:
+        """Parse one token or value from the current state; returns an item or _NO_ITEM."""
+        state = self._state
+        if state == _ARRAY_ITEM:
+            item = self._value()
+            self._state = _ARRAY_NEXT
+            return item
+        if state == _ARRAY_NEXT:
+            self._state = _ARRAY_ITEM if self._expect(",]") == "," else self._after_array()
+        elif state == _START:
+            c = self._peek()
+            if c == "[":
+                self._pos += 1
+                self._state = _ARRAY_FIRST
+            elif c == "{":
+                self._pos += 1
+                self.rest = {}
+                self._in_object = True
+                self._state = _OBJ_FIRST
+            else:
+                self._value()  # not a list response: no items
+                self._state = _DONE
+        elif state == _ARRAY_FIRST:
+            if self._peek() == "]":
+                self._pos += 1
+                self._state = self._after_array()
+            else:
+                self._state = _ARRAY_ITEM
+        elif state == _OBJ_FIRST:
+            if self._peek() == "}":
+                self._pos += 1
+                self._state = _DONE
+            else:
+                self._state = _OBJ_KEY
+        elif state == _OBJ_KEY:
+            key = self._value()
+            self._expect(":")
+            if key == self.array_key and self._peek() == "[":
+                self._pos += 1
+                self.has_array = True
+                self._state = _ARRAY_FIRST
+            else:
+                assert self.rest is not None
+                self.rest[key] = self._value()
+                self._state = _OBJ_NEXT
+        elif state == _OBJ_NEXT:
+            self._state = _OBJ_KEY if self._expect(",}") == "," else _DONE
+        return _NO_ITEM
+
+
+def _projected(
+    items: Iterable[Any],
+    spec: Optional[ProjectionSpec],
+    transform: Optional[ItemTransform] = None,
+) -> list[Any]:
+    """Items as a list, each dict projected with spec (then transformed) as it arrives."""
+    if transform is not None:
+        out = []
+        for i in items:
+            if isinstance(i, dict):
+                i = transform(project(i, spec) if spec is not None else i)
+                if i is not None:
+                    out.append(i)
+        return out
+    if spec is None:
+        return list(items)
+    return [project(i, spec) if isinstance(i, dict) else i for i in items]
+
+
+def read_list_page(
+    r: httpx.Response,
+    entity: str,
+    full_fidelity: bool = False,
+    transform: Optional[ItemTransform] = None,
+) -> Any:
+    """
+    Body of a list response as r.json() would return it, with the data items projected
+    for entity (see api.projection). Parses the body incrementally, in HTTP_STREAM_CHUNK_BYTES
+    chunks, as r.iter_bytes() yields them (from the network when r is streamed, see
+    api.base.stream), unless HTTP_STREAM_JSON is off.
+    With transform, data holds transform(item) for each dict item instead (None results
+    and non-dict items dropped), so only transformed items outlive the parse.
+    Raises ValueError on malformed JSON.
+    """
+    spec = spec_for(entity, full_fidelity)
+    if not HTTP_STREAM_JSON:
+        r.read()
+        return _whole_page(r.json(), spec, transform)
+    stream = JSONPageStream(r.iter_bytes(HTTP_STREAM_CHUNK_BYTES))
+    return _page(stream, _projected(stream, spec, transform))
+
+
+async def aread_list_page(
+    r: httpx.Response,
+    entity: str,
+    full_fidelity: bool = False,
+    transform: Optional[ItemTransform] = None,
+) -> Any:
+    """
+    Async counterpart of read_list_page for responses of an httpx.AsyncClient: items are
+    parsed between r.aiter_bytes() chunks (as they arrive when r is streamed, see
+    api.base.async_stream).
+    """
+    spec = spec_for(entity, full_fidelity)
+    if not HTTP_STREAM_JSON:
+        await r.aread()
+        return _whole_page(r.json(), spec, transform)
+    stream = JSONPageStream()
+    items: list[Any] = []
+    async for chunk in r.aiter_bytes(HTTP_STREAM_CHUNK_BYTES):
+        stream.feed(chunk)
+        items += _projected(stream.drain(), spec, transform)
+    stream.close()
+    items += _projected(stream.drain(), spec, transform)
+    return _page(stream, items)
+
+
+def _whole_page(data: Any, spec: Optional[ProjectionSpec], transform: Optional[ItemTransform]) -> Any:
+    """read_list_page's result from a body decoded in one go (HTTP_STREAM_JSON off)."""
+    if isinstance(data, list):
+        return _projected(data, spec, transform)
+    if isinstance(data, dict) and isinstance(data.get("data"), list):
+        data["data"] = _projected(data["data"], spec, transform)
+    return data
+
+
+def _page(stream: JSONPageStream, items: list[Any]) -> Any:
+    """The page as r.json() would return it, with data replaced by the parsed items."""
+    if stream.rest is None:
+        return items
+    if stream.has_array:
+        stream.rest["data"] = items
+    return stream.rest
@@ -1,17 +1,20 @@
-"""Productboard API client. Features and notes."""
+"""Productboard API client. Features and notes, with links.next / pageCursor pagination."""
 import logging
-from typing import Any, Optional
+import os
+from itertools import islice
+from typing import Any, Iterable, Iterator, Optional
 
 import httpx
 
-from api.base import create_client
-from app.config import HTTP_TIMEOUT
+from api.base import get, stream
+from api.jsonstream import ItemTransform, read_list_page
 
 logger = logging.getLogger(__name__)
 
-PRODUCTBOARD_BASE = "https://api.productboard.com"
+PRODUCTBOARD_BASE = os.environ.get("PRODUCTBOARD_BASE_URL", "https://api.productboard.com").rstrip("/")
 # Required by Productboard API. Must be "1" (only accepted value per API enum).
 PRODUCTBOARD_API_VERSION = "1"
+NOTES_PAGE_LIMIT = 100
 
 
 def _headers(api_key: str) -> dict[str, str]:
@@ -22,6 +25,22 @@ def _headers(api_key: str) -> dict[str, str]:
     }
 
 
+def note_filter_params(created_from: str = "", created_to: str = "", tags: Iterable[str] = ()) -> dict[str, Any]:
+    """
+    GET /notes filter params: createdFrom / createdTo (YYYY-MM-DD, inclusive) and anyTag.
+    Callers still filter locally: these only narrow what is downloaded.
+    """
+    params: dict[str, Any] = {}
+    if created_from:
+        params["createdFrom"] = f"{created_from[:10]}T00:00:00Z"
+    if created_to:
+        params["createdTo"] = f"{created_to[:10]}T23:59:59Z"
+    tag_list = [t.strip() for t in tags if t and t.strip()]
+    if tag_list:
+        params["anyTag"] = ",".join(tag_list)
+    return params
+
+
 def test_connection(api_key: str) -> tuple[bool, str]:
     """
     Test Productboard API (e.g. list features).
@@ -30,12 +49,11 @@ def test_connection(api_key: str) -> tuple[bool, str]:
     if not api_key or not api_key.strip():
         return False, "API key is empty"
     try:
-        with create_client(timeout=HTTP_TIMEOUT) as client:
-            r = client.get(
-                f"{PRODUCTBOARD_BASE}/features",
-                headers=_headers(api_key),
-            )
-            r.raise_for_status()
+        get(
+            f"{PRODUCTBOARD_BASE}/features",
+            headers=_headers(api_key),
+            use_cache=False,
+        )
         return True, ""
     except httpx.HTTPStatusError as e:
         msg = f"HTTP {e.response.status_code}"
@@ -50,70 +68,152 @@ def test_connection(api_key: str) -> tuple[bool, str]:
         return False, str(e)
 
 
-def get_features(api_key: str) -> list[dict[str, Any]]:
-    """Fetch all features. Returns list of feature dicts."""
+def _parse_page(data: Any, url: str) -> tuple[list[dict[str, Any]], Optional[str], Optional[dict[str, Any]]]:
+    """
+    Extract (items, next_url, next_params) from a list response.
+    Follows links.next when present, else a top-level pageCursor (notes) on the same URL.
+    """
+    if isinstance(data, list):
+        return data, None, None
+    if not isinstance(data, dict):
+        return [], None, None
+    items = data.get("data") if isinstance(data.get("data"), list) else []
+    links = data.get("links") if isinstance(data.get("links"), dict) else {}
+    next_link = links.get("next")
+    if isinstance(next_link, str) and next_link.strip():
+        return items, str(httpx.URL(url).join(next_link.strip())), None
+    cursor = data.get("pageCursor")
+    if isinstance(cursor, str) and cursor.strip():
+        return items, url, {"pageCursor": cursor.strip()}
+    return items, None, None
+
+
+def _iter_pages(
+    path: str,
+    api_key: str,
+    params: Optional[dict[str, Any]] = None,
+    full_fidelity: bool = False,
+    transform: Optional[ItemTransform] = None,
+    use_cache: bool = True,
+) -> Iterator[list[Any]]:
+    """
+    Yield each page's data list for GET /{path}, following links.next / pageCursor
+    until exhausted. Stops (after logging) on the first failed page. Pages are parsed
+    incrementally and items projected with the "productboard/{path}" spec (api.jsonstream,
+    api.projection) unless full_fidelity; transform is applied to each item as it is parsed.
+    use_cache=False skips the response cache.
+    """
     if not api_key or not api_key.strip():
-        return []
-    try:
-        with create_client(timeout=HTTP_TIMEOUT) as client:
-            r = client.get(
-                f"{PRODUCTBOARD_BASE}/features",
-                headers=_headers(api_key),
-            )
-            r.raise_for_status()
-            data = r.json()
-        if isinstance(data, dict) and "data" in data:
-            return data["data"]
-        if isinstance(data, list):
-            return data
-        return []
-    except Exception as e:
-        logger.exception("Productboard get_features failed: %s", e)
-        return []
+        return
+    base_url = f"{PRODUCTBOARD_BASE}/{path}"
+    url: Optional[str] = base_url
+    page_params: Optional[dict[str, Any]] = dict(params or {})
+    seen: set[str] = set()
+    while url:
+        try:
+            with stream(url, headers=_headers(api_key), params=page_params, use_cache=use_cache) as r:
+                items, next_url, next_params = _parse_page(
+                    read_list_page(r, f"productboard/{path}", full_fidelity, transform), base_url
+                )
+        except Exception as e:
+            logger.exception("Productboard %s page fetch failed: %s", path, e)
+            return
+        yield items
+        if not next_url:
+            return
+        # Keep the caller's params alongside a bare cursor; links.next already carries them.
+        next_params = {**(params or {}), **next_params} if next_params is not None else None
+        page_key = f"{next_url}?{sorted((next_params or {}).items())}"
+        if page_key in seen:
+            logger.warning("Productboard %s pagination repeated a cursor; stopping.", path)
+            return
+        seen.add(page_key)
+        url, page_params = next_url, next_params
+
+
+def iter_features(api_key: str) -> Iterator[list[dict[str, Any]]]:
+    """Yield pages of features as they arrive."""
+    return _iter_pages("features", api_key)
+
+
+def iter_notes(
+    api_key: str,
+    filters: Optional[dict[str, Any]] = None,
+    full_fidelity: bool = False,
+    transform: Optional[ItemTransform] = None,
+    use_cache: bool = True,
+) -> Iterator[list[Any]]:
+    """
+    Yield pages of notes (feedback) as they arrive. Memory is bounded by page size, or by
+    one note when transform (e.g. a normalizer) turns each note into something smaller as
+    it is parsed. filters are extra query params (see note_filter_params). full_fidelity
+    keeps whole payloads (company, followers, createdBy, ...) instead of the projected fields.
+    use_cache=False skips the response cache (e.g. Step 2 Refresh).
+    """
+    return _iter_pages(
+        "notes", api_key, {"pageLimit": NOTES_PAGE_LIMIT, **(filters or {})}, full_fidelity, transform, use_cache
+    )
 
 
-def get_notes(api_key: str) -> list[dict[str, Any]]:
-    """Fetch all notes (feedback). Returns list of note dicts."""
-    if not api_key or not api_key.strip():
-        return []
-    try:
-        with create_client(timeout=HTTP_TIMEOUT) as client:
-            r = client.get(
-                f"{PRODUCTBOARD_BASE}/notes",
-                headers=_headers(api_key),
-            )
-            r.raise_for_status()
-            data = r.json()
-        if isinstance(data, dict) and "data" in data:
-            return data["data"]
-        if isinstance(data, list):
-            return data
-        return []
-    except Exception as e:
-        logger.exception("Productboard get_notes failed: %s", e)
-        return []
+def iter_products(api_key: str) -> Iterator[list[dict[str, Any]]]:
+    """Yield pages of products as they arrive."""
+    return _iter_pages("products", api_key)
+
+
+def get_features(api_key: str, max_items: Optional[int] = None) -> list[dict[str, Any]]:
+    """
+    Fetch all features (every page), or only the first max_items (no further pages are
+    requested once they are in). Returns list of feature dicts.
+    """
+    return list(islice((f for page in iter_features(api_key) for f in page), max_items))
+
+
+def get_notes(
+    api_key: str,
+    filters: Optional[dict[str, Any]] = None,
+    full_fidelity: bool = False,
+    max_items: Optional[int] = None,
+) -> list[dict[str, Any]]:
+    """
+    Fetch all notes (feedback, every page), optionally filtered upstream, or only the first
+    max_items (smaller pages, and no further pages once they are in). Returns list of note dicts.
+    """
+    if max_items is not None:
+        filters = {"pageLimit": min(NOTES_PAGE_LIMIT, max(1, max_items)), **(filters or {})}
+    return list(islice((n for page in iter_notes(api_key, filters, full_fidelity) for n in page), max_items))
 
 
 def get_products(api_key: str) -> list[dict[str, Any]]:
-    """Fetch all products from GET /products. Returns list of product dicts with id, name, etc."""
-    if not api_key or not api_key.strip():
-        return []
+    """Fetch all products from GET /products (every page). Returns list of product dicts with id, name, etc."""
+    return [p for page in iter_products(api_key) for p in page]
+
+
+def _get_item(api_key: str, path: str, item_id: str) -> Optional[dict[str, Any]]:
+    """GET /{path}/{item_id}. Returns the object, or None on failure/missing."""
+    if not api_key or not api_key.strip() or not item_id or not str(item_id).strip():
+        return None
     try:
-        with create_client(timeout=HTTP_TIMEOUT) as client:
-            r = client.get(
-                f"{PRODUCTBOARD_BASE}/products",
-                headers=_headers(api_key),
-            )
-            r.raise_for_status()
-            data = r.json()
+        r = get(f"{PRODUCTBOARD_BASE}/{path}/{str(item_id).strip()}", headers=_headers(api_key))
+        data = r.json()
         if isinstance(data, dict) and "data" in data:
-            return data["data"] if isinstance(data["data"], list) else []
-        if isinstance(data, list):
-            return data
-        return []
+            return dict(data["data"]) if isinstance(data["data"], dict) else None
+        return dict(data) if isinstance(data, dict) else None
+    except httpx.HTTPStatusError as e:
+        logger.warning("Productboard get %s/%s: HTTP %s", path, item_id, e.response.status_code)
+        return None
     except Exception as e:
-        logger.exception("Productboard get_products failed: %s", e)
-        return []
+        logger.warning("Productboard get %s/%s failed: %s", path, item_id, e)
+        return None
+
+
+def get_note(api_key: str, note_id: str) -> Optional[dict[str, Any]]:
+    """Fetch one note from GET /notes/{note_id}. None on failure/missing."""
+    return _get_item(api_key, "notes", note_id)
+
+
+def get_feature(api_key: str, feature_id: str) -> Optional[dict[str, Any]]:
+    """Fetch one feature from GET /features/{feature_id}. None on failure/missing."""
+    return _get_item(api_key, "features", feature_id)
 
 
 def get_areas(api_key: str) -> list[dict[str, Any]]:
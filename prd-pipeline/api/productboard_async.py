@@ -0,0 +1,227 @@
+"""
+Asyncio Productboard client. Same return shapes as api.productboard; takes an optional
+shared AsyncClient and Semaphore so callers can run it alongside Dovetail fan-outs.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Optional
+
+import httpx
+
+from api.base import async_client_scope, async_get, async_stream
+from api.jsonstream import aread_list_page
+from api.productboard import NOTES_PAGE_LIMIT, PRODUCTBOARD_BASE, _headers, _parse_page
+from app.config import MAX_CONCURRENT_ASYNC_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+async def _iter_pages(
+    path: str,
+    api_key: str,
+    client: Optional[httpx.AsyncClient],
+    semaphore: Optional[asyncio.Semaphore],
+    params: Optional[dict[str, Any]] = None,
+    full_fidelity: bool = False,
+) -> AsyncIterator[list[dict[str, Any]]]:
+    """Yield each page's data list, following links.next / pageCursor. See api.productboard._iter_pages."""
+    if not api_key or not api_key.strip():
+        return
+    base_url = f"{PRODUCTBOARD_BASE}/{path}"
+    url: Optional[str] = base_url
+    page_params: Optional[dict[str, Any]] = dict(params or {})
+    seen: set[str] = set()
+    async with async_client_scope(client) as c:
+        while url:
+            try:
+                headers = _headers(api_key)
+                async with async_stream(c, url, headers=headers, params=page_params, semaphore=semaphore) as r:
+                    items, next_url, next_params = _parse_page(
+                        await aread_list_page(r, f"productboard/{path}", full_fidelity), base_url
+                    )
+            except Exception as e:
+                logger.exception("Productboard async %s page fetch failed: %s", path, e)
+                return
+            yield items
+            if not next_url:
+                return
+            next_params = {**(params or {}), **next_params} if next_params is not None else None
+            page_key = f"{next_url}?{sorted((next_params or {}).items())}"
+            if page_key in seen:
+                logger.warning("Productboard async %s pagination repeated a cursor; stopping.", path)
+                return
+            seen.add(page_key)
+            url, page_params = next_url, next_params
+
+
+async def _get_list(
+    path: str,
+    api_key: str,
+    client: Optional[httpx.AsyncClient],
+    semaphore: Optional[asyncio.Semaphore],
+    params: Optional[dict[str, Any]] = None,
+    full_fidelity: bool = False,
+    max_items: Optional[int] = None,
+) -> list[dict[str, Any]]:
+    """
+    Collect every page of a list endpoint, or pages until max_items are in (later pages are
+    not requested); pages fetched before a failure are kept.
+    """
+    out: list[dict[str, Any]] = []
+    async with aclosing(_iter_pages(path, api_key, client, semaphore, params, full_fidelity)) as pages:
+        async for page in pages:
+            out.extend(page)
+            if max_items is not None and len(out) >= max_items:
+                return out[:max_items]
+    return out
+
+
+def iter_notes(
+    api_key: str,
+    *,
+    client: Optional[httpx.AsyncClient] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    filters: Optional[dict[str, Any]] = None,
+    full_fidelity: bool = False,
+) -> AsyncIterator[list[dict[str, Any]]]:
+    """Async-iterate pages of notes as they arrive. filters: see api.productboard.note_filter_params."""
+    return _iter_pages(
+        "notes", api_key, client, semaphore, {"pageLimit": NOTES_PAGE_LIMIT, **(filters or {})}, full_fidelity
+    )
+
+
+async def get_features(
+    api_key: str,
+    *,
+    client: Optional[httpx.AsyncClient] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    max_items: Optional[int] = None,
+) -> list[dict[str, Any]]:
+    """Fetch all features (every page), or only the first max_items. Returns list of feature dicts."""
+    return await _get_list("features", api_key, client, semaphore, max_items=max_items)
+
+
+async def get_notes(
+    api_key: str,
+    *,
+    client: Optional[httpx.AsyncClient] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    filters: Optional[dict[str, Any]] = None,
+    full_fidelity: bool = False,
+    max_items: Optional[int] = None,
+) -> list[dict[str, Any]]:
+    """
+    Fetch all notes (feedback, every page), optionally filtered upstream, or only the first
+    max_items (smaller pages, and no further pages once they are in). Returns list of note dicts.
+    """
+    page_limit = NOTES_PAGE_LIMIT if max_items is None else min(NOTES_PAGE_LIMIT, max(1, max_items))
+    return await _get_list(
+        "notes", api_key, client, semaphore, {"pageLimit": page_limit, **(filters or {})}, full_fidelity, max_items
+    )
+
+
+async def get_products(
+    api_key: str,
+    *,
+    client: Optional[httpx.AsyncClient] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+) -> list[dict[str, Any]]:
+    """Fetch all products from GET /products (every page). Returns list of product dicts."""
+    return await _get_list("products", api_key, client, semaphore)
+
+
+async def _get_item(
+    api_key: str,
+    path: str,
+    item_id: str,
+    client: Optional[httpx.AsyncClient],
+    semaphore: Optional[asyncio.Semaphore],
+) -> Optional[dict[str, Any]]:
+    """GET /{path}/{item_id}. Returns the object, or None on failure/missing."""
+    if not api_key or not api_key.strip() or not item_id or not str(item_id).strip():
+        return None
+    try:
+        async with async_client_scope(client) as c:
+            r = await async_get(
+                c,
+                f"{PRODUCTBOARD_BASE}/{path}/{str(item_id).strip()}",
+                headers=_headers(api_key),
+                semaphore=semaphore,
+            )
+        data = r.json()
+        if isinstance(data, dict) and "data" in data:
+            return dict(data["data"]) if isinstance(data["data"], dict) else None
+        return dict(data) if isinstance(data, dict) else None
+    except httpx.HTTPStatusError as e:
+        logger.warning("Productboard async get %s/%s: HTTP %s", path, item_id, e.response.status_code)
+        return None
+    except Exception as e:
+        logger.warning("Productboard async get %s/%s failed: %s", path, item_id, e)
+        return None
+
+
+async def get_note(
+    api_key: str,
+    note_id: str,
+    *,
+    client: Optional[httpx.AsyncClient] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+) -> Optional[dict[str, Any]]:
+    """Fetch one note from GET /notes/{note_id}. None on failure/missing."""
+    return await _get_item(api_key, "notes", note_id, client, semaphore)
+
+
+async def get_feature(
+    api_key: str,
+    feature_id: str,
+    *,
+    client: Optional[httpx.AsyncClient] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+) -> Optional[dict[str, Any]]:
+    """Fetch one feature from GET /features/{feature_id}. None on failure/missing."""
+    return await _get_item(api_key, "features", feature_id, client, semaphore)
+
+
+async def _get_many(
+    path: str,
+    api_key: str,
+    ids: list[str],
+    client: Optional[httpx.AsyncClient],
+    semaphore: Optional[asyncio.Semaphore],
+    max_concurrency: int,
+) -> dict[str, Optional[dict[str, Any]]]:
+    """Fetch /{path}/{id} for every ID in parallel on one client. See api.dovetail_async._get_many."""
+    unique_ids = list(dict.fromkeys(str(i).strip() for i in ids if i and str(i).strip()))
+    semaphore = semaphore or asyncio.Semaphore(max(1, max_concurrency))
+    async with async_client_scope(client) as c:
+        results = await asyncio.gather(
+            *(_get_item(api_key, path, item_id, c, semaphore) for item_id in unique_ids),
+        )
+    return dict(zip(unique_ids, results))
+
+
+async def get_notes_by_ids(
+    api_key: str,
+    note_ids: list[str],
+    *,
+    client: Optional[httpx.AsyncClient] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    max_concurrency: int = MAX_CONCURRENT_ASYNC_REQUESTS,
+) -> dict[str, Optional[dict[str, Any]]]:
+    """Fetch many notes by ID in parallel. Returns mapping note_id -> note (None when missing/failed)."""
+    return await _get_many("notes", api_key, note_ids, client, semaphore, max_concurrency)
+
+
+async def get_features_by_ids(
+    api_key: str,
+    feature_ids: list[str],
+    *,
+    client: Optional[httpx.AsyncClient] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    max_concurrency: int = MAX_CONCURRENT_ASYNC_REQUESTS,
+) -> dict[str, Optional[dict[str, Any]]]:
+    """Fetch many features by ID in parallel. Returns mapping feature_id -> feature (None when missing/failed)."""
+    return await _get_many("features", api_key, feature_ids, client, semaphore, max_concurrency)
@@ -0,0 +1,40 @@
+"""
+Field projection for list-endpoint payloads. Pages are projected as they are parsed, so
+nested objects nothing downstream reads (followers, company, createdBy, ...) are dropped
+before they are stored, cached in the highlight store or copied into session state.
+
+Specs live in app.config.PAYLOAD_PROJECTIONS, keyed "<source>/<path>" (e.g. "productboard/notes").
+Single-item GETs (get_note, get_highlight, ...) are never projected.
+"""
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from app.config import PAYLOAD_FULL_FIDELITY, PAYLOAD_PROJECTIONS
+
+# field -> None (keep the whole value) or a nested spec (keep those sub-fields of a dict / list of dicts)
+ProjectionSpec = dict[str, Optional["ProjectionSpec"]]
+
+
+def project(item: dict[str, Any], spec: ProjectionSpec) -> dict[str, Any]:
+    """New dict with only the fields in spec (missing fields stay missing)."""
+    out: dict[str, Any] = {}
+    for key, sub in spec.items():
+        if key not in item:
+            continue
+        value = item[key]
+        if sub is not None:
+            if isinstance(value, dict):
+                value = project(value, sub)
+            elif isinstance(value, list):
+                value = [project(v, sub) if isinstance(v, dict) else v for v in value]
+        out[key] = value
+    return out
+
+
+def spec_for(entity: str, full_fidelity: bool = False) -> Optional[ProjectionSpec]:
+    """Projection spec for entity; None (keep whole) with full_fidelity, PAYLOAD_FULL_FIDELITY or no spec."""
+    if full_fidelity or PAYLOAD_FULL_FIDELITY:
+        return None
+    return PAYLOAD_PROJECTIONS.get(entity)
+
@@ -0,0 +1,206 @@
+"""
+Per-host adaptive rate limiting and backoff shared by all upstream calls (sync and async).
+
+Each upstream origin gets one AdaptiveLimiter: an AIMD window caps in-flight requests
+(additive increase on success, halve on 429/503). An optional token bucket caps request rate;
+it is off by default (HTTP_RATE_LIMIT_PER_SECOND=0), and when set the configured rate is a
+ceiling that adapts the same way. A Retry-After from the upstream pauses the whole host, not
+just the request that saw it. Callers waiting for a slot are woken by release(), not by polling.
+"""
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import logging
+import math
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.config import (
+    HTTP_BACKOFF_BASE,
+    HTTP_BACKOFF_MAX,
+    HTTP_MAX_CONCURRENCY_PER_HOST,
+    HTTP_RATE_LIMIT_BURST,
+    HTTP_RATE_LIMIT_PER_SECOND,
+)
+
+logger = logging.getLogger(__name__)
+
+# Statuses that mean "slow down / try again" rather than "this request is wrong"
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+# Ignore further decreases for this long after one, so a burst of 429s halves the window once
+_DECREASE_COOLDOWN = 1.0
+# An adaptive rate is never cut below this many requests per second
+_MIN_RATE = 0.5
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency window plus an optional adaptive token bucket for one upstream host."""
+
+    def __init__(
+        self,
+        rate: float = HTTP_RATE_LIMIT_PER_SECOND,
+        burst: int = HTTP_RATE_LIMIT_BURST,
+        max_concurrency: int = HTTP_MAX_CONCURRENCY_PER_HOST,
+    ) -> None:
+        self.max_rate = max(0.0, rate)
+        self.rate = self.max_rate
+        self.burst = max(1, burst)
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = float(max(1, self.max_concurrency // 2))
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+        self._async_waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def try_acquire(self) -> float:
+        """
+        Take a slot (and a token, when rate-limited) if available. Returns 0.0 on success, else
+        seconds until one may be free; math.inf when only a release() can free one.
+        """
+        with self._lock:
+            return self._try_acquire_locked()
+
+    def _try_acquire_locked(self) -> float:
+        now = time.monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self._in_flight >= int(self.limit):
+            return math.inf
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+            self._refilled_at = now
+            if self._tokens < 1:
+                return (1 - self._tokens) / self.rate
+            self._tokens -= 1
+        self._in_flight += 1
+        return 0.0
+
+    def acquire(self) -> None:
+        """Block the calling thread until a request may be sent."""
+        with self._released:
+            while True:
+                wait = self._try_acquire_locked()
+                if wait <= 0:
+                    return
+                self._released.wait(None if wait == math.inf else wait)
+
+    async def acquire_async(self) -> None:
+        """Wait (without blocking the event loop) until a request may be sent."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                wait = self._try_acquire_locked()
+                if wait <= 0:
+                    return
+                waiter = (loop, loop.create_future())
+                self._async_waiters.append(waiter)
+            try:
+                await asyncio.wait({waiter[1]}, timeout=None if wait == math.inf else wait)
+            finally:
+                with self._lock:
+                    if waiter in self._async_waiters:
+                        self._async_waiters.remove(waiter)
+
+    def release(self, throttled: bool = False, retry_after: Optional[float] = None, failed: bool = False) -> None:
+        """
+        Return the slot, adjust the window and rate (+1/x on success, halve on throttling) and
+        wake waiting callers. failed (no response: connection error, timeout, cancellation)
+        leaves the window and rate as they are.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            if not failed:
+                self._adapt(now, throttled, retry_after)
+            self._notify_locked()
+
+    def _adapt(self, now: float, throttled: bool, retry_after: Optional[float]) -> None:
+        if not throttled:
+            self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+            if self.rate:
+                self.rate = min(self.max_rate, self.rate + 1.0 / self.rate)
+            return
+        if retry_after:
+            self._paused_until = max(self._paused_until, now + retry_after)
+        if now - self._last_decrease >= _DECREASE_COOLDOWN:
+            self._last_decrease = now
+            self.limit = max(1.0, self.limit / 2)
+            if self.rate:
+                self.rate = max(min(self.max_rate, _MIN_RATE), self.rate / 2)
+            logger.info("Upstream throttled; concurrency window now %s", int(self.limit))
+
+    def _notify_locked(self) -> None:
+        """Wake every waiter so each re-checks; those that lose the race wait again."""
+        self._released.notify_all()
+        for loop, fut in self._async_waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, fut)
+            except RuntimeError:  # the waiter's event loop has already closed
+                pass
+        self._async_waiters.clear()
+
+
+def _wake(fut: asyncio.Future) -> None:
+    if not fut.done():
+        fut.set_result(None)
+
+
+_limiters: dict[str, AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+_limiter_settings: dict[str, float] = {}
+
+
+def configure_limiters(**settings: float) -> None:
+    """Drop existing limiters; new ones use these AdaptiveLimiter kwargs (rate, burst, max_concurrency)."""
+    with _limiters_lock:
+        _limiters.clear()
+        _limiter_settings.clear()
+        _limiter_settings.update(settings)
+
+
+def get_limiter(origin: str) -> AdaptiveLimiter:
+    """Return the shared limiter for an origin (scheme://host:port), creating it on first use."""
+    limiter = _limiters.get(origin)
+    if limiter is not None:
+        return limiter
+    with _limiters_lock:
+        limiter = _limiters.get(origin)
+        if limiter is None:
+            limiter = _limiters[origin] = AdaptiveLimiter(**_limiter_settings)  # type: ignore[arg-type]
+        return limiter
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds from now."""
+    if not value or not value.strip():
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """
+    Seconds to wait before retry number `attempt` (0-based). Honors Retry-After when given,
+    else exponential backoff with full jitter; both capped at HTTP_BACKOFF_MAX.
+    """
+    if retry_after is not None:
+        return min(HTTP_BACKOFF_MAX, retry_after)
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt)))
@@ -0,0 +1,108 @@
+"""
+Single-flight coalescing for identical concurrent upstream requests.
+
+While a request for a key is in flight, later callers with the same key (same endpoint,
+params and API-key hash; see api.cache.cache_key) wait for its result instead of hitting
+the network. Works across threads and event loops: the shared result is a
+concurrent.futures.Future, which async callers await via asyncio.wrap_future. Only
+ordinary exceptions are shared; if the leader is cancelled, a waiting follower retries.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Result handed to followers when the leader was cancelled or interrupted; they retry the call
+_LEADER_GONE = object()
+
+
+class SingleFlight:
+    """Registry of in-flight calls by key."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[str, Future[Any]] = {}
+
+    def _join(self, key: str) -> tuple[Future[Any], bool]:
+        """Return (future, is_leader) for key."""
+        with self._lock:
+            fut = self._calls.get(key)
+            if fut is not None:
+                return fut, False
+            fut = Future()
+            self._calls[key] = fut
+            return fut, True
+
+    def _finish(self, key: str, fut: Future[Any], result: Any = None, error: BaseException | None = None) -> None:
+        """Drop key, then settle fut, so followers that retry join a fresh call."""
+        with self._lock:
+            self._calls.pop(key, None)
+        if error is not None:
+            fut.set_exception(error)
+        else:
+            fut.set_result(result)
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        """
+        Run fn once per concurrent key; followers block for the leader's result or exception.
+        If the leader is interrupted (a BaseException such as KeyboardInterrupt), followers are
+        not failed with it: one of them takes over as leader and calls fn itself.
+        """
+        while True:
+            fut, leader = self._join(key)
+            if leader:
+                break
+            logger.debug("Coalesced request %s", key[:12])
+            result = fut.result()
+            if result is not _LEADER_GONE:
+                return result
+        try:
+            result = fn()
+        except Exception as e:
+            self._finish(key, fut, error=e)
+            raise
+        except BaseException:
+            self._finish(key, fut, _LEADER_GONE)
+            raise
+        self._finish(key, fut, result)
+        return result
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Async counterpart of do(); followers await without blocking their event loop. A
+        cancelled leader hands over to a follower; a cancelled follower leaves the call running.
+        """
+        while True:
+            fut, leader = self._join(key)
+            if leader:
+                break
+            logger.debug("Coalesced request %s", key[:12])
+            # shield: cancelling this follower must not cancel the future other callers share
+            result = await asyncio.shield(asyncio.wrap_future(fut))
+            if result is not _LEADER_GONE:
+                return result
+        try:
+            result = await fn()
+        except Exception as e:
+            self._finish(key, fut, error=e)
+            raise
+        except BaseException:
+            self._finish(key, fut, _LEADER_GONE)
+            raise
+        self._finish(key, fut, result)
+        return result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+# Shared by api.base.get / async_get
+requests_in_flight = SingleFlight()
@@ -10,6 +10,7 @@ from __future__ import annotations
 import logging
 import sys
 from pathlib import Path
+from typing import Optional
 
 # Ensure project root (prd-pipeline) is on path when running uvicorn
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
@@ -42,6 +43,7 @@ class GeneratePromptRequest(BaseModel):
     audience_type: str = Field(default="internal_stakeholders", description="Target audience")
     output_tone: str = Field(default="professional", description="Tone")
     include_roadmap: bool = Field(default=True, description="Include roadmap section")
+    max_tokens: Optional[int] = Field(default=None, description="Prompt token budget; None = no limit")
     prd_template_id: str = Field(default="default", description="Template/strategy id")
     dovetail_summary: str = Field(default="", description="Pre-aggregated Dovetail research text")
     productboard_summary: str = Field(default="", description="Pre-aggregated Productboard feedback text")
@@ -50,7 +52,7 @@ class GeneratePromptRequest(BaseModel):
 class GeneratePromptResponse(BaseModel):
     """Response: prompt text and metadata."""
     prompt: str = Field(..., description="Full PRD generation prompt")
-    metadata: dict = Field(..., description="Strategy id, word count, sections, etc.")
+    metadata: dict = Field(..., description="Strategy id, word and token counts, sections, etc.")
 
 
 @app.post("/generate-prd-prompt", response_model=GeneratePromptResponse)
@@ -68,6 +70,7 @@ def generate_prd_prompt(body: GeneratePromptRequest) -> GeneratePromptResponse:
             audience_type=body.audience_type,
             output_tone=body.output_tone,
             include_roadmap=body.include_roadmap,
+            max_tokens=body.max_tokens,
         )
         result: PromptResult = build_prompt_from_summaries(
             dovetail_summary=body.dovetail_summary or "No Dovetail data provided.",
@@ -1,6 +1,7 @@
 """App constants and theme configuration."""
 import os
 from pathlib import Path
+from typing import Any
 
 # Paths
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
@@ -25,6 +26,83 @@ STEP_NAMES = [
 # API defaults (timeouts, retries)
 HTTP_TIMEOUT = 30.0
 HTTP_MAX_RETRIES = 2
+# Pooled clients (one per upstream host, shared across threads and sessions)
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("HTTP_KEEPALIVE_EXPIRY", "30.0"))
+# Per-host rate limiting and backoff on 429/5xx (api.ratelimit)
+# Requests/second ceiling per host; 0 (default) leaves pacing to the AIMD window and Retry-After
+HTTP_RATE_LIMIT_PER_SECOND = float(os.environ.get("HTTP_RATE_LIMIT_PER_SECOND", "0"))
+HTTP_RATE_LIMIT_BURST = int(os.environ.get("HTTP_RATE_LIMIT_BURST", "20"))
+HTTP_MAX_CONCURRENCY_PER_HOST = int(os.environ.get("HTTP_MAX_CONCURRENCY_PER_HOST", "16"))
+HTTP_STATUS_RETRIES = int(os.environ.get("HTTP_STATUS_RETRIES", "5"))
+HTTP_BACKOFF_BASE = 0.5
+HTTP_BACKOFF_MAX = 30.0
+# On-disk GET response cache (api.cache). TTLs in seconds, by endpoint path segment.
+HTTP_CACHE_ENABLED = os.environ.get("HTTP_CACHE_ENABLED", "1").strip().lower() not in ("0", "false", "no")
+HTTP_CACHE_PATH = DATA_DIR / "http_cache.sqlite3"
+HTTP_CACHE_MAX_BYTES = int(os.environ.get("HTTP_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+HTTP_CACHE_TTLS: dict[str, float] = {
+    "projects": 300.0,
+    "highlights": 120.0,
+    "insights": 600.0,
+    "notes": 120.0,
+    "features": 300.0,
+    "products": 3600.0,
+}
+# Local copy of Dovetail highlights + per-project watermarks for delta sync (api.dovetail_sync)
+HIGHLIGHT_STORE_PATH = DATA_DIR / "dovetail_highlights.sqlite3"
+# Seconds after which a delta sync becomes a full reconcile, dropping highlights deleted upstream; 0 = never
+HIGHLIGHT_FULL_SYNC_INTERVAL = float(os.environ.get("HIGHLIGHT_FULL_SYNC_INTERVAL", str(24 * 3600)))
+# Parse list response bodies incrementally in chunks (api.jsonstream) instead of r.json(); uncached pages as they arrive
+HTTP_STREAM_JSON = os.environ.get("HTTP_STREAM_JSON", "1").strip().lower() not in ("0", "false", "no")
+HTTP_STREAM_CHUNK_BYTES = int(os.environ.get("HTTP_STREAM_CHUNK_BYTES", str(64 * 1024)))
+# Max in-flight requests per asyncio fan-out (api.*_async)
+MAX_CONCURRENT_ASYNC_REQUESTS = int(os.environ.get("MAX_CONCURRENT_ASYNC_REQUESTS", "50"))
+# Fields kept from list-endpoint pages as they are parsed (api.projection), by "<source>/<path>".
+# A nested spec keeps only those sub-fields of a dict / list of dicts; None keeps the value whole.
+# Entities not listed are kept whole. PAYLOAD_FULL_FIDELITY=1 keeps every payload whole (run a
+# full sync afterwards: highlights already in the local store keep their projected shape).
+PAYLOAD_FULL_FIDELITY = os.environ.get("PAYLOAD_FULL_FIDELITY", "0").strip().lower() in ("1", "true", "yes")
+_TAG_FIELDS = {"id": None, "title": None, "name": None}
+_TIMESTAMPS = {k: None for k in ("created_at", "updated_at", "createdAt", "updatedAt")}
+_DELETED = {k: None for k in ("deleted", "deleted_at", "deletedAt")}
+PAYLOAD_PROJECTIONS: dict[str, dict[str, Any]] = {
+    "dovetail/projects": {
+        "id": None, "name": None, "title": None, "description": None, **_TIMESTAMPS, **_DELETED,
+    },
+    "dovetail/highlights": {
+        "id": None, "type": None, "title": None, "name": None,
+        "text": None, "body": None, "content": None, "summary": None, "description": None,
+        "tags": _TAG_FIELDS, "priority": None, "importance": None, "state": None,
+        "project_id": None, "project": {"id": None, "name": None},
+        "relationships": {"project": None}, "attributes": {"project_id": None},
+        **_TIMESTAMPS, **_DELETED,
+    },
+    "productboard/notes": {
+        "id": None, "title": None, "name": None, "content": None, "description": None,
+        "tags": _TAG_FIELDS, "priority": None, "importance": None, "state": None, "displayUrl": None,
+        **_TIMESTAMPS,
+    },
+    "productboard/features": {
+        "id": None, "name": None, "title": None, "description": None, "status": {"name": None},
+        "state": None, **_TIMESTAMPS,
+    },
+}
+# Shared raw payload store for Step 2 records (services.records.RAW_STORE), in encoded bytes; LRU beyond this
+RAW_STORE_MAX_BYTES = int(os.environ.get("RAW_STORE_MAX_BYTES", str(512 * 1024 * 1024)))
+# Step 2 full-text search (services.search_index): max ranked hits per search box
+SEARCH_RESULT_LIMIT = int(os.environ.get("SEARCH_RESULT_LIMIT", "200"))
+# Built search indexes kept per process and shared by sessions that load the same data (LRU beyond this)
+SEARCH_SHARED_INDEXES = int(os.environ.get("SEARCH_SHARED_INDEXES", "2"))
+# Per index: postings of recently queried terms kept scored and ranked (~70 bytes each)
+SEARCH_SCORED_POSTINGS = int(os.environ.get("SEARCH_SCORED_POSTINGS", "1000000"))
+# Step 2 filters and facets (services.columnar): use NumPy when installed
+COLUMNAR_NUMPY = os.environ.get("COLUMNAR_NUMPY", "1").strip().lower() not in ("0", "false", "no")
+# Saved Step 2 workspaces (services.snapshot), opened without fetching anything
+SNAPSHOT_DIR = DATA_DIR / "snapshots"
+# Step 3 default prompt token budget (services.prompt_builder); 0 = no limit
+PROMPT_MAX_TOKENS = int(os.environ.get("PROMPT_MAX_TOKENS", "0"))
 
 # Theme keys for session state
 THEME_KEY = "dark_mode"  # True = dark, False = light
@@ -5,7 +5,7 @@ from typing import Any
 
 import streamlit as st
 
-from app.config import TOTAL_STEPS
+from app.config import PROMPT_MAX_TOKENS, TOTAL_STEPS
 
 
 def init_session_state() -> None:
@@ -26,7 +26,7 @@ def init_session_state() -> None:
         # Data sources
         "selected_dovetail_project_ids": [],
         "selected_dovetail_project_ids_for_loading": [],  # project IDs selected in Step 2 for loading insights
-        "pending_insights_load": None,  # list of project IDs to fetch (set on button click, cleared after fetch)
+        "pending_insights_load": None,  # {project_id: resume cursor or None for the first page} to fetch (set on button click, cleared after fetch)
         "selected_dovetail_insight_ids": [],
         "dovetail_insights": [],  # insights for selected projects only (cached after Load insights)
         "selected_productboard_ids": [],  # features or notes IDs
@@ -36,6 +36,7 @@ def init_session_state() -> None:
         "data_sources_loaded": False,
         # Context Selection (Step 2): normalized data + selections
         "context_data": None,  # { dovetail: { projects: [...] }, productboard: { notes: [...] } }
+        "context_index": None,  # services.context_data.ContextIndex over context_data (ids, tags, dates, selection)
         "selected_productboard_product_ids": [],  # Productboard note IDs for PRD prompt (from /notes)
         "generated_prd_prompt_text": "",  # Claude-style prompt from Step 2
         # Prompt config
@@ -46,6 +47,7 @@ def init_session_state() -> None:
         "audience_type": "internal_stakeholders",
         "output_tone": "professional",
         "include_roadmap": True,
+        "prompt_max_tokens": PROMPT_MAX_TOKENS,  # 0 = no limit
         # Generation (prompt only; PRD comes from user's AI tool)
         "generation_logs": [],
         "generation_error": None,
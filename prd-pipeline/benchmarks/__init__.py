@@ -0,0 +1,9 @@
+"""
+End-to-end fetch-and-build benchmarks, driven by mock_upstream (no network, no API keys).
+
+    python -m benchmarks.run                      # all cases, 10 / 1k / 100k insights, compare to baseline
+    python -m benchmarks.run --sizes 10,1000      # quick run
+    python -m benchmarks.run --update-baseline    # accept current numbers as the new baseline
+
+See benchmarks/run.py for metrics and regression thresholds, benchmarks/cases.py for what is measured.
+"""
@@ -0,0 +1,242 @@
+"""
+Benchmark cases. Each case prepares its inputs from a workspace (not measured) and returns
+a zero-argument callable that runs one iteration of the hot path being measured.
+Cases with network=True run against a fresh MockUpstream per iteration (cold cache and
+highlight store), so request counts are per run.
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import shutil
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+import httpx
+
+from api.dovetail import PAGE_LIMIT
+from api.jsonstream import read_list_page
+from core.models import APIConfig, DataSourceFilters, PromptConfig
+from core.prd_generator import build_prompt_from_context, run_pipeline
+from mock_upstream import SyntheticWorkspace, Workspace
+from services import context_data
+from services.extractors import HighlightExtractor
+from services.prompt_builder import build_prompt
+from services.prompt_builder.models import PromptBuilderConfig
+from services.prompt_builder.normalizer import MAX_CANDIDATES, normalize_insights
+from services.records import RAW_STORE
+from services.snapshot import load_snapshot, save_snapshot
+
+DV_KEY = "bench-dovetail-key"
+PB_KEY = "bench-productboard-key"
+# Items a user would realistically tick in Step 2
+SELECTION_SIZE = 200
+# Highlight text repeats for parse_long_highlights_page (~40 words each -> ~50KB transcripts)
+TRANSCRIPT_REPEAT = 200
+
+PROMPT_CONFIG = PromptConfig(
+    product_context="Our B2B SaaS helps teams manage compliance workflows and audit trails.",
+    business_goals="Increase enterprise adoption by 30%; reduce support tickets.",
+    constraints="Must ship by Q2; no new infra.",
+)
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    prepare: Callable[[Workspace], Callable[[], Any]]
+    network: bool = True
+
+
+def make_workspace(size: int) -> SyntheticWorkspace:
+    """Synthetic workspace with ~size insights (highlights) and size/10 notes (at least 10)."""
+    return SyntheticWorkspace.with_total_highlights(size, notes=max(10, size // 10))
+
+
+def _project_ids(ws: Workspace) -> list[str]:
+    return [str(p["id"]) for p in ws.projects]
+
+
+def _all_highlights(ws: Workspace) -> list[dict[str, Any]]:
+    return [h for pid in _project_ids(ws) for h in ws.highlights(pid)]
+
+
+def _fetch_projects_and_products(ws: Workspace) -> Callable[[], Any]:
+    return lambda: context_data.fetch_projects_and_products_only(DV_KEY, PB_KEY)
+
+
+def _fetch_insights_for_project_ids(ws: Workspace) -> Callable[[], Any]:
+    project_ids = _project_ids(ws)
+    return lambda: context_data.fetch_insights_for_project_ids(DV_KEY, project_ids)
+
+
+def _fetch_first_insight_pages(ws: Workspace) -> Callable[[], Any]:
+    # Step 2 "Load insights": one page per project, the rest on Load more
+    cursors = dict.fromkeys(_project_ids(ws))
+    return lambda: context_data.fetch_insight_pages(DV_KEY, cursors)
+
+
+def _fetch_context_data(ws: Workspace) -> Callable[[], Any]:
+    return lambda: context_data.fetch_context_data(DV_KEY, PB_KEY)
+
+
+def _run_pipeline(ws: Workspace) -> Callable[[], Any]:
+    project_ids = _project_ids(ws)
+    note_ids = [str(n["id"]) for n in ws.notes[:SELECTION_SIZE]]
+    api_config = APIConfig(dovetail_key=DV_KEY, productboard_key=PB_KEY)
+    return lambda: run_pipeline(api_config, PROMPT_CONFIG, project_ids, [], note_ids)
+
+
+def _build_prompt_from_context(ws: Workspace) -> Callable[[], Any]:
+    # Same shape fetch_context_data produces, built directly so setup stays cheap at 100k
+    context = {
+        "dovetail": context_data._normalize_dovetail(list(ws.projects), _all_highlights(ws)),
+        "productboard": context_data._normalize_notes(list(ws.notes)),
+    }
+    insight_ids = [i.id for p in context["dovetail"]["projects"] for i in p["insights"]][-SELECTION_SIZE:]
+    note_ids = [n.id for n in context["productboard"]["notes"]][-SELECTION_SIZE:]
+    # Step 2 keeps a ContextIndex in session state and hands it to Step 4
+    index = context_data.ContextIndex(context)
+    return lambda: build_prompt_from_context(context, insight_ids, note_ids, PROMPT_CONFIG, context_index=index)
+
+
+def _filter_context(ws: Workspace) -> Callable[[], Any]:
+    # One Step 2 rerun with facets set: match counts, each project's filtered insights, filtered notes
+    context = {
+        "dovetail": context_data._normalize_dovetail(list(ws.projects), _all_highlights(ws)),
+        "productboard": context_data._normalize_notes(list(ws.notes)),
+    }
+    index = context_data.ContextIndex(context)
+    days = sorted(i.created for i in index.insights.values() if i.created)
+    filters = DataSourceFilters(tags=index.tag_names()[:2], date_from=days[len(days) // 4], date_to=days[-len(days) // 4])
+    project_ids = list(index.projects)
+
+    def run() -> Any:
+        index.columns._cache.clear()  # time a fresh filter, not a cached one
+        return (
+            index.count_matching(filters),
+            [index.insights_for_project(pid, filters) for pid in project_ids],
+            index.notes_matching(filters),
+            index.tag_names(),
+        )
+    return run
+
+
+def _normalize_highlights(ws: Workspace) -> Callable[[], Any]:
+    # Step 2 (records per project, tag titles) and fetch_context_data (grouped by project id) shapes.
+    # Payloads are stored up front, so the (single at 100k) timed run measures extraction, not first-time storage.
+    projects, highlights = list(ws.projects), _all_highlights(ws)
+    for h in highlights:
+        RAW_STORE.put(h)
+
+    def run() -> Any:
+        return (
+            context_data._normalize_insights_for_project(highlights),
+            context_data._normalize_dovetail(projects, highlights),
+        )
+    return run
+
+
+def _open_snapshot(ws: Workspace) -> Callable[[], Any]:
+    # Step 2 "Open snapshot": read the file back, then build the index the page keeps in session state
+    context = {
+        "dovetail": context_data._normalize_dovetail(list(ws.projects), _all_highlights(ws)),
+        "productboard": context_data._normalize_notes(list(ws.notes)),
+    }
+    directory = Path(tempfile.mkdtemp(prefix="bench-snapshot-"))
+    atexit.register(shutil.rmtree, directory, True)
+    path = save_snapshot(context, name="bench", directory=directory)
+
+    def run() -> Any:
+        RAW_STORE.clear()  # a fresh session's store, as after a restart
+        snapshot = load_snapshot(path)
+        return context_data.ContextIndex(snapshot.context_data)
+    return run
+
+
+def _search_context(ws: Workspace) -> Callable[[], Any]:
+    # Step 2 search boxes in a second session over the same data: it reuses the first session's
+    # search index (built and queried once, not measured), so runs measure ranked top-k queries
+    context = {
+        "dovetail": context_data._normalize_dovetail(list(ws.projects), _all_highlights(ws)),
+        "productboard": context_data._normalize_notes(list(ws.notes)),
+    }
+    queries = ["onboarding", "onb", "billing export", "mobile", "permissions pricing"]
+    first = context_data.ContextIndex(context)
+    for query in queries:
+        first.search(query, kinds=("project", "insight"))
+        first.search(query, kinds=("note",))
+    second = context_data.ContextIndex(context)
+    return lambda: [
+        (second.search(q, kinds=("project", "insight")), second.search(q, kinds=("note",))) for q in queries
+    ]
+
+
+def _parse_long_highlights_page(ws: Workspace) -> Callable[[], Any]:
+    # One full highlights page whose items carry long transcripts, parsed into InsightRecords
+    page = [{**h, "text": " ".join([h["text"]] * TRANSCRIPT_REPEAT)} for h in _all_highlights(ws)[:PAGE_LIMIT]]
+    body = json.dumps({"data": page, "page": {"has_more": False}}).encode("utf-8")
+    return lambda: read_list_page(
+        httpx.Response(200, content=body), "dovetail/highlights", transform=HighlightExtractor().record
+    )
+
+
+def _dedupe_prompt_insights(ws: Workspace) -> Callable[[], Any]:
+    # Candidates for the prompt (up to MAX_CANDIDATES), every other one an edited copy of the one before;
+    # max_items is not reached, so every candidate goes through near-duplicate matching
+    raw = []
+    for h in _all_highlights(ws)[:MAX_CANDIDATES // 2]:
+        words = h["text"].split()
+        raw += [h, {**h, "id": f"{h['id']}-copy", "text": " ".join(words[:-1] + ["(edited)", words[-1]])}]
+    return lambda: normalize_insights(raw, max_items=len(raw))
+
+
+def _rank_prompt_insights(ws: Workspace) -> Callable[[], Any]:
+    # Every highlight ranked against the product context and goals; the top 30 distinct ones are kept
+    raw = _all_highlights(ws)
+    query = f"{PROMPT_CONFIG.product_context}\n{PROMPT_CONFIG.business_goals}"
+    return lambda: normalize_insights(raw, query=query)
+
+
+def _build_prompt(ws: Workspace) -> Callable[[], Any]:
+    dovetail_raw = _all_highlights(ws)
+    productboard_raw = [{**n, "kind": "note"} for n in ws.notes] + [{**f, "kind": "feature"} for f in ws.features]
+    config = PromptBuilderConfig(
+        product_context=PROMPT_CONFIG.product_context,
+        business_goals=PROMPT_CONFIG.business_goals,
+        constraints=PROMPT_CONFIG.constraints,
+    )
+    return lambda: build_prompt(dovetail_raw=dovetail_raw, productboard_raw=productboard_raw, config=config)
+
+
+def _budget_prompt(ws: Workspace) -> Callable[[], Any]:
+    # Whole workspace into an 8k-token prompt (notes as full JSON, the default)
+    dovetail_raw = _all_highlights(ws)
+    productboard_raw = list(ws.notes)
+    config = PromptBuilderConfig(
+        product_context=PROMPT_CONFIG.product_context,
+        business_goals=PROMPT_CONFIG.business_goals,
+        max_tokens=8000,
+    )
+    return lambda: build_prompt(dovetail_raw=dovetail_raw, productboard_raw=productboard_raw, config=config)
+
+
+CASES: dict[str, Case] = {c.name: c for c in (
+    Case("fetch_projects_and_products_only", _fetch_projects_and_products),
+    Case("fetch_insights_for_project_ids", _fetch_insights_for_project_ids),
+    Case("fetch_first_insight_pages", _fetch_first_insight_pages),
+    Case("fetch_context_data", _fetch_context_data),
+    Case("run_pipeline", _run_pipeline),
+    Case("build_prompt_from_context", _build_prompt_from_context, network=False),
+    Case("filter_context", _filter_context, network=False),
+    Case("normalize_highlights", _normalize_highlights, network=False),
+    Case("open_snapshot", _open_snapshot, network=False),
+    Case("search_context", _search_context, network=False),
+    Case("parse_long_highlights_page", _parse_long_highlights_page, network=False),
+    Case("dedupe_prompt_insights", _dedupe_prompt_insights, network=False),
+    Case("rank_prompt_insights", _rank_prompt_insights, network=False),
+    Case("build_prompt", _build_prompt, network=False),
+    Case("budget_prompt", _budget_prompt, network=False),
+)}
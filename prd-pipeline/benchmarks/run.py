@@ -0,0 +1,206 @@
+"""
+Benchmark runner. Each (case, size) runs in its own subprocess so peak RSS is per case.
+
+Metrics per case:
+- wall_s: median wall time over --repeats iterations
+- requests: upstream requests per iteration (network cases)
+- peak_rss_mb: process peak RSS after the timed iterations (includes interpreter + imports)
+- alloc_peak_mb: tracemalloc peak during one extra iteration (allocation pressure)
+
+Results are written as JSON (--out) and compared to --baseline; a metric regresses when it
+exceeds baseline * (1 + tolerance) by more than its noise floor. Exit status 1 on regression.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+DEFAULT_SIZES = (10, 1_000, 100_000)
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_OUT = ROOT / "data" / "benchmarks" / "results.json"
+
+# metric -> (relative tolerance, absolute noise floor). Request counts must not grow at all.
+THRESHOLDS: dict[str, tuple[float, float]] = {
+    "wall_s": (0.50, 0.05),
+    "requests": (0.0, 0.0),
+    "peak_rss_mb": (0.25, 10.0),
+    "alloc_peak_mb": (0.25, 2.0),
+}
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def measure(case_name: str, size: int, repeats: int, latency: float) -> dict[str, Any]:
+    """Run one case in this process and return its metrics."""
+    from benchmarks.cases import CASES, make_workspace
+    from mock_upstream import MockUpstream, use_mock_upstream
+
+    case = CASES[case_name]
+    workspace = make_workspace(size)
+    fn = case.prepare(workspace)
+
+    def once() -> tuple[float, int]:
+        if not case.network:
+            start = time.perf_counter()
+            fn()
+            return time.perf_counter() - start, 0
+        upstream = MockUpstream(workspace, latency=latency)
+        with use_mock_upstream(upstream):
+            start = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - start
+        return elapsed, upstream.request_count
+
+    timings: list[float] = []
+    requests = 0
+    for _ in range(repeats):
+        elapsed, requests = once()
+        timings.append(elapsed)
+    peak_rss = _peak_rss_mb()
+
+    tracemalloc.start()
+    try:
+        once()
+        _, alloc_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "wall_s": round(statistics.median(timings), 4),
+        "requests": requests,
+        "peak_rss_mb": peak_rss,
+        "alloc_peak_mb": round(alloc_peak / (1024 * 1024), 2),
+        "insights": workspace.total_highlights(),
+        "repeats": repeats,
+    }
+
+
+def _run_worker(case_name: str, size: int, repeats: int, latency: float) -> dict[str, Any]:
+    cmd = [
+        sys.executable, "-m", "benchmarks.run", "--worker", case_name, str(size),
+        "--repeats", str(repeats), "--latency", str(latency),
+    ]
+    proc = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"error": (proc.stderr.strip().splitlines() or ["failed"])[-1]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def compare(results: dict[str, dict[str, Any]], baseline: dict[str, dict[str, Any]]) -> list[str]:
+    """Return one message per regressed metric."""
+    regressions = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if not base or "error" in current:
+            continue
+        for metric, (tolerance, floor) in THRESHOLDS.items():
+            now, before = current.get(metric), base.get(metric)
+            if now is None or before is None:
+                continue
+            if now > before * (1 + tolerance) and now - before > floor:
+                regressions.append(f"{key} {metric}: {before} -> {now}")
+    return regressions
+
+
+def _print_table(results: dict[str, dict[str, Any]], baseline: dict[str, dict[str, Any]]) -> None:
+    print(f"{'case':<48} {'wall_s':>9} {'base':>9} {'reqs':>6} {'rss_mb':>8} {'alloc_mb':>9}")
+    for key, r in results.items():
+        if "error" in r:
+            print(f"{key:<48} ERROR {r['error']}")
+            continue
+        base = baseline.get(key, {}).get("wall_s", "-")
+        print(
+            f"{key:<48} {r['wall_s']:>9} {base:>9} {r['requests']:>6} "
+            f"{r['peak_rss_mb'] if r['peak_rss_mb'] is not None else '-':>8} {r['alloc_peak_mb']:>9}"
+        )
+
+
+def main() -> int:
+    from benchmarks.cases import CASES
+
+    parser = argparse.ArgumentParser(description="Run fetch-and-build benchmarks against mock_upstream.")
+    parser.add_argument("--cases", default=",".join(CASES), help="Comma-separated case names")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="Comma-separated insight counts")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed iterations (1 for sizes >= 100k)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Mock per-request latency in seconds")
+    parser.add_argument("--out", type=Path, default=DEFAULT_OUT)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="Write results into the baseline file")
+    parser.add_argument("--worker", nargs=2, metavar=("CASE", "SIZE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        logging.basicConfig(level=logging.ERROR)
+        print(json.dumps(measure(args.worker[0], int(args.worker[1]), args.repeats, args.latency)))
+        return 0
+
+    unknown = [c for c in args.cases.split(",") if c not in CASES]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}")
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    results: dict[str, dict[str, Any]] = {}
+    for case_name in args.cases.split(","):
+        for size in sizes:
+            key = f"{case_name}[{size}]"
+            print(f"running {key}...", file=sys.stderr, flush=True)
+            results[key] = _run_worker(case_name, size, 1 if size >= 100_000 else args.repeats, args.latency)
+
+    baseline_doc = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else {}
+    baseline = baseline_doc.get("results", {})
+    doc = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "latency": args.latency,
+        },
+        "results": results,
+    }
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(doc, indent=2) + "\n", encoding="utf-8")
+    _print_table(results, baseline)
+    print(f"\nresults: {args.out}")
+
+    if args.update_baseline:
+        merged = {**baseline, **{k: v for k, v in results.items() if "error" not in v}}
+        args.baseline.write_text(json.dumps({**doc, "results": merged}, indent=2) + "\n", encoding="utf-8")
+        print(f"baseline updated: {args.baseline}")
+        return 0
+
+    failed = [k for k, v in results.items() if "error" in v]
+    regressions = compare(results, baseline)
+    for msg in regressions:
+        print(f"REGRESSION {msg}")
+    if not baseline:
+        print("no baseline to compare against (run with --update-baseline)")
+    return 1 if regressions or failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
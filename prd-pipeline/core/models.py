@@ -29,16 +29,33 @@ class PromptConfig:
     audience_type: str = "internal_stakeholders"
     output_tone: str = "professional"
     include_roadmap: bool = True
+    max_tokens: Optional[int] = None  # prompt token budget; None = no limit
 
 
 @dataclass
 class DataSourceFilters:
-    """Filters for Dovetail/Productboard."""
+    """
+    Filters for Dovetail/Productboard. Tags match any of the given tags; dates are
+    YYYY-MM-DD, inclusive. Empty fields do not filter.
+    """
     tags: list[str] = field(default_factory=list)
     date_from: str = ""
     date_to: str = ""
     priority: str = ""
 
+    @classmethod
+    def from_session_dict(cls, d: Optional[dict[str, Any]]) -> "DataSourceFilters":
+        d = d or {}
+        return cls(
+            tags=[str(t).strip() for t in d.get("tags") or [] if str(t).strip()],
+            date_from=str(d.get("date_from") or "")[:10],
+            date_to=str(d.get("date_to") or "")[:10],
+            priority=str(d.get("priority") or "").strip(),
+        )
+
+    def is_active(self) -> bool:
+        return bool(self.tags or self.date_from or self.date_to or self.priority)
+
 
 @dataclass
 class PRDHistoryEntry:
@@ -6,11 +6,14 @@ No AI execution; the prompt is for users to run in their own LLM tools.
 """
 from __future__ import annotations
 
+import asyncio
 import logging
 import uuid
 from typing import Any, Callable, Optional
 
+from app.config import MAX_CONCURRENT_ASYNC_REQUESTS
 from core.models import APIConfig, PromptConfig
+from services.context_data import ContextIndex
 from services.prompt_builder import build_prompt
 from services.prompt_builder.models import PromptBuilderConfig, PromptResult
 
@@ -23,9 +26,11 @@ def build_prompt_from_context(
     selected_productboard_product_ids: list[str],
     prompt_config: PromptConfig,
     log_callback: Optional[Callable[[str], None]] = None,
+    context_index: Optional[ContextIndex] = None,
 ) -> tuple[str, Optional[str], str, Optional[dict[str, Any]]]:
     """
     Build PRD prompt from already-fetched context_data and prompt config. No API calls.
+    Pass the UI's context_index to skip re-indexing; selections are looked up by id, O(k).
     Returns (prompt_text, error_message, run_id, metadata).
     """
     run_id = str(uuid.uuid4())[:8]
@@ -37,39 +42,34 @@ def build_prompt_from_context(
 
     log("Building prompt from selected context (no fetch).")
     try:
+        index = context_index if context_index is not None else ContextIndex(context_data)
         dovetail_raw: list[dict[str, Any]] = []
-        projects = (context_data.get("dovetail") or {}).get("projects") or []
-        for proj in projects:
-            for ins in proj.get("insights") or []:
-                iid = str(ins.get("id", ""))
-                if iid in selected_dovetail_insight_ids:
-                    dovetail_raw.append({
-                        "id": iid,
-                        "name": ins.get("title", ""),
-                        "title": ins.get("title", ""),
-                        "body": ins.get("summary", ""),
-                        "content": ins.get("summary", ""),
-                    })
+        for ins in index.selected_insight_items(selected_dovetail_insight_ids):
+            dovetail_raw.append({
+                "id": ins.id,
+                "name": ins.title,
+                "title": ins.title,
+                "body": ins.summary,
+                "content": ins.summary,
+            })
 
         productboard_raw: list[dict[str, Any]] = []
-        notes = (context_data.get("productboard") or {}).get("notes") or []
-        for n in notes:
-            nid = str(n.get("id", ""))
-            if nid in selected_productboard_product_ids:
-                # Include full note data (id, title, content, createdAt, updatedAt, state, displayUrl, tags, company, followers, createdBy, etc.) so the prompt has whole detail
-                raw_note = n.get("raw")
-                if isinstance(raw_note, dict) and raw_note:
-                    productboard_raw.append(dict(raw_note))
-                else:
-                    name = n.get("name", "") or ""
-                    productboard_raw.append({
-                        "id": nid,
-                        "name": name,
-                        "title": name,
-                        "content": name,
-                        "description": name,
-                        "kind": "note",
-                    })
+        for n in index.selected_note_items(selected_productboard_product_ids):
+            # Include the note payload as fetched in Step 2 (projected fields, or everything incl. company, followers, createdBy with "Keep full note payloads")
+            raw_note = n.raw
+            if isinstance(raw_note, dict) and raw_note:
+                productboard_raw.append(raw_note)
+            else:
+                # Payload evicted from RAW_STORE (logged there): fall back to the record's summary
+                name = n.name or ""
+                productboard_raw.append({
+                    "id": n.id,
+                    "name": name,
+                    "title": name,
+                    "content": n.summary or name,
+                    "description": n.summary or name,
+                    "kind": "note",
+                })
 
         log(f"Using {len(dovetail_raw)} insight(s), {len(productboard_raw)} note(s).")
         builder_config = PromptBuilderConfig(
@@ -80,6 +80,7 @@ def build_prompt_from_context(
             audience_type=prompt_config.audience_type,
             output_tone=prompt_config.output_tone,
             include_roadmap=prompt_config.include_roadmap,
+            max_tokens=prompt_config.max_tokens,
         )
         result: PromptResult = build_prompt(
             dovetail_raw=dovetail_raw,
@@ -126,6 +127,149 @@ def _summarize_productboard(features: list[dict], notes: list[dict]) -> str:
     return "\n".join(lines) if lines else "No feedback."
 
 
+def _insight_project_id(insight: dict[str, Any]) -> str:
+    pid = insight.get("project_id")
+    if not pid and isinstance(insight.get("project"), dict):
+        pid = insight["project"].get("id")
+    return str(pid or "")
+
+
+def _attach_project(insights: list[dict[str, Any]], project: dict[str, Any]) -> None:
+    """Attach basic project metadata to each insight for richer context downstream."""
+    project_name = project.get("name") or project.get("title") or str(project.get("id", ""))
+    for ins in insights:
+        ins.setdefault("project_id", project.get("id"))
+        ins.setdefault("project_name", project_name)
+
+
+async def _fetch_dovetail_by_ids(
+    api_key: str,
+    project_ids: list[str],
+    insight_ids: list[str],
+    client: Any,
+    semaphore: asyncio.Semaphore,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """Fetch only the selected highlights and their projects by ID. Returns (projects, insights)."""
+    from api import dovetail_async
+
+    highlights_by_id, projects_by_id = await asyncio.gather(
+        dovetail_async.get_highlights_by_ids(api_key, insight_ids, client=client, semaphore=semaphore),
+        dovetail_async.get_projects_by_ids(api_key, project_ids, client=client, semaphore=semaphore),
+    )
+    insights = [h for h in highlights_by_id.values() if h]
+    # Projects referenced by selected highlights but not selected themselves (usually none)
+    missing = [pid for pid in dict.fromkeys(map(_insight_project_id, insights)) if pid and pid not in projects_by_id]
+    if missing:
+        projects_by_id.update(
+            await dovetail_async.get_projects_by_ids(api_key, missing, client=client, semaphore=semaphore)
+        )
+    projects = [p for p in projects_by_id.values() if p]
+    by_project: dict[str, list[dict[str, Any]]] = {}
+    for ins in insights:
+        by_project.setdefault(_insight_project_id(ins), []).append(ins)
+    for p in projects:
+        _attach_project(by_project.get(str(p.get("id", "")), []), p)
+    return projects, insights
+
+
+async def _fetch_dovetail_stage(
+    api_key: str,
+    selected_project_ids: list[str],
+    selected_insight_ids: list[str],
+    client: Any,
+    semaphore: asyncio.Semaphore,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """
+    Selected insights: fetch just those by ID. Otherwise list projects and fetch the first
+    highlights page of the selected ones (or the first 5); the prompt builder keeps far fewer
+    items than a page holds. Returns (projects, insights).
+    """
+    from api import dovetail_async
+
+    if selected_insight_ids:
+        return await _fetch_dovetail_by_ids(api_key, selected_project_ids, selected_insight_ids, client, semaphore)
+
+    wanted = set(selected_project_ids)
+    projects = await dovetail_async.get_projects(api_key, client=client, semaphore=semaphore)
+    projects_subset = [p for p in projects if str(p.get("id", "")) in wanted] if wanted else projects[:5]
+    projects_subset = [p for p in projects_subset if p.get("id")]
+    results = await asyncio.gather(
+        *(dovetail_async.get_insights_page(api_key, str(p["id"]), client=client, semaphore=semaphore) for p in projects_subset),
+        return_exceptions=True,
+    )
+    insights: list[dict[str, Any]] = []
+    for p, page in zip(projects_subset, results):
+        if isinstance(page, BaseException):
+            logger.warning("Dovetail insights for project %s failed: %s", p.get("id"), page)
+            continue
+        project_insights = page[0]
+        _attach_project(project_insights, p)
+        insights.extend(project_insights)
+    return projects_subset, insights
+
+
+async def _fetch_productboard_stage(
+    api_key: str,
+    selected_ids: list[str],
+    client: Any,
+    semaphore: asyncio.Semaphore,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """
+    Selected IDs: fetch them as notes by ID, and any that aren't notes as features.
+    Otherwise list features and notes concurrently, stopping each listing at 20 items.
+    Returns (features, notes).
+    """
+    from api import productboard_async
+
+    if selected_ids:
+        notes_by_id = await productboard_async.get_notes_by_ids(
+            api_key, selected_ids, client=client, semaphore=semaphore
+        )
+        missing = [i for i, n in notes_by_id.items() if n is None]
+        features_by_id = await productboard_async.get_features_by_ids(
+            api_key, missing, client=client, semaphore=semaphore
+        ) if missing else {}
+        return [f for f in features_by_id.values() if f], [n for n in notes_by_id.values() if n]
+
+    features, notes = await asyncio.gather(
+        productboard_async.get_features(api_key, client=client, semaphore=semaphore, max_items=20),
+        productboard_async.get_notes(api_key, client=client, semaphore=semaphore, max_items=20),
+    )
+    return features, notes
+
+
+async def _fetch_sources(
+    api_config: APIConfig,
+    selected_project_ids: list[str],
+    selected_insight_ids: list[str],
+    selected_productboard_ids: list[str],
+    log: Callable[[str], None],
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]], list[dict[str, Any]], list[dict[str, Any]]]:
+    """
+    Run the Dovetail and Productboard stages in parallel on one client, bounded by one
+    semaphore, and join them. Wall time is the slower source, not the sum of all calls.
+    A failed stage logs and contributes empty lists. Returns (projects, insights, features, notes).
+    """
+    from api.base import async_client_scope
+
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_ASYNC_REQUESTS)
+    async with async_client_scope() as client:
+        dovetail_result, productboard_result = await asyncio.gather(
+            _fetch_dovetail_stage(
+                api_config.dovetail_key, selected_project_ids, selected_insight_ids, client, semaphore
+            ),
+            _fetch_productboard_stage(api_config.productboard_key, selected_productboard_ids, client, semaphore),
+            return_exceptions=True,
+        )
+    if isinstance(dovetail_result, BaseException):
+        log(f"Dovetail fetch failed: {dovetail_result}")
+        dovetail_result = ([], [])
+    if isinstance(productboard_result, BaseException):
+        log(f"Productboard fetch failed: {productboard_result}")
+        productboard_result = ([], [])
+    return (*dovetail_result, *productboard_result)
+
+
 def run_pipeline(
     api_config: APIConfig,
     prompt_config: PromptConfig,
@@ -136,6 +280,8 @@ def run_pipeline(
 ) -> tuple[str, Optional[str], str, Optional[dict[str, Any]]]:
     """
     Run the prompt generation pipeline (sync). Call from a thread.
+    Selected insight / Productboard IDs are fetched directly by ID, so cost scales with the
+    selection rather than the workspace; without a selection, sources are listed and sampled.
     Returns (prompt_text, error_message, run_id, metadata).
     If error_message is set, prompt_text may be empty and metadata None.
     """
@@ -148,44 +294,28 @@ def run_pipeline(
 
     log("Starting pipeline.")
     try:
-        from api import dovetail, productboard
+        from api import dovetail_async, productboard_async  # noqa: F401
+        from app.run_async import run_async
     except ImportError as e:
         err = f"Import error: {e}"
         log(err)
         return "", err, run_id, None
 
-    # 1. Fetch Dovetail data
-    log("Fetching Dovetail projects and insights...")
-    projects = dovetail.get_projects(api_config.dovetail_key)
-    projects_subset = [p for p in projects if str(p.get("id", "")) in selected_dovetail_project_ids]
-    if not selected_dovetail_project_ids:
-        projects_subset = projects[:5]
-    insights: list[dict[str, Any]] = []
-    for p in projects_subset:
-        pid = p.get("id")
-        if pid:
-            project_insights = dovetail.get_insights(api_config.dovetail_key, project_id=str(pid))
-            # Attach basic project metadata to each insight for richer context downstream.
-            project_name = p.get("name") or p.get("title") or str(p.get("id", ""))
-            for ins in project_insights:
-                ins.setdefault("project_id", p.get("id"))
-                ins.setdefault("project_name", project_name)
-            insights.extend(project_insights)
-    if selected_dovetail_insight_ids:
-        insights = [i for i in insights if str(i.get("id", "")) in selected_dovetail_insight_ids]
+    # 1-2. Fetch Dovetail and Productboard concurrently, joined before summarizing.
+    # With a selection, only the selected items are fetched (by ID); no full listings.
+    if selected_dovetail_insight_ids or selected_productboard_ids:
+        log("Fetching selected Dovetail insights and Productboard items by ID...")
+    else:
+        log("Fetching Dovetail projects/insights and Productboard features/notes concurrently...")
+    projects_subset, insights, features, notes = run_async(_fetch_sources(
+        api_config,
+        selected_dovetail_project_ids,
+        selected_dovetail_insight_ids,
+        selected_productboard_ids,
+        log,
+    ))
     dovetail_summary = _summarize_dovetail(projects_subset, insights)
     log(f"Dovetail: {len(projects_subset)} projects, {len(insights)} insights.")
-
-    # 2. Fetch Productboard data
-    log("Fetching Productboard features and notes...")
-    features = productboard.get_features(api_config.productboard_key)
-    notes = productboard.get_notes(api_config.productboard_key)
-    if selected_productboard_ids:
-        features = [f for f in features if str(f.get("id", "")) in selected_productboard_ids]
-        notes = [n for n in notes if str(n.get("id", "")) in selected_productboard_ids]
-    else:
-        features = features[:20]
-        notes = notes[:20]
     productboard_summary = _summarize_productboard(features, notes)
     log(f"Productboard: {len(features)} features, {len(notes)} notes.")
 
@@ -212,6 +342,7 @@ def run_pipeline(
             audience_type=prompt_config.audience_type,
             output_tone=prompt_config.output_tone,
             include_roadmap=prompt_config.include_roadmap,
+            max_tokens=prompt_config.max_tokens,
         )
         result: PromptResult = build_prompt(
             dovetail_raw=dovetail_raw,
@@ -74,6 +74,7 @@ def build_prd_prompt(
         audience_type=config.audience_type,
         output_tone=config.output_tone,
         include_roadmap=config.include_roadmap,
+        max_tokens=config.max_tokens,
     )
     result = build_prompt_from_summaries(
         dovetail_summary=dovetail_summary,
@@ -0,0 +1,52 @@
+"""
+Offline stand-in for the Dovetail and Productboard APIs (tests, benchmarks, local dev).
+
+    from mock_upstream import MockUpstream, SyntheticWorkspace, use_mock_upstream
+
+    with use_mock_upstream(MockUpstream(SyntheticWorkspace.with_total_highlights(1000))) as upstream:
+        fetch_context_data("dv-key", "pb-key")
+        print(upstream.requests)
+"""
+from __future__ import annotations
+
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from mock_upstream.transport import MockUpstream
+from mock_upstream.workspace import FIXTURES_DIR, SyntheticWorkspace, Workspace
+
+__all__ = ["FIXTURES_DIR", "MockUpstream", "SyntheticWorkspace", "Workspace", "use_mock_upstream"]
+
+
+@contextmanager
+def use_mock_upstream(
+    upstream: Optional[MockUpstream] = None,
+    *,
+    cache: bool = False,
+    rate_limit: float = 0,
+    max_concurrency: int = 64,
+) -> Iterator[MockUpstream]:
+    """
+    Route every api.* request to `upstream` (default: a small SyntheticWorkspace) for the
+    duration of the block. The HTTP cache and highlight store point at a temp directory and
+    the per-host limiter is unthrottled (rate_limit=0), so runs are isolated and repeatable.
+    Everything is restored on exit.
+    """
+    from api import base, dovetail_sync, ratelimit
+    from api import cache as http_cache
+
+    upstream = upstream or MockUpstream()
+    with tempfile.TemporaryDirectory(prefix="mock_upstream_") as tmp:
+        base.set_transports(upstream.transport(), upstream.async_transport())
+        http_cache.configure(cache, Path(tmp) / "http_cache.sqlite3")
+        dovetail_sync.set_store(dovetail_sync.HighlightStore(Path(tmp) / "highlights.sqlite3"))
+        ratelimit.configure_limiters(rate=rate_limit, max_concurrency=max_concurrency)
+        try:
+            yield upstream
+        finally:
+            base.set_transports()
+            http_cache.configure()
+            dovetail_sync.set_store(None)
+            ratelimit.configure_limiters()
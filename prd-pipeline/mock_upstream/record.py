@@ -0,0 +1,148 @@
+"""
+Record real Dovetail / Productboard responses into sanitized fixtures for MockUpstream.
+
+RecordingTransport wraps the network transport and keeps every item returned by the list
+and detail endpoints; save() redacts people (emails, names, follower lists) and writes
+mock_upstream/fixtures/*.json, which Workspace.from_fixtures() serves back.
+
+Run from prd-pipeline (reads DOVETAIL_API_KEY / PRODUCTBOARD_API_KEY from the environment):
+    python -m mock_upstream.record [--projects 3]
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+import httpx
+
+from mock_upstream.workspace import FIXTURE_FILES, FIXTURES_DIR
+
+logger = logging.getLogger(__name__)
+
+_EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+# Keys whose values identify people or workspaces; replaced wholesale
+_PERSON_KEYS = {"createdBy", "owner", "user", "author", "followers", "assignee", "company", "customer"}
+_URL_KEYS = {"displayUrl", "url", "href", "source_url"}
+
+# (api, first path segment) -> fixture attribute in FIXTURE_FILES
+_ENDPOINTS = {
+    ("dovetail", "projects"): "projects",
+    ("dovetail", "highlights"): "highlights",
+    ("dovetail", "insights"): "insights",
+    ("productboard", "notes"): "notes",
+    ("productboard", "features"): "features",
+    ("productboard", "products"): "products",
+}
+
+
+def _pseudonym(kind: str, value: Any) -> str:
+    return f"{kind}-{hashlib.sha256(str(value).encode()).hexdigest()[:8]}"
+
+
+def sanitize(value: Any, key: str = "") -> Any:
+    """Recursively redact personal data: people objects, emails in text, and external URLs."""
+    if key in _PERSON_KEYS:
+        if isinstance(value, list):
+            return []
+        if isinstance(value, dict):
+            return {"id": _pseudonym(key, value.get("id") or value), "name": _pseudonym(key, value.get("name"))}
+        return _pseudonym(key, value)
+    if key in _URL_KEYS and isinstance(value, str):
+        return "https://example.com/redacted"
+    if isinstance(value, dict):
+        return {k: sanitize(v, k) for k, v in value.items()}
+    if isinstance(value, list):
+        return [sanitize(v, key) for v in value]
+    if isinstance(value, str):
+        return _EMAIL_RE.sub("redacted@example.com", value)
+    return value
+
+
+class RecordingTransport(httpx.BaseTransport):
+    """Pass requests through to `inner` and keep the data items of successful JSON responses."""
+
+    def __init__(self, inner: Optional[httpx.BaseTransport] = None) -> None:
+        self.inner = inner or httpx.HTTPTransport(retries=2)
+        self.items: dict[str, dict[str, dict[str, Any]]] = {attr: {} for attr in FIXTURE_FILES.values()}
+        self._lock = threading.Lock()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        response = self.inner.handle_request(request)
+        if response.status_code != 200:
+            return response
+        response.read()
+        api = "productboard" if "productboard" in request.url.host else "dovetail"
+        segments = [s for s in request.url.path.split("/") if s and s not in ("api", "v1")]
+        attr = _ENDPOINTS.get((api, segments[0])) if segments else None
+        if attr:
+            try:
+                data = response.json().get("data")
+            except (ValueError, AttributeError):
+                data = None
+            for item in data if isinstance(data, list) else [data] if isinstance(data, dict) else []:
+                if isinstance(item, dict) and item.get("id"):
+                    if attr == "highlights" and "project_id" not in item:
+                        item.setdefault("project_id", request.url.params.get("project_id"))
+                    with self._lock:
+                        self.items[attr][str(item["id"])] = item
+        return response
+
+    def close(self) -> None:
+        self.inner.close()
+
+    def save(self, path: Path = FIXTURES_DIR) -> dict[str, int]:
+        """Write sanitized fixture files; returns item counts per file."""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        counts: dict[str, int] = {}
+        for filename, attr in FIXTURE_FILES.items():
+            items = [sanitize(i) for i in self.items[attr].values()]
+            (path / filename).write_text(json.dumps(items, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+            counts[filename] = len(items)
+        return counts
+
+
+def main() -> None:
+    import sys
+    project_root = Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(project_root))
+    from dotenv import load_dotenv
+    load_dotenv(project_root / ".env")
+
+    from api import base, cache, dovetail, productboard
+
+    parser = argparse.ArgumentParser(description="Record sanitized upstream fixtures.")
+    parser.add_argument("--projects", type=int, default=3, help="Dovetail projects whose highlights to record")
+    parser.add_argument("--out", type=Path, default=FIXTURES_DIR)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    recorder = RecordingTransport()
+    cache.configure(False)  # every response must come off the wire to be recorded
+    base.set_transports(recorder)
+    try:
+        dv_key = os.environ.get("DOVETAIL_API_KEY", "")
+        if dv_key:
+            for project in dovetail.get_projects(dv_key)[: args.projects]:
+                for insight in dovetail.get_insights(dv_key, project["id"]):
+                    dovetail.get_insight(dv_key, insight["id"])
+        pb_key = os.environ.get("PRODUCTBOARD_API_KEY", "")
+        if pb_key:
+            productboard.get_notes(pb_key)
+            productboard.get_features(pb_key)
+            productboard.get_products(pb_key)
+    finally:
+        base.set_transports()
+    for filename, count in recorder.save(args.out).items():
+        print(f"{filename}: {count} items")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Serve a MockUpstream over real HTTP so the Streamlit app (or anything else) can run
+against it. Point the app at it with the printed DOVETAIL_BASE_URL / PRODUCTBOARD_BASE_URL.
+
+Run from prd-pipeline:
+    python -m mock_upstream.server [--port 8765] [--fixtures | --highlights 100000] [--latency 0.05]
+"""
+from __future__ import annotations
+
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+import httpx
+
+from mock_upstream.transport import MockUpstream
+from mock_upstream.workspace import SyntheticWorkspace, Workspace
+
+
+def _handler_for(upstream: MockUpstream) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real upstreams
+        disable_nagle_algorithm = True
+
+        def do_GET(self) -> None:  # noqa: N802
+            host = self.headers.get("Host", "localhost")
+            request = httpx.Request("GET", f"http://{host}{self.path}", headers=dict(self.headers))
+            response = upstream.handle(request)
+            body = response.content
+            self.send_response(response.status_code)
+            for name, value in response.headers.items():
+                if name.lower() not in ("content-length", "transfer-encoding"):
+                    self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args: object) -> None:
+            pass
+
+    return Handler
+
+
+class MockServer:
+    """A MockUpstream on a local socket. Usable as a context manager; port 0 picks a free port."""
+
+    def __init__(self, upstream: Optional[MockUpstream] = None, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.upstream = upstream or MockUpstream()
+        self._server = ThreadingHTTPServer((host, port), _handler_for(self.upstream))
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def dovetail_base_url(self) -> str:
+        return f"{self.base_url}/api/v1"
+
+    def start(self) -> "MockServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockServer":
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve mock Dovetail + Productboard APIs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixtures", action="store_true", help="Serve recorded fixtures instead of synthetic data")
+    parser.add_argument("--highlights", type=int, default=200, help="Total synthetic highlights")
+    parser.add_argument("--notes", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency, 0..jitter seconds")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered 503")
+    args = parser.parse_args()
+
+    workspace = (
+        Workspace.from_fixtures() if args.fixtures
+        else SyntheticWorkspace.with_total_highlights(args.highlights, notes=args.notes)
+    )
+    upstream = MockUpstream(
+        workspace,
+        latency=args.latency,
+        jitter=args.jitter,
+        throttle_rate=args.throttle_rate,
+        error_rate=args.error_rate,
+        retry_after=1.0,
+    )
+    server = MockServer(upstream, args.host, args.port)
+    print(f"DOVETAIL_BASE_URL={server.dovetail_base_url}")
+    print(f"PRODUCTBOARD_BASE_URL={server.base_url}")
+    print("Serving; Ctrl+C to stop.", flush=True)
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+MockUpstream: an httpx handler that answers Dovetail (/api/v1/...) and Productboard
+requests from a Workspace, with realistic cursor pagination, ETags, configurable latency
+and jitter, and injectable 429 / 5xx responses. Use .transport() / .async_transport()
+with api.base.set_transports, or mock_upstream.server for a real socket.
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from collections.abc import Sequence
+from typing import Any, Optional
+
+import httpx
+
+from mock_upstream.workspace import SyntheticWorkspace, Workspace
+
+DOVETAIL_PREFIX = "/api/v1/"
+MAX_PAGE_LIMIT = 100
+
+
+def _encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(f"o:{offset}".encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        return max(0, int(raw.split(":", 1)[1]))
+    except (ValueError, IndexError):
+        return 0
+
+
+def _limit(value: Optional[str], default: int = MAX_PAGE_LIMIT) -> int:
+    try:
+        return max(1, min(MAX_PAGE_LIMIT, int(value or default)))
+    except ValueError:
+        return default
+
+
+class MockUpstream:
+    """Request handler plus counters. Thread-safe; one instance can back sync and async clients."""
+
+    def __init__(
+        self,
+        workspace: Optional[Workspace] = None,
+        *,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        throttle_rate: float = 0.0,
+        error_rate: float = 0.0,
+        retry_after: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        self.workspace = workspace if workspace is not None else SyntheticWorkspace()
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.requests: Counter[str] = Counter()
+        self._forced: list[int] = []
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._filtered: dict[tuple, list] = {}
+
+    # --- Controls ---
+
+    def fail_next(self, count: int = 1, status: int = 429) -> None:
+        """Answer the next `count` requests with `status` (429s carry Retry-After)."""
+        with self._lock:
+            self._forced.extend([status] * count)
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.requests.clear()
+
+    @property
+    def request_count(self) -> int:
+        return sum(self.requests.values())
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    def async_transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle_async)
+
+    # --- Handling ---
+
+    def _delay(self) -> float:
+        with self._lock:
+            return self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        delay = self._delay()
+        if delay:
+            time.sleep(delay)
+        return self.respond(request)
+
+    async def handle_async(self, request: httpx.Request) -> httpx.Response:
+        delay = self._delay()
+        if delay:
+            await asyncio.sleep(delay)
+        return self.respond(request)
+
+    def _injected_status(self) -> Optional[int]:
+        with self._lock:
+            if self._forced:
+                return self._forced.pop(0)
+            roll = self._rng.random()
+        if roll < self.throttle_rate:
+            return 429
+        if roll < self.throttle_rate + self.error_rate:
+            return 503
+        return None
+
+    def respond(self, request: httpx.Request) -> httpx.Response:
+        """Route one request (no latency). Counts it under '<api> <endpoint>'."""
+        path = request.url.path
+        api = "dovetail" if path.startswith(DOVETAIL_PREFIX) else "productboard"
+        parts = [p for p in (path[len(DOVETAIL_PREFIX):] if api == "dovetail" else path).split("/") if p]
+        endpoint = f"{api} {parts[0] if parts else ''}{'/{id}' if len(parts) > 1 else ''}"
+        with self._lock:
+            self.requests[endpoint] += 1
+
+        status = self._injected_status()
+        if status is not None:
+            headers = {"Retry-After": str(self.retry_after)} if status == 429 else {}
+            return httpx.Response(status, headers=headers, json={"errors": [{"message": "injected"}]})
+        if not request.headers.get("authorization", "").startswith("Bearer "):
+            return httpx.Response(401, json={"errors": [{"message": "Unauthorized"}]})
+
+        handler = self._dovetail if api == "dovetail" else self._productboard
+        result = handler(parts, request.url.params)
+        if result is None:
+            return httpx.Response(404, json={"errors": [{"message": "Not found"}]})
+        body = json.dumps(result).encode()
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if request.headers.get("if-none-match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        return httpx.Response(200, content=body, headers={"Content-Type": "application/json", "ETag": etag})
+
+    def _filter(self, key: tuple, items: Sequence, keep) -> Sequence:
+        """items narrowed by keep(item), cached per filter key and collection size (pages reuse it)."""
+        if not key[1]:
+            return items
+        key = (*key, len(items))
+        with self._lock:
+            cached = self._filtered.get(key)
+        if cached is None:
+            cached = [item for item in items if keep(item)]
+            with self._lock:
+                self._filtered[key] = cached
+        return cached
+
+    # --- Dovetail ---
+
+    def _dovetail_page(self, items: Sequence, params: httpx.QueryParams) -> dict[str, Any]:
+        start = _decode_cursor(params.get("page[start_cursor]"))
+        limit = _limit(params.get("page[limit]"))
+        page = list(items[start:start + limit])
+        has_more = start + limit < len(items)
+        return {
+            "data": page,
+            "page": {
+                "has_more": has_more,
+                "next_cursor": _encode_cursor(start + limit) if has_more else None,
+                "total_count": len(items),
+            },
+        }
+
+    def _dovetail(self, parts: list[str], params: httpx.QueryParams) -> Optional[dict[str, Any]]:
+        ws = self.workspace
+        if parts == ["projects"]:
+            return self._dovetail_page(ws.projects, params)
+        if parts == ["highlights"]:
+            project_id = params.get("project_id", "")
+            items = ws.highlights(project_id)
+            # Upstream-side created_at range filter (ISO strings compare chronologically)
+            gte = params.get("filter[created_at][gte]") or ""
+            lte = params.get("filter[created_at][lte]") or "\uffff"
+            items = self._filter(
+                ("highlights", (gte, lte) if gte or lte != "\uffff" else (), project_id),
+                items,
+                lambda h: gte <= (h.get("created_at") or "") <= lte,
+            )
+            if (params.get("sort") or "").endswith(":asc"):
+                items = items[::-1]
+            return self._dovetail_page(items, params)
+        if len(parts) == 2:
+            find = {"projects": ws.find_project, "highlights": ws.find_highlight, "insights": ws.find_insight}.get(parts[0])
+            item = find(parts[1]) if find else None
+            return {"data": item} if item is not None else None
+        return None
+
+    # --- Productboard ---
+
+    def _productboard(self, parts: list[str], params: httpx.QueryParams) -> Optional[dict[str, Any]]:
+        ws = self.workspace
+        collections = {"notes": ws.notes, "features": ws.features, "products": ws.products}
+        if len(parts) == 1 and parts[0] in collections:
+            items = collections[parts[0]]
+            limit = _limit(params.get("pageLimit"))
+            if parts[0] == "notes":
+                # Upstream-side filters: createdFrom / createdTo range and anyTag (comma-separated)
+                filters = {k: params[k] for k in ("createdFrom", "createdTo", "anyTag") if params.get(k)}
+                created_from = filters.get("createdFrom", "")
+                created_to = filters.get("createdTo", "\uffff")
+                any_tag = {t.strip().lower() for t in filters.get("anyTag", "").split(",") if t.strip()}
+                items = self._filter(
+                    ("notes", tuple(sorted(filters.items()))),
+                    items,
+                    lambda n: created_from <= (n.get("createdAt") or "") <= created_to
+                    and (not any_tag or any(str(t).lower() in any_tag for t in n.get("tags") or [])),
+                )
+                # Notes: opaque pageCursor, echoed in links.next (with the filters, like the real API)
+                start = _decode_cursor(params.get("pageCursor"))
+                cursor = _encode_cursor(start + limit) if start + limit < len(items) else None
+                query = httpx.QueryParams({"pageLimit": limit, **filters, "pageCursor": cursor or ""})
+                next_link = f"/notes?{query}" if cursor else None
+                return {
+                    "data": list(items[start:start + limit]),
+                    "links": {"next": next_link},
+                    "pageCursor": cursor,
+                    "totalResults": len(items),
+                }
+            # Features / products: offset pagination via links.next
+            try:
+                start = max(0, int(params.get("pageOffset") or 0))
+            except ValueError:
+                start = 0
+            more = start + limit < len(items)
+            next_link = f"/{parts[0]}?pageLimit={limit}&pageOffset={start + limit}" if more else None
+            return {"data": list(items[start:start + limit]), "links": {"next": next_link}}
+        if len(parts) == 2:
+            find = {"notes": ws.find_note, "features": ws.find_feature, "products": ws.find_product}.get(parts[0])
+            item = find(parts[1]) if find else None
+            return {"data": item} if item is not None else None
+        return None
@@ -0,0 +1,293 @@
+"""
+Upstream data served by the mock: Dovetail projects/highlights/insights and Productboard
+notes/features/products.
+
+Workspace holds explicit lists (e.g. loaded from recorded fixtures). SyntheticWorkspace
+generates items on demand from their index, so a 100k-highlight workspace costs almost
+nothing until pages are actually requested.
+"""
+from __future__ import annotations
+
+import json
+import random
+from collections.abc import Sequence
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+# Fixture file name -> Workspace attribute
+FIXTURE_FILES = {
+    "dovetail_projects.json": "projects",
+    "dovetail_highlights.json": "highlights",
+    "dovetail_insights.json": "insights",
+    "productboard_notes.json": "notes",
+    "productboard_features.json": "features",
+    "productboard_products.json": "products",
+}
+
+_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+_WORDS = (
+    "export audit onboarding billing latency dashboard permissions report search filter "
+    "integration mobile sync invoice approval workflow alert retention compliance sso "
+    "template comment share import schedule notification api usage trial pricing team"
+).split()
+_TAGS = ("Pricing", "Onboarding", "Performance", "Reporting", "Integrations", "Permissions", "Mobile", "Billing")
+
+
+def _iso(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+class _Generated(Sequence):
+    """Read-only sequence whose items are built from their index on access."""
+
+    def __init__(self, length: int, factory: Callable[[int], dict[str, Any]]) -> None:
+        self._length = length
+        self._factory = factory
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            return [self._factory(i) for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        return self._factory(index)
+
+
+class Workspace:
+    """Explicit upstream data. Highlights are grouped by project id, newest-updated first."""
+
+    def __init__(
+        self,
+        projects: Optional[list[dict[str, Any]]] = None,
+        highlights: Optional[list[dict[str, Any]]] = None,
+        insights: Optional[list[dict[str, Any]]] = None,
+        notes: Optional[Sequence] = None,
+        features: Optional[Sequence] = None,
+        products: Optional[Sequence] = None,
+    ) -> None:
+        self.projects: Sequence = projects or []
+        self.notes: Sequence = notes or []
+        self.features: Sequence = features or []
+        self.products: Sequence = products or []
+        self._highlights: dict[str, list[dict[str, Any]]] = {}
+        for h in highlights or []:
+            pid = str(h.get("project_id") or (h.get("project") or {}).get("id") or "")
+            self._highlights.setdefault(pid, []).append(h)
+        for items in self._highlights.values():
+            items.sort(key=lambda h: h.get("updated_at") or h.get("created_at") or "", reverse=True)
+        self._insights = {str(i["id"]): i for i in insights or [] if i.get("id")}
+        self._index: dict[str, dict[str, dict[str, Any]]] = {}
+
+    @classmethod
+    def from_fixtures(cls, path: Path = FIXTURES_DIR) -> "Workspace":
+        """Load recorded (sanitized) responses written by mock_upstream.record."""
+        kwargs: dict[str, Any] = {}
+        for filename, attr in FIXTURE_FILES.items():
+            f = Path(path) / filename
+            kwargs[attr] = json.loads(f.read_text(encoding="utf-8")) if f.exists() else []
+        return cls(**kwargs)
+
+    def highlights(self, project_id: str) -> Sequence:
+        return self._highlights.get(project_id, [])
+
+    def add_highlight(self, project_id: str, item: dict[str, Any]) -> None:
+        """Insert a highlight as the newest in its project (for delta-sync scenarios)."""
+        item = {**item, "project_id": project_id}
+        self._highlights.setdefault(project_id, []).insert(0, item)
+        self._index.pop("highlights", None)
+
+    def remove_highlight(self, project_id: str, item_id: str) -> None:
+        """Hard-delete a highlight (for full-sync reconcile scenarios)."""
+        self._highlights[project_id] = [h for h in self.highlights(project_id) if str(h.get("id")) != item_id]
+        self._index.pop("highlights", None)
+
+    def _find(self, kind: str, items: Sequence, item_id: str) -> Optional[dict[str, Any]]:
+        if kind not in self._index:
+            self._index[kind] = {str(i.get("id")): i for i in items}
+        return self._index[kind].get(item_id)
+
+    def find_project(self, item_id: str) -> Optional[dict[str, Any]]:
+        return self._find("projects", self.projects, item_id)
+
+    def find_highlight(self, item_id: str) -> Optional[dict[str, Any]]:
+        return self._find("highlights", [h for items in self._highlights.values() for h in items], item_id)
+
+    def find_insight(self, item_id: str) -> Optional[dict[str, Any]]:
+        return self._insights.get(item_id) or self.find_highlight(item_id)
+
+    def find_note(self, item_id: str) -> Optional[dict[str, Any]]:
+        return self._find("notes", self.notes, item_id)
+
+    def find_feature(self, item_id: str) -> Optional[dict[str, Any]]:
+        return self._find("features", self.features, item_id)
+
+    def find_product(self, item_id: str) -> Optional[dict[str, Any]]:
+        return self._find("products", self.products, item_id)
+
+    def total_highlights(self) -> int:
+        return sum(len(self.highlights(str(p.get("id")))) for p in self.projects)
+
+
+class SyntheticWorkspace(Workspace):
+    """
+    Deterministic generated workspace. Sizes are free; items exist only while a page
+    holding them is being served. IDs encode their position (proj-3, hl-3-41, note-7).
+    """
+
+    def __init__(
+        self,
+        projects: int = 10,
+        highlights_per_project: int = 20,
+        notes: int = 50,
+        features: int = 20,
+        products: int = 3,
+        words_per_highlight: int = 40,
+        seed: int = 0,
+    ) -> None:
+        super().__init__()
+        self.seed = seed
+        self.words_per_highlight = words_per_highlight
+        self.highlights_per_project = highlights_per_project
+        self.projects = _Generated(projects, self._project)
+        self.notes = _Generated(notes, self._note)
+        self.features = _Generated(features, self._feature)
+        self.products = _Generated(products, self._product)
+
+    @classmethod
+    def with_total_highlights(cls, total: int, **kwargs: Any) -> "SyntheticWorkspace":
+        """Spread `total` highlights over roughly sqrt(total) projects (at least 1)."""
+        projects = max(1, int(total ** 0.5) // 2)
+        return cls(projects=projects, highlights_per_project=max(1, total // projects), **kwargs)
+
+    def _rng(self, *key: int) -> random.Random:
+        return random.Random(hash((self.seed,) + key))
+
+    def _text(self, rng: random.Random, n: int) -> str:
+        return " ".join(rng.choice(_WORDS) for _ in range(n)).capitalize() + "."
+
+    def _project(self, p: int) -> dict[str, Any]:
+        return {
+            "id": f"proj-{p}",
+            "name": f"Research project {p}",
+            "created_at": _iso(_EPOCH + timedelta(days=p)),
+        }
+
+    def _highlight(self, p: int, i: int) -> dict[str, Any]:
+        rng = self._rng(1, p, i)
+        # Index 0 is the most recently updated, matching sort=updated_at:desc
+        updated = _EPOCH + timedelta(minutes=self.highlights_per_project - i, days=p)
+        return {
+            "id": f"hl-{p}-{i}",
+            "type": "highlight",
+            "text": self._text(rng, self.words_per_highlight),
+            "tags": [{"id": f"tag-{t}", "title": _TAGS[t]} for t in sorted(rng.sample(range(len(_TAGS)), 2))],
+            "project": {"id": f"proj-{p}"},
+            "created_at": _iso(updated - timedelta(hours=1)),
+            "updated_at": _iso(updated),
+        }
+
+    def _insight(self, p: int, i: int) -> dict[str, Any]:
+        h = self._highlight(p, i)
+        return {
+            "id": h["id"],
+            "title": h["text"][:60],
+            "summary": h["text"],
+            "project": h["project"],
+            "created_at": h["created_at"],
+            "updated_at": h["updated_at"],
+        }
+
+    def _note(self, n: int) -> dict[str, Any]:
+        rng = self._rng(2, n)
+        created = _EPOCH + timedelta(hours=n)
+        return {
+            "id": f"note-{n}",
+            "title": self._text(rng, 6)[:-1],
+            "content": self._text(rng, 60),
+            "displayUrl": f"https://example.productboard.com/notes/{n}",
+            "state": rng.choice(["unprocessed", "processed"]),
+            "tags": sorted(rng.sample(_TAGS, 2)),
+            "createdAt": _iso(created),
+            "updatedAt": _iso(created + timedelta(minutes=5)),
+            "company": {"id": f"company-{n % 17}", "name": f"Company {n % 17}"},
+            "createdBy": {"email": f"user{n % 5}@example.com", "name": f"User {n % 5}"},
+            "followers": [{"memberEmail": f"user{(n + k) % 5}@example.com"} for k in range(2)],
+        }
+
+    def _feature(self, f: int) -> dict[str, Any]:
+        rng = self._rng(3, f)
+        return {
+            "id": f"feat-{f}",
+            "name": self._text(rng, 4)[:-1],
+            "description": self._text(rng, 25),
+            "status": {"name": rng.choice(["New idea", "Planned", "In progress", "Released"])},
+        }
+
+    def _product(self, p: int) -> dict[str, Any]:
+        return {"id": f"prod-{p}", "name": f"Product {p}", "description": f"Product line {p}."}
+
+    def highlights(self, project_id: str) -> Sequence:
+        if project_id in self._highlights:
+            return self._highlights[project_id]
+        p = self._position(project_id, "proj-", len(self.projects))
+        if p is None:
+            return []
+        return _Generated(self.highlights_per_project, lambda i: self._highlight(p, i))
+
+    def add_highlight(self, project_id: str, item: dict[str, Any]) -> None:
+        if project_id not in self._highlights:
+            self._highlights[project_id] = list(self.highlights(project_id))
+        super().add_highlight(project_id, item)
+
+    def remove_highlight(self, project_id: str, item_id: str) -> None:
+        if project_id not in self._highlights:
+            self._highlights[project_id] = list(self.highlights(project_id))
+        super().remove_highlight(project_id, item_id)
+
+    @staticmethod
+    def _position(item_id: str, prefix: str, limit: int, parts: int = 1) -> Any:
+        if not item_id.startswith(prefix):
+            return None
+        try:
+            nums = [int(x) for x in item_id[len(prefix):].split("-")]
+        except ValueError:
+            return None
+        if len(nums) != parts or not 0 <= nums[0] < limit:
+            return None
+        return nums[0] if parts == 1 else nums
+
+    def find_project(self, item_id: str) -> Optional[dict[str, Any]]:
+        p = self._position(item_id, "proj-", len(self.projects))
+        return None if p is None else self._project(p)
+
+    def find_highlight(self, item_id: str) -> Optional[dict[str, Any]]:
+        pos = self._position(item_id, "hl-", len(self.projects), parts=2)
+        if pos is None:
+            return super().find_highlight(item_id) if self._highlights else None
+        p, i = pos
+        return self._highlight(p, i) if 0 <= i < self.highlights_per_project else None
+
+    def find_insight(self, item_id: str) -> Optional[dict[str, Any]]:
+        pos = self._position(item_id, "hl-", len(self.projects), parts=2)
+        if pos is None or not 0 <= pos[1] < self.highlights_per_project:
+            return self.find_highlight(item_id)
+        return self._insight(*pos)
+
+    def find_note(self, item_id: str) -> Optional[dict[str, Any]]:
+        n = self._position(item_id, "note-", len(self.notes))
+        return None if n is None else self._note(n)
+
+    def find_feature(self, item_id: str) -> Optional[dict[str, Any]]:
+        f = self._position(item_id, "feat-", len(self.features))
+        return None if f is None else self._feature(f)
+
+    def find_product(self, item_id: str) -> Optional[dict[str, Any]]:
+        p = self._position(item_id, "prod-", len(self.products))
+        return None if p is None else self._product(p)
@@ -2,19 +2,133 @@
 from __future__ import annotations
 
 import logging
+from datetime import date
+from typing import Optional
 
 import streamlit as st
 
+from app.config import PAYLOAD_FULL_FIDELITY
 from app.state import get_api_config, next_step
 from components.loading import with_spinner
+from core.models import DataSourceFilters
 from services.context_data import (
+    ContextIndex,
     fetch_dovetail_projects_only,
-    fetch_insights_for_project_ids,
+    fetch_insight_pages,
     fetch_productboard_notes_only,
 )
+from services.snapshot import list_snapshots, load_snapshot, save_snapshot
 
 logger = logging.getLogger(__name__)
 
+# Step 2 selections saved with a snapshot and restored when it is opened
+_SNAPSHOT_SELECTIONS = (
+    "selected_dovetail_insight_ids",
+    "selected_productboard_product_ids",
+    "selected_dovetail_project_ids_for_loading",
+)
+
+
+def _parse_date(value: str) -> Optional[date]:
+    try:
+        return date.fromisoformat(value[:10]) if value else None
+    except ValueError:
+        return None
+
+
+def _render_filters(index: ContextIndex) -> DataSourceFilters:
+    """Filters expander. Stores st.session_state.filters and returns it as DataSourceFilters."""
+    current = DataSourceFilters.from_session_dict(st.session_state.get("filters"))
+    with st.expander("Filters", expanded=current.is_active()):
+        st.caption(
+            "Date range and tags are also applied by Dovetail/Productboard when fetching, "
+            "so fetch again after widening them."
+        )
+        tag_options = list(dict.fromkeys([*index.tag_names(), *current.tags]))
+        tags = st.multiselect("Tags (any of)", tag_options, default=current.tags, key="filter_tags")
+        col_from, col_to = st.columns(2)
+        date_from = col_from.date_input("Created from", value=_parse_date(current.date_from), key="filter_date_from")
+        date_to = col_to.date_input("Created to", value=_parse_date(current.date_to), key="filter_date_to")
+        priority = current.priority
+        priority_options = list(dict.fromkeys(["", *index.priority_names(), priority.lower()]))
+        if len(priority_options) > 1:
+            priority = st.selectbox(
+                "Priority",
+                priority_options,
+                index=priority_options.index(priority.lower()),
+                format_func=lambda p: p or "Any",
+                key="filter_priority",
+            )
+    st.session_state.filters = {
+        "tags": list(tags),
+        "date_from": date_from.isoformat() if isinstance(date_from, date) else "",
+        "date_to": date_to.isoformat() if isinstance(date_to, date) else "",
+        "priority": priority,
+    }
+    filters = DataSourceFilters.from_session_dict(st.session_state.filters)
+    if filters.is_active():
+        n_insights, n_notes = index.count_matching(filters)
+        st.caption(f"Matching loaded items: {n_insights} insight(s), {n_notes} note(s).")
+    return filters
+
+
+def _render_snapshots(context: Optional[dict]) -> None:
+    """Snapshots expander: save the loaded context and selections to disk, or open a saved one (no network)."""
+    with st.expander("Snapshots", expanded=False):
+        st.caption("Save what is loaded and selected here, and open it again later without fetching.")
+        if context is not None and st.button("Save snapshot", key="save_snapshot_btn"):
+            selections = {k: list(st.session_state.get(k) or []) for k in _SNAPSHOT_SELECTIONS}
+            with with_spinner("Saving snapshot..."):
+                path = save_snapshot(context, selections)
+            if path is not None:
+                st.success(f"Saved {path.name}.")
+            else:
+                st.error("Could not save the snapshot. See logs for details.")
+        paths = list_snapshots()
+        if not paths:
+            st.caption("No saved snapshots yet.")
+            return
+        path = st.selectbox("Saved snapshots", paths, format_func=lambda p: p.stem, key="snapshot_path")
+        if st.button("Open snapshot", key="open_snapshot_btn"):
+            with with_spinner(f"Opening {path.stem}..."):
+                snapshot = load_snapshot(path)
+            if snapshot is None:
+                st.error("Could not open the snapshot. See logs for details.")
+                return
+            st.session_state.context_data = snapshot.context_data
+            for key in _SNAPSHOT_SELECTIONS:
+                st.session_state[key] = snapshot.selections.get(key, [])
+            # Rebuilt (with the restored selections) on the rerun
+            st.session_state.context_index = None
+            st.rerun()
+
+
+def _refresh_sources(cfg: dict, index: ContextIndex, filters: DataSourceFilters) -> None:
+    """
+    Re-download what is loaded, skipping the response cache: projects, the first insights page of
+    each project that had insights, and notes. Upstream edits show up before their cache TTL ends.
+    """
+    context = st.session_state.context_data
+    dovetail_key = cfg.get("dovetail_key", "") or ""
+    if index.projects and dovetail_key.strip():
+        loaded = [pid for pid in index.projects if index.project_insights.get(pid) or index.insights_cursor(pid)]
+        dovetail_slice = fetch_dovetail_projects_only(dovetail_key, use_cache=False)
+        context.setdefault("dovetail", {})["projects"] = dovetail_slice.get("projects", [])
+        index.set_projects(context["dovetail"]["projects"])
+        cursors = dict.fromkeys(pid for pid in loaded if pid in index.projects)
+        for pid, (insights, next_cursor) in fetch_insight_pages(dovetail_key, cursors, filters, use_cache=False).items():
+            index.add_insight_page(pid, insights, next_cursor, first_page=True)
+    productboard_key = cfg.get("productboard_key", "") or ""
+    if index.notes and productboard_key.strip():
+        pb_slice = fetch_productboard_notes_only(
+            productboard_key,
+            filters=filters,
+            full_fidelity=st.session_state.get("productboard_full_fidelity", PAYLOAD_FULL_FIDELITY),
+            use_cache=False,
+        )
+        context.setdefault("productboard", {})["notes"] = pb_slice.get("notes", [])
+        index.set_notes(context["productboard"]["notes"])
+
 
 def render_step_data_sources() -> None:
     st.header("Step 2: Context Selection")
@@ -24,8 +138,10 @@ def render_step_data_sources() -> None:
     )
     cfg = get_api_config()
     if not (cfg.get("dovetail_key") or "").strip() and not (cfg.get("productboard_key") or "").strip():
-        st.warning("Configure API keys in Step 1 first.")
-        return
+        if st.session_state.get("context_data") is None:
+            st.warning("Configure API keys in Step 1 first, or open a saved snapshot.")
+            _render_snapshots(None)
+            return
 
     # Ensure context_data exists so both tabs can merge their fetch results
     if st.session_state.get("context_data") is None:
@@ -33,21 +149,33 @@ def render_step_data_sources() -> None:
             "dovetail": {"projects": []},
             "productboard": {"notes": []},
         }
+        st.session_state.context_index = None
 
     context = st.session_state.context_data
+    # Index over context_data for O(1) lookups and set-based selection; kept in sync on every fetch
+    index: ContextIndex = st.session_state.get("context_index")
+    if index is None:
+        index = ContextIndex(context)
+        index.set_selection(
+            st.session_state.get("selected_dovetail_insight_ids", []),
+            st.session_state.get("selected_productboard_product_ids", []),
+        )
+        st.session_state.context_index = index
 
-    # Run insights fetch only once per click (in a dedicated run) to avoid loop/multiple API calls
+    filters = DataSourceFilters.from_session_dict(st.session_state.get("filters"))
+    # Run insights fetch only once per click (in a dedicated run) to avoid loop/multiple API calls.
+    # One page per project: Load insights starts from the first page, Load more resumes from the saved cursor.
     pending = st.session_state.pop("pending_insights_load", None)
-    if pending is not None:
+    if pending:
         with with_spinner(f"Loading insights for {len(pending)} project(s)..."):
-            by_project = fetch_insights_for_project_ids(
+            pages = fetch_insight_pages(
                 cfg.get("dovetail_key", "") or "",
                 pending,
+                filters=filters,
             )
-        for proj in st.session_state.context_data.setdefault("dovetail", {}).setdefault("projects", []):
-            pid = str(proj.get("id", ""))
-            if pid in by_project:
-                proj["insights"] = by_project[pid]
+        for pid, (insights, next_cursor) in pages.items():
+            if pid in index.projects:
+                index.add_insight_page(pid, insights, next_cursor, first_page=pending.get(pid) is None)
         st.rerun()
 
     dovetail_data = context.get("dovetail") or {}
@@ -70,7 +198,20 @@ def render_step_data_sources() -> None:
     </style>
     """, unsafe_allow_html=True)
 
+    _render_snapshots(context)
+
     # ---------- Tabs: Dovetail (first) and Productboard (second) ----------
+    # Facets: pushed upstream on fetch where supported, then applied locally via the index
+    filters = _render_filters(index)
+    if (index.projects or index.notes) and st.button(
+        "Refresh (skip cache)",
+        key="refresh_sources_btn",
+        help="Re-download loaded projects, insights and notes instead of reading cached responses.",
+    ):
+        with with_spinner("Refreshing from Dovetail and Productboard..."):
+            _refresh_sources(cfg, index, filters)
+        st.rerun()
+
     tab_dovetail, tab_productboard = st.tabs(["Dovetail Research", "Productboard Notes"])
 
     with tab_dovetail:
@@ -79,10 +220,22 @@ def render_step_data_sources() -> None:
             with with_spinner("Fetching Dovetail projects..."):
                 dovetail_slice = fetch_dovetail_projects_only(cfg.get("dovetail_key", "") or "")
             st.session_state.context_data.setdefault("dovetail", {})["projects"] = dovetail_slice.get("projects", [])
+            index.set_projects(st.session_state.context_data["dovetail"]["projects"])
             st.rerun()
-        dovetail_search = (st.text_input("Search projects", key="dovetail_search", placeholder="Type to filter by name...") or "").strip().lower()
+        dovetail_search = (st.text_input("Search projects", key="dovetail_search", placeholder="Search project names and loaded insights (prefixes work)...") or "").strip()
+        # Ranked full-text hits: a project matches by name or through its loaded insights
+        name_matches: set[str] = set()
+        insight_matches: set[str] = set()
         if dovetail_search:
-            projects_filtered = [p for p in projects if dovetail_search in (p.get("name") or "").lower()]
+            ranked_pids: list[str] = []
+            for kind, item_id in index.search(dovetail_search, kinds=("project", "insight")):
+                if kind == "project":
+                    name_matches.add(item_id)
+                    ranked_pids.append(item_id)
+                else:
+                    insight_matches.add(item_id)
+                    ranked_pids.append(index.insight_project.get(item_id, ""))
+            projects_filtered = [index.projects[pid] for pid in dict.fromkeys(ranked_pids) if pid in index.projects]
         else:
             projects_filtered = projects
         st.markdown("**Projects**")
@@ -100,87 +253,99 @@ def render_step_data_sources() -> None:
 
         if selected_for_loading:
             if st.button("Load insights for selected project(s)", type="secondary", key="load_insights_btn"):
-                st.session_state.pending_insights_load = list(selected_for_loading)
+                st.session_state.pending_insights_load = dict.fromkeys(selected_for_loading)
                 st.rerun()
         else:
             st.caption("Select one or more projects above, then click **Load insights for selected project(s)**.")
 
         st.divider()
         st.markdown("**Insights**")
-        selected_insight_ids: set[str] = set(st.session_state.get("selected_dovetail_insight_ids", []))
         for proj in projects_filtered:
             proj_id = proj.get("id", "")
             proj_name = proj.get("name", "Unnamed project")
-            insights = proj.get("insights") or []
-            if not insights:
+            insights = index.insights_for_project(str(proj_id), filters)
+            if dovetail_search and str(proj_id) not in name_matches:
+                insights = [ins for ins in insights if ins.id in insight_matches]
+            cursor = index.insights_cursor(str(proj_id))
+            if not insights and not cursor:
                 continue
-            with st.expander(f"▸ {proj_name} ({len(insights)} insight(s))", expanded=False, key=f"exp_proj_{proj_id}"):
+            more = "+" if cursor else ""
+            with st.expander(f"▸ {proj_name} ({len(insights)}{more} insight(s))", expanded=False, key=f"exp_proj_{proj_id}"):
                 for ins in insights:
-                    iid = str(ins.get("id", ""))
-                    title = ins.get("title", "(No title)")
+                    iid = ins.id
+                    title = ins.title or "(No title)"
                     key = f"insight_{proj_id}_{iid}"
-                    checked = st.checkbox(title, value=(iid in selected_insight_ids), key=key)
-                    if checked:
-                        selected_insight_ids.add(iid)
-                    elif iid in selected_insight_ids:
-                        selected_insight_ids.discard(iid)
-                    if checked:
-                        raw_data = ins.get("raw")
-                        with st.expander("View full data (JSON)", expanded=False, key=f"exp_raw_{proj_id}_{iid}"):
-                            if raw_data is not None:
-                                st.json(raw_data)
-                            else:
-                                st.caption("Full data not available.")
-
-        st.session_state.selected_dovetail_insight_ids = list(selected_insight_ids)
-        selected_project_ids = set()
-        for proj in projects:
-            for ins in proj.get("insights") or []:
-                if str(ins.get("id", "")) in selected_insight_ids:
-                    selected_project_ids.add(proj.get("id", ""))
-        st.session_state.selected_dovetail_project_ids = list(selected_project_ids)
+                    checked = st.checkbox(title, value=(iid in index.selected_insights), key=key)
+                    index.select_insight(iid, checked)
+                    if iid in insight_matches:
+                        st.caption(index.snippet("insight", iid, dovetail_search))
+                    # Raw payloads live in the shared RawStore; decode only when the user asks
+                    if checked and st.toggle("View full data (JSON)", key=f"exp_raw_{proj_id}_{iid}"):
+                        raw_data = ins.raw
+                        if raw_data is not None:
+                            st.json(raw_data)
+                        else:
+                            st.caption("Full data is no longer in memory (evicted from the shared payload store); fetch again to view it.")
+                if cursor:
+                    # Resume from the saved cursor: only the next page is fetched
+                    if st.button("Load more", key=f"more_insights_{proj_id}"):
+                        st.session_state.pending_insights_load = {str(proj_id): cursor}
+                        st.rerun()
+
+        st.session_state.selected_dovetail_insight_ids = list(index.selected_insights)
+        st.session_state.selected_dovetail_project_ids = index.selected_project_ids()
 
     with tab_productboard:
         st.caption("Fetch Productboard notes, then select which notes to include in the PRD context.")
+        full_notes = st.checkbox(
+            "Keep full note payloads",
+            value=PAYLOAD_FULL_FIDELITY,
+            key="productboard_full_fidelity",
+            help="Include every note field (company, followers, created by, ...) in the prompt. Uses more memory.",
+        )
         if st.button("Fetch Productboard", type="primary", key="fetch_productboard_btn"):
             with with_spinner("Fetching Productboard notes..."):
-                pb_slice = fetch_productboard_notes_only(cfg.get("productboard_key", "") or "")
+                progress = st.empty()
+                pb_slice = fetch_productboard_notes_only(
+                    cfg.get("productboard_key", "") or "",
+                    on_page=lambda n: progress.caption(f"Fetched {n} note(s) so far..."),
+                    filters=filters,
+                    full_fidelity=full_notes,
+                )
+                progress.empty()
             st.session_state.context_data.setdefault("productboard", {})["notes"] = pb_slice.get("notes", [])
+            index.set_notes(st.session_state.context_data["productboard"]["notes"])
             st.rerun()
-        pb_search = (st.text_input("Search notes", key="productboard_search", placeholder="Type to filter by name or title...") or "").strip().lower()
+        pb_search = (st.text_input("Search notes", key="productboard_search", placeholder="Search titles, tags and content (prefixes work)...") or "").strip()
         if pb_search:
-            notes_filtered = [
-                n for n in notes
-                if pb_search in (n.get("name") or "").lower()
-                or (isinstance(n.get("raw"), dict) and pb_search in str((n.get("raw") or {}).get("title", "")).lower())
-            ]
+            allowed = index.matching_ids(filters)
+            notes_filtered = [index.notes[nid] for _, nid in index.search(pb_search, kinds=("note",))]
+            if allowed is not None:
+                notes_filtered = [n for n in notes_filtered if n.id in allowed]
+        elif filters.is_active():
+            notes_filtered = index.notes_matching(filters)
         else:
             notes_filtered = notes
         st.markdown("**Notes**")
-        selected_note_ids: list[str] = list(st.session_state.get("selected_productboard_product_ids", []))
         for note in notes_filtered:
-            nid = str(note.get("id", ""))
-            name = note.get("name", "Unnamed note")
+            nid = note.id
+            name = note.name or "Unnamed note"
             key = f"note_{nid}"
-            checked = st.checkbox(name, value=(nid in selected_note_ids), key=key)
-            if checked:
-                if nid not in selected_note_ids:
-                    selected_note_ids.append(nid)
-            else:
-                if nid in selected_note_ids:
-                    selected_note_ids = [x for x in selected_note_ids if x != nid]
-            if checked:
-                raw_data = note.get("raw")
-                with st.expander("View full data (JSON)", expanded=False, key=f"exp_raw_note_{nid}"):
-                    if raw_data is not None:
-                        st.json(raw_data)
-                    else:
-                        st.caption("Full data not available.")
-        st.session_state.selected_productboard_product_ids = selected_note_ids
+            checked = st.checkbox(name, value=(nid in index.selected_notes), key=key)
+            index.select_note(nid, checked)
+            if pb_search:
+                st.caption(index.snippet("note", nid, pb_search))
+            if checked and st.toggle("View full data (JSON)", key=f"exp_raw_note_{nid}"):
+                raw_data = note.raw
+                if raw_data is not None:
+                    st.json(raw_data)
+                else:
+                    st.caption("Full data is no longer in memory (evicted from the shared payload store); fetch again to view it.")
+        st.session_state.selected_productboard_product_ids = list(index.selected_notes)
 
     st.divider()
     st.caption(
-        f"**Selected:** {len(selected_insight_ids)} insight(s), {len(selected_note_ids)} note(s)."
+        f"**Selected:** {len(index.selected_insights)} insight(s), {len(index.selected_notes)} note(s)."
     )
     if st.button("Next: Generate PRD prompt →", type="primary"):
         next_step()
@@ -47,6 +47,7 @@ def _run(payload: dict[str, Any]) -> None:
             audience_type=payload.get("audience_type", "internal_stakeholders"),
             output_tone=payload.get("output_tone", "professional"),
             include_roadmap=payload.get("include_roadmap", True),
+            max_tokens=payload.get("max_tokens") or None,
         )
         context_data = payload.get("context_data")
         if context_data:
@@ -56,6 +57,7 @@ def _run(payload: dict[str, Any]) -> None:
                 selected_productboard_product_ids=payload.get("selected_productboard_product_ids", []),
                 prompt_config=prompt_config,
                 log_callback=_log_cb,
+                context_index=payload.get("context_index"),
             )
         else:
             api_config = APIConfig.from_session_dict(payload["api_config"])
@@ -104,6 +106,7 @@ def render_step_generation() -> None:
             "audience_type": st.session_state.get("audience_type", "internal_stakeholders"),
             "output_tone": st.session_state.get("output_tone", "professional"),
             "include_roadmap": st.session_state.get("include_roadmap", True),
+            "max_tokens": st.session_state.get("prompt_max_tokens", 0),
         }
         snapshot = _get_prompt_config_snapshot()
 
@@ -114,6 +117,13 @@ def render_step_generation() -> None:
     # Optional: show that we're using default prompt settings (no config step)
     with st.expander("Prompt settings (defaults)", expanded=False):
         st.caption("Prompt is built from your selected data with default settings. No custom configuration.")
+        st.number_input(
+            "Prompt token budget",
+            min_value=0,
+            step=1000,
+            key="prompt_max_tokens",
+            help="Least relevant insights and feedback are left out so the prompt fits this many tokens (estimated). 0 = no limit.",
+        )
 
     # Sync session state from worker
     if _generation_logs:
@@ -145,7 +155,9 @@ def render_step_generation() -> None:
                 "audience_type": snap.get("audience_type", "internal_stakeholders"),
                 "output_tone": snap.get("output_tone", "professional"),
                 "include_roadmap": snap.get("include_roadmap", True),
+                "max_tokens": st.session_state.get("prompt_max_tokens", snap.get("max_tokens", 0)),
                 "context_data": st.session_state.get("context_data"),
+                "context_index": st.session_state.get("context_index"),
                 "selected_dovetail_project_ids": st.session_state.get("selected_dovetail_project_ids", []),
                 "selected_dovetail_insight_ids": st.session_state.get("selected_dovetail_insight_ids", []),
                 "selected_productboard_ids": st.session_state.get("selected_productboard_ids", []),
@@ -161,7 +173,9 @@ def render_step_generation() -> None:
                 "audience_type": st.session_state.get("audience_type", "internal_stakeholders"),
                 "output_tone": st.session_state.get("output_tone", "professional"),
                 "include_roadmap": st.session_state.get("include_roadmap", True),
+                "max_tokens": st.session_state.get("prompt_max_tokens", 0),
                 "context_data": st.session_state.get("context_data"),
+                "context_index": st.session_state.get("context_index"),
                 "selected_dovetail_project_ids": st.session_state.get("selected_dovetail_project_ids", []),
                 "selected_dovetail_insight_ids": st.session_state.get("selected_dovetail_insight_ids", []),
                 "selected_productboard_ids": st.session_state.get("selected_productboard_ids", []),
@@ -175,6 +189,7 @@ def render_step_generation() -> None:
                 "audience_type": payload.get("audience_type", "internal_stakeholders"),
                 "output_tone": payload.get("output_tone", "professional"),
                 "include_roadmap": payload.get("include_roadmap", True),
+                "max_tokens": payload.get("max_tokens", 0),
             }
         st.session_state.generation_running = True
         st.session_state.generation_logs = []
@@ -241,6 +256,26 @@ def render_step_generation() -> None:
         st.caption(f"Strategy: {strategy_id} · Template: {template_id} · Words: {word_count}")
         if sections:
             st.caption("Sections: " + ", ".join(sections))
+        merged = metadata.get("merged_duplicates") or {}
+        merged_parts = [
+            f"{sum(len(ids) for ids in kept.values())} {source} item(s) into {len(kept)}"
+            for source, kept in merged.items()
+            if kept
+        ]
+        if merged_parts:
+            st.caption("Duplicates merged: " + "; ".join(merged_parts) + ".")
+        section_tokens = metadata.get("section_tokens") or {}
+        if section_tokens:
+            st.caption(
+                f"Tokens: ~{metadata.get('token_count', 0)} (instructions {section_tokens.get('instructions', 0)}, "
+                f"insights {section_tokens.get('insights', 0)}, feedback {section_tokens.get('feedback', 0)})"
+            )
+        dropped = metadata.get("dropped_for_budget") or []
+        truncated = metadata.get("truncated_for_budget") or []
+        if dropped or truncated:
+            st.caption(f"To fit the token budget: {len(dropped)} item(s) left out, {len(truncated)} cut short.")
+        if metadata.get("budget_warning"):
+            st.warning(metadata["budget_warning"])
 
         # Editable prompt: user can tweak before copying
         edited = st.text_area(
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Compare per-request latency of a fresh httpx client per call (old behaviour)
+against the pooled client registry in api.base, using a local HTTP server.
+
+Run from prd-pipeline: python scripts/bench_client_pool.py [requests]
+"""
+from __future__ import annotations
+
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from api.base import close_clients, create_client, get
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real upstreams
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:  # noqa: N802
+        body = json.dumps({"data": [{"id": "1", "name": "Project"}], "page": {"has_more": False}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+
+def _time_per_request(fn, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1000
+
+
+def main() -> int:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/projects"
+
+    def fresh_client() -> None:
+        with create_client() as client:
+            client.get(url).raise_for_status()
+
+    def pooled_client() -> None:
+        get(url)
+
+    try:
+        fresh_ms = _time_per_request(fresh_client, n)
+        pooled_client()  # warm the pool
+        pooled_ms = _time_per_request(pooled_client, n)
+    finally:
+        close_clients()
+        server.shutdown()
+
+    print(f"requests:              {n}")
+    print(f"fresh client per call: {fresh_ms:.3f} ms/request")
+    print(f"pooled client:         {pooled_ms:.3f} ms/request")
+    print(f"speedup:               {fresh_ms / pooled_ms:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
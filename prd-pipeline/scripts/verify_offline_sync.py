@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+Exercise the full fetch -> sync -> prompt path against mock_upstream, with no network:
+- Step 2 context load (projects, all highlights, notes) from recorded fixtures and synthetic data
+- Incremental highlight sync: a rerun re-downloads only what changed; full syncs (on request,
+  or once the last one is too old) drop highlights deleted upstream
+- 429 + Retry-After handling mid-pagination
+- Step 2 filters: pushed upstream on fetch, and matched locally by ContextIndex's columns
+- Step 2 insights paging: first page, then Load more from the saved cursor
+- Field projection at parse time, and the full-fidelity switch for notes
+- Incremental (chunked) JSON parsing of list page bodies, whatever the chunk boundaries
+- Step 2 snapshots: save, then open again with no network; search them through one shared index;
+  prompts and snapshots keep item summaries after payloads are evicted
+- run_pipeline and build_prompt_from_context end to end, with near-duplicate highlights merged
+  and the highlights most relevant to the product context kept
+- Token budgets: the prompt fits max_tokens, with per-section token counts; the item that only
+  partly fits is cut short
+
+Run from prd-pipeline: python scripts/verify_offline_sync.py
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Iterator
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import httpx
+
+from api import base, dovetail, dovetail_sync
+from api.cache import ttl_for
+from api.jsonstream import JSONPageStream, read_list_page
+from api.ratelimit import AdaptiveLimiter
+from api.singleflight import SingleFlight
+from app.config import HTTP_CACHE_TTLS
+from core.models import APIConfig, DataSourceFilters, PromptConfig
+from core.prd_generator import build_prompt_from_context, run_pipeline
+from mock_upstream import MockUpstream, SyntheticWorkspace, Workspace, use_mock_upstream
+from services.context_data import (
+    ContextIndex,
+    fetch_context_data,
+    fetch_insight_pages,
+    fetch_insights_for_project_ids,
+    fetch_productboard_notes_only,
+)
+from services.prompt_builder import PromptBuilderConfig, build_prompt, build_prompt_from_summaries
+from services.prompt_builder.normalizer import NO_FEEDBACK, NO_INSIGHTS, normalize_insights
+from services.records import RAW_STORE
+from services.snapshot import load_snapshot, save_snapshot
+
+DV_KEY = "mock-dovetail-key"
+PB_KEY = "mock-productboard-key"
+
+
+def _insight_count(context: dict) -> int:
+    return sum(len(p.get("insights") or []) for p in context["dovetail"]["projects"])
+
+
+class _ChunkedBody(httpx.SyncByteStream):
+    """Response body served in fixed-size chunks, counting how many have been read."""
+
+    def __init__(self, body: bytes, size: int) -> None:
+        self.body, self.size, self.served = body, size, 0
+        self.chunks = -(-len(body) // size)
+
+    def __iter__(self) -> Iterator[bytes]:
+        for start in range(0, len(self.body), self.size):
+            self.served += 1
+            yield self.body[start:start + self.size]
+
+
+class _ChunkedTransport(httpx.BaseTransport):
+    """Answers every request with the same chunked body, unread (unlike httpx.MockTransport)."""
+
+    def __init__(self, body: _ChunkedBody) -> None:
+        self.body = body
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, stream=self.body)
+
+
+async def _cancel_singleflight_leader() -> tuple[list[int], int]:
+    """Cancel the leader of a coalesced call; returns (follower results, calls made)."""
+    flight, calls = SingleFlight(), []
+
+    async def fetch() -> int:
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return len(calls)
+
+    leader = asyncio.create_task(flight.do_async("key", fetch))
+    await asyncio.sleep(0.01)
+    followers = [asyncio.create_task(flight.do_async("key", fetch)) for _ in range(2)]
+    await asyncio.sleep(0.01)
+    leader.cancel()
+    return list(await asyncio.gather(*followers)), len(calls)
+
+
+def main() -> int:
+    failures: list[str] = []
+
+    def check(ok: bool, label: str) -> None:
+        print(f"  [{'ok' if ok else 'FAIL'}] {label}")
+        if not ok:
+            failures.append(label)
+
+    print("Recorded fixtures")
+    fixtures = Workspace.from_fixtures()
+    with use_mock_upstream(MockUpstream(fixtures)):
+        context = fetch_context_data(DV_KEY, PB_KEY)
+        check(len(context["dovetail"]["projects"]) == len(fixtures.projects), "all fixture projects loaded")
+        check(_insight_count(context) == fixtures.total_highlights(), "all fixture highlights loaded")
+        check(len(context["productboard"]["notes"]) == len(fixtures.notes), "all fixture notes loaded")
+
+    print("Synthetic workspace (5,000 highlights, 250 notes)")
+    workspace = SyntheticWorkspace.with_total_highlights(5000, notes=250)
+    upstream = MockUpstream(workspace)
+    with use_mock_upstream(upstream):
+        context = fetch_context_data(DV_KEY, PB_KEY)
+        check(_insight_count(context) == workspace.total_highlights(), "every highlight across all pages")
+        check(len(context["productboard"]["notes"]) == 250, "every note across all pages")
+        first_run = upstream.requests["dovetail highlights"]
+
+        upstream.reset_stats()
+        fetch_context_data(DV_KEY, PB_KEY)
+        rerun = upstream.requests["dovetail highlights"]
+        check(rerun < first_run, f"unchanged rerun: {rerun} highlight pages (first run {first_run})")
+
+        workspace.add_highlight("proj-0", {
+            "id": "hl-new", "text": "Brand new highlight.", "tags": [],
+            "created_at": "2030-01-01T00:00:00.000Z", "updated_at": "2030-01-01T00:00:00.000Z",
+        })
+        context = fetch_context_data(DV_KEY, PB_KEY)
+        ids = {i.id for p in context["dovetail"]["projects"] for i in p.get("insights") or []}
+        check("hl-new" in ids, "delta sync picks up a new highlight")
+
+        workspace.remove_highlight("proj-0", "hl-new")
+        context = fetch_context_data(DV_KEY, PB_KEY, full_sync=True)
+        ids = {i.id for p in context["dovetail"]["projects"] for i in p.get("insights") or []}
+        check("hl-new" not in ids, "full sync drops a highlight deleted upstream")
+
+        deleted = str(workspace.highlights("proj-1")[0]["id"])
+        workspace.remove_highlight("proj-1", deleted)
+        interval, dovetail_sync.HIGHLIGHT_FULL_SYNC_INTERVAL = dovetail_sync.HIGHLIGHT_FULL_SYNC_INTERVAL, 1e-9
+        try:
+            context = fetch_context_data(DV_KEY, PB_KEY)
+        finally:
+            dovetail_sync.HIGHLIGHT_FULL_SYNC_INTERVAL = interval
+        ids = {i.id for p in context["dovetail"]["projects"] for i in p.get("insights") or []}
+        check(deleted not in ids, "a stale full sync is redone on the next load")
+
+    print("Throttling (429 + Retry-After mid-pagination)")
+    upstream = MockUpstream(SyntheticWorkspace(projects=2, highlights_per_project=250), retry_after=0.05)
+    with use_mock_upstream(upstream):
+        upstream.fail_next(3, status=429)
+        by_project = fetch_insights_for_project_ids(DV_KEY, ["proj-0", "proj-1"])
+        check(all(by_project.get(pid) for pid in ("proj-0", "proj-1")), "insights fetched despite 429s")
+    limiter = AdaptiveLimiter(max_concurrency=8)
+    limiter.acquire()
+    window = limiter.limit
+    limiter.release(failed=True)
+    check(limiter.limit == window, "a failed request (no response) leaves the concurrency window unchanged")
+    limiter = AdaptiveLimiter(max_concurrency=2)
+    limiter.acquire()
+    waiter = threading.Thread(target=limiter.acquire)
+    waiter.start()
+    time.sleep(0.05)
+    blocked = waiter.is_alive()
+    limiter.release()
+    waiter.join(timeout=1.0)
+    check(blocked and not waiter.is_alive(), "a caller waiting on a full window is woken by release()")
+    limiter = AdaptiveLimiter(rate=10, burst=100, max_concurrency=8)
+    limiter.acquire()
+    limiter.release(throttled=True)
+    throttled_rate = limiter.rate
+    for _ in range(50):
+        limiter.acquire()
+        limiter.release()
+    check(throttled_rate == 5 and limiter.rate == 10, "a configured rate halves on 429 and recovers on success")
+    results, calls = asyncio.run(_cancel_singleflight_leader())
+    check(results == [2, 2] and calls == 2, "a cancelled single-flight leader hands over to one follower")
+
+    print("Filters (2,000 notes)")
+    workspace = SyntheticWorkspace.with_total_highlights(2000, notes=2000)
+    upstream = MockUpstream(workspace)
+    with use_mock_upstream(upstream):
+        all_notes = fetch_productboard_notes_only(PB_KEY)["notes"]
+        all_pages = upstream.requests["productboard notes"]
+        dates = sorted(n.created for n in all_notes)
+        filters = DataSourceFilters(tags=["Billing"], date_from=dates[len(dates) // 4], date_to=dates[len(dates) // 2])
+        index = ContextIndex({"productboard": {"notes": all_notes}})
+        expected = index.matching_ids(filters) or set()
+        check(
+            [n.id for n in index.notes_matching(filters)] == [n.id for n in all_notes if n.id in expected]
+            and index.count_matching(filters) == (0, len(expected)),
+            "filtered notes and counts from the columnar index agree",
+        )
+
+        upstream.reset_stats()
+        filtered = fetch_productboard_notes_only(PB_KEY, filters=filters)["notes"]
+        check({n.id for n in filtered} == expected and bool(expected), f"notes filtered upstream: {len(filtered)} of {len(all_notes)}")
+        check(upstream.requests["productboard notes"] < all_pages, "filtered fetch downloads fewer pages")
+
+        project_ids = [p["id"] for p in workspace.projects]
+        insights = [i for ins in fetch_insights_for_project_ids(DV_KEY, project_ids).values() for i in ins]
+        since = sorted(i.created for i in insights)[len(insights) // 2]
+        by_project = fetch_insights_for_project_ids(DV_KEY, project_ids, filters=DataSourceFilters(date_from=since))
+        recent = [i for ins in by_project.values() for i in ins]
+        check(
+            {i.id for i in recent} == {i.id for i in insights if i.created >= since},
+            f"highlights filtered upstream by date: {len(recent)} of {len(insights)}",
+        )
+
+    print("Insights paging (one 1,000-highlight project)")
+    workspace = SyntheticWorkspace(projects=1, highlights_per_project=1000)
+    upstream = MockUpstream(workspace)
+    with use_mock_upstream(upstream):
+        index = ContextIndex({"dovetail": {"projects": [{"id": "proj-0", "name": "P0", "insights": []}]}})
+        cursors: dict = {"proj-0": None}
+        first = True
+        while cursors:
+            for pid, (items, next_cursor) in fetch_insight_pages(DV_KEY, cursors).items():
+                index.add_insight_page(pid, items, next_cursor, first_page=first)
+            first = False
+            cursors = {"proj-0": index.insights_cursor("proj-0")} if index.insights_cursor("proj-0") else {}
+        check(len(index.insights_for_project("proj-0")) == 1000, "every highlight reachable via Load more")
+        check(upstream.requests["dovetail highlights"] == 10, "each page fetched once (10 pages of 100)")
+
+    print("Response cache")
+    check(
+        ttl_for(f"{dovetail.DOVETAIL_BASE}/projects/proj-0/highlights") == HTTP_CACHE_TTLS["highlights"],
+        "a nested resource gets its own TTL, not its parent's",
+    )
+    workspace = SyntheticWorkspace(projects=1, highlights_per_project=20)
+    upstream = MockUpstream(workspace)
+    with use_mock_upstream(upstream, cache=True):
+        fetch_insight_pages(DV_KEY, {"proj-0": None})
+        workspace.add_highlight("proj-0", {
+            "id": "hl-fresh", "text": "Added after the first load.", "tags": [],
+            "created_at": "2030-01-01T00:00:00.000Z", "updated_at": "2030-01-01T00:00:00.000Z",
+        })
+        cached = fetch_insight_pages(DV_KEY, {"proj-0": None})["proj-0"][0]
+        refreshed = fetch_insight_pages(DV_KEY, {"proj-0": None}, use_cache=False)["proj-0"][0]
+        check(
+            "hl-fresh" not in {i.id for i in cached} and "hl-fresh" in {i.id for i in refreshed}
+            and upstream.requests["dovetail highlights"] == 2,
+            "a refresh skips the fresh cached page and sees the upstream change",
+        )
+
+    print("Projection")
+    with use_mock_upstream(MockUpstream(SyntheticWorkspace(projects=2, highlights_per_project=50, notes=50))):
+        dropped = ("company", "followers", "createdBy")
+        raw = fetch_productboard_notes_only(PB_KEY)["notes"][0].raw or {}
+        check(raw.get("content") and not any(k in raw for k in dropped), "notes keep used fields, drop company/followers/createdBy")
+        full = fetch_productboard_notes_only(PB_KEY, full_fidelity=True)["notes"][0].raw or {}
+        check(all(k in full for k in dropped), "full_fidelity keeps whole note payloads")
+
+    print("Incremental parse")
+    page = {"page": {"has_more": True, "next_cursor": "c1"}, "data": list(SyntheticWorkspace().highlights("proj-0"))[:20]}
+    body = json.dumps({**page, "links": {"next": "/notes?x=ü"}}, ensure_ascii=False, indent=1).encode("utf-8")
+    same = True
+    for size in (1, 7, 4096):
+        stream = JSONPageStream(body[i:i + size] for i in range(0, len(body), size))
+        same = same and list(stream) == page["data"] and stream.rest == {"page": page["page"], "links": {"next": "/notes?x=ü"}}
+    check(same, "items and top-level fields match json.loads at any chunk size")
+    long_page = {"data": [{**h, "text": h["text"] * 200} for h in page["data"]], "page": page["page"]}
+    chunked = _ChunkedBody(json.dumps(long_page).encode("utf-8"), 4096)
+    with use_mock_upstream():
+        base.set_transports(_ChunkedTransport(chunked))
+        arrived: list[int] = []
+        with base.stream(f"{dovetail.DOVETAIL_BASE}/highlights", use_cache=False) as r:
+            streamed = read_list_page(r, "dovetail/highlights", transform=lambda h: arrived.append(chunked.served) or h)
+    check(
+        len(streamed["data"]) == 20 and arrived[0] < chunked.chunks,
+        f"an uncached page is parsed as it arrives (first item after {arrived[0]} of {chunked.chunks} chunks)",
+    )
+
+    print("Snapshot (2,000 highlights, 200 notes)")
+    with use_mock_upstream(MockUpstream(SyntheticWorkspace.with_total_highlights(2000, notes=200))):
+        context = fetch_context_data(DV_KEY, PB_KEY)
+    context["dovetail"]["projects"][0]["insights_cursor"] = "cursor-1"
+    items = [i for p in context["dovetail"]["projects"] for i in p["insights"]] + context["productboard"]["notes"]
+    raws = {i.raw_key: i.raw for i in items}
+    selections = {
+        "selected_dovetail_insight_ids": [i.id for i in context["dovetail"]["projects"][1]["insights"][:3]],
+        "selected_productboard_product_ids": [n.id for n in context["productboard"]["notes"][:2]],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        path = save_snapshot(context, selections, name="verify", directory=Path(tmp))
+        RAW_STORE.clear()
+        snapshot = load_snapshot(path) if path else None
+        check(
+            snapshot is not None and snapshot.context_data == context and snapshot.selections == selections,
+            "projects, insights, cursors, notes and selections round-trip",
+        )
+        check(all(RAW_STORE.get(k) == v for k, v in raws.items()), "raw payloads round-trip")
+        truncated = Path(tmp) / "truncated.prdsnap"
+        truncated.write_bytes(path.read_bytes()[:-100] if path else b"")
+        check(load_snapshot(truncated) is None, "a truncated snapshot is rejected")
+        empty = {"dovetail": {"projects": []}, "productboard": {"notes": []}}
+        first, second = save_snapshot(empty, directory=Path(tmp)), save_snapshot(empty, directory=Path(tmp))
+        reopened = load_snapshot(first) if first else None
+        check(
+            first is not None and second is not None and first != second and first.exists()
+            and reopened is not None and reopened.saved_at.endswith("Z"),
+            "back-to-back saves with the default name keep both files (UTC saved_at)",
+        )
+    if snapshot is not None:
+        index = ContextIndex(snapshot.context_data)
+        word = items[0].raw["text"].split()[0] if items[0].raw and items[0].raw.get("text") else items[0].title
+        check(("insight", items[0].id) in index.search(word, limit=None), "opened snapshot is searchable")
+        other = ContextIndex(snapshot.context_data)
+        other.search(word)
+        shared = other.search_index is index.search_index
+        other.set_notes(list(other.notes.values())[1:])
+        other.search(word)
+        check(shared and other.search_index is not index.search_index, "sessions over the same data share one search index")
+
+        RAW_STORE.clear()  # every payload evicted
+        selected = index.selected_insight_items(selections["selected_dovetail_insight_ids"])
+        prompt, error, _, _ = build_prompt_from_context(
+            snapshot.context_data, selections["selected_dovetail_insight_ids"], [], PromptConfig()
+        )
+        check(
+            error is None and all(i.summary and i.summary[:40] in prompt for i in selected),
+            "insight text reaches the prompt after its payload is evicted",
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            path = save_snapshot(snapshot.context_data, directory=Path(tmp))
+            reopened = load_snapshot(path) if path else None
+        summaries = lambda ctx: [i.summary for p in ctx["dovetail"]["projects"] for i in p["insights"]] + [
+            n.summary for n in ctx["productboard"]["notes"]
+        ]
+        check(
+            reopened is not None and summaries(reopened.context_data) == summaries(snapshot.context_data)
+            and all(summaries(reopened.context_data)),
+            "a snapshot saved after eviction keeps summaries",
+        )
+
+    print("Pipeline")
+    with use_mock_upstream(MockUpstream(SyntheticWorkspace())):
+        prompt_config = PromptConfig(product_context="Compliance workflows for B2B teams.", business_goals="Grow enterprise.")
+        prompt, error, _, metadata = run_pipeline(
+            APIConfig(dovetail_key=DV_KEY, productboard_key=PB_KEY),
+            prompt_config,
+            selected_dovetail_project_ids=["proj-0", "proj-1"],
+            selected_dovetail_insight_ids=[],
+            selected_productboard_ids=["note-1", "note-2", "feat-3"],
+        )
+        check(error is None and bool(prompt) and metadata is not None, "run_pipeline builds a prompt")
+
+        context = fetch_context_data(DV_KEY, PB_KEY)
+        insight_ids = [i.id for i in context["dovetail"]["projects"][0]["insights"][:3]]
+        note_ids = [n.id for n in context["productboard"]["notes"][:2]]
+        prompt, error, _, _ = build_prompt_from_context(context, insight_ids, note_ids, prompt_config)
+        check(error is None and note_ids[0] in prompt, "build_prompt_from_context builds a prompt")
+
+    upstream = MockUpstream(SyntheticWorkspace(projects=1, highlights_per_project=10, notes=2000))
+    with use_mock_upstream(upstream):
+        _, error, _, metadata = run_pipeline(
+            APIConfig(dovetail_key=DV_KEY, productboard_key=PB_KEY), prompt_config, ["proj-0"], [], []
+        )
+        check(
+            error is None and upstream.requests["productboard notes"] == 1,
+            f"run_pipeline without a Productboard selection lists one notes page ({upstream.requests['productboard notes']})",
+        )
+
+    highlights = list(SyntheticWorkspace().highlights("proj-0"))[:10]
+    words = highlights[3]["text"].split()
+    edited = {**highlights[3], "id": "hl-edited", "text": " ".join(words[:-2] + ["changed"] + words[-1:])}
+    result = build_prompt(dovetail_raw=[*highlights, edited], productboard_raw=[], config=PromptBuilderConfig())
+    check(
+        result.merged_duplicates == {"insights": {highlights[3]["id"]: ["hl-edited"]}, "feedback": {}}
+        and edited["text"] not in result.prompt,
+        "an edited copy of a highlight is merged into it",
+    )
+    quotes = [
+        {"id": f"q-{n}", "title": "Onboarding, Pricing, Enterprise", "body": body}
+        for n, body in enumerate(["Setup took two days", "Setup took two weeks", "too expensive for us", "too expensive for agencies"])
+    ]
+    check(
+        len(normalize_insights(quotes).items) == len(quotes),
+        "short quotes under the same tags are not merged",
+    )
+    note = {"title": "Bulk export", "content": "Export every audit log as CSV."}
+    result = build_prompt(dovetail_raw=[], productboard_raw=[note, dict(note)], config=PromptBuilderConfig())
+    check(
+        result.merged_duplicates["feedback"] == {"(no id) Bulk export": ["(no id) Bulk export"]},
+        "duplicates without ids are reported under a fallback key",
+    )
+
+    filler = [{"id": f"filler-{n}", "text": f"Onboarding tour step {n} was easy to follow."} for n in range(100)]
+    relevant = {"id": "hl-relevant", "text": "Auditors need an export of every compliance approval."}
+    config = PromptBuilderConfig(product_context="Compliance workflows for B2B teams.", business_goals="Pass audits faster.")
+    result = build_prompt(dovetail_raw=[*filler, relevant], productboard_raw=[], config=config)
+    check(relevant["text"] in result.prompt, "a relevant highlight after 100 unrelated ones reaches the prompt")
+    ranked = normalize_insights([*filler, relevant], max_candidates=20, query=config.product_context)
+    check(ranked.items[0].id == "hl-relevant", "ranking covers items past max_candidates")
+
+    workspace = SyntheticWorkspace(projects=2, highlights_per_project=50, notes=50)
+    budgeted = dict(
+        dovetail_raw=[h for p in workspace.projects for h in workspace.highlights(p["id"])],
+        productboard_raw=list(workspace.notes),
+    )
+    result = build_prompt(**budgeted, config=PromptBuilderConfig(product_context="Compliance workflows.", max_tokens=2000))
+    check(
+        0 < result.token_count <= 2000 and result.dropped_for_budget
+        and result.section_tokens["insights"] > 0 and result.section_tokens["feedback"] > 0,
+        f"prompt fits max_tokens: {result.token_count} tokens, {len(result.dropped_for_budget)} item(s) left out",
+    )
+    words = lambda text: len(text.split())
+    result = build_prompt(**budgeted, config=PromptBuilderConfig(max_tokens=2000), count_tokens=words)
+    check(result.token_count == words(result.prompt) <= 2000, "a pluggable token counter sets the budget")
+    # Long texts cost more than their parts: the assembled prompt overshoots and is cut again
+    dense = lambda text: int(words(text) * (1.1 if len(text) > 3000 else 1))
+    result = build_prompt(**budgeted, config=PromptBuilderConfig(max_tokens=2000), count_tokens=dense)
+    check(
+        result.token_count == dense(result.prompt) <= 2000 and not result.budget_warning,
+        "the assembled prompt is re-counted and cut again when over max_tokens",
+    )
+
+    research = "Auditors export approval histories by hand every quarter, " * 12
+    feedback_text = "Customers ask for scheduled compliance reports by email, " * 12
+    full = build_prompt_from_summaries(dovetail_summary=research, productboard_summary=feedback_text, config=PromptBuilderConfig())
+    limit = full.token_count - 120
+    result = build_prompt_from_summaries(
+        dovetail_summary=research, productboard_summary=feedback_text, config=PromptBuilderConfig(max_tokens=limit)
+    )
+    check(
+        result.token_count <= limit and research[:60] in result.prompt and feedback_text[:60] in result.prompt
+        and NO_INSIGHTS not in result.prompt and NO_FEEDBACK not in result.prompt and result.truncated_for_budget,
+        f"over-budget summaries are cut short, not replaced ({result.token_count} of {limit} tokens)",
+    )
+    result = build_prompt_from_summaries(
+        dovetail_summary=research, productboard_summary=feedback_text, config=PromptBuilderConfig(max_tokens=50)
+    )
+    check(
+        bool(result.budget_warning) and research[:60] in result.prompt,
+        "max_tokens below the instructions alone warns and keeps the context",
+    )
+
+    if failures:
+        print(f"FAILED: {len(failures)} check(s)")
+        return 1
+    print("All offline checks passed.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,461 @@
+"""
+Columnar store behind ContextIndex's filters, counts and ordering: one row per insight or
+note, held in parallel columns instead of per-item index sets.
+
+Columns are stdlib arrays (kind; id, project and priority codes into one StringTable;
+created day as YYYYMMDD; tag bitsets, tag_words 64-bit words per row). Queries return row
+masks as Python ints (bit r = row r), so combining filters (&, |) and counting (bit_count)
+run in C. With NumPy installed (and COLUMNAR_NUMPY on), masks are array expressions over
+zero-copy views of the columns; without it, they come from per-value row masks built in
+one pass over a column and cached until the next change.
+
+Removed rows are tombstoned, and re-adding the same id revives its row (keeping its
+position). Tombstones are compacted away once they outnumber live rows.
+"""
+from __future__ import annotations
+
+import bisect
+from array import array
+from itertools import compress
+from typing import Any, Iterable, Optional, Union
+
+from app.config import COLUMNAR_NUMPY
+from core.models import DataSourceFilters
+from services.records import InsightRecord, NoteRecord
+
+try:
+    import numpy as np
+except ImportError:  # stdlib arrays and int bitsets only
+    np = None
+
+INSIGHT, NOTE = 0, 1
+_WORD = (1 << 64) - 1
+_COMPACT_MIN_DEAD = 1024
+_CACHE_MAX = 256
+_BUILD_CACHE_MAX = 100_000
+_BINARY_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
+# Set bit positions of each byte value, for listing the rows of a mask without NumPy
+_BYTE_BITS = [tuple(b for b in range(8) if v >> b & 1) for v in range(256)]
+
+
+def _use_numpy() -> bool:
+    return np is not None and COLUMNAR_NUMPY
+
+
+def day_number(date: str) -> int:
+    """YYYY-MM-DD (or a longer ISO timestamp) as an int YYYYMMDD; 0 if it is not one."""
+    d = (date or "")[:10]
+    if len(d) == 10 and d[4] == "-" and d[7] == "-":
+        digits = d[:4] + d[5:7] + d[8:]
+        if digits.isascii() and digits.isdigit():
+            return int(digits)
+    return 0
+
+
+def mask_from_rows(rows: Iterable[int], n: int) -> int:
+    """Mask with the given rows (all < n) set."""
+    bits = bytearray((n + 7) // 8)
+    for r in rows:
+        bits[r >> 3] |= 1 << (r & 7)
+    return int.from_bytes(bits, "little")
+
+
+def rows_from_mask(mask: int) -> list[int]:
+    """Set rows of mask, ascending."""
+    if mask <= 0:
+        return []
+    data = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+    if _use_numpy():
+        return np.flatnonzero(np.unpackbits(np.frombuffer(data, dtype=np.uint8), bitorder="little")).tolist()
+    rows: list[int] = []
+    for i, byte in enumerate(data):
+        if byte:
+            base = i << 3
+            rows.extend(base + b for b in _BYTE_BITS[byte])
+    return rows
+
+
+def _mask_from_bools(values: Any) -> int:
+    """Mask from a NumPy bool array (one entry per row)."""
+    return int.from_bytes(np.packbits(values, bitorder="little").tobytes(), "little")
+
+
+class StringTable:
+    """Strings <-> dense int codes, shared by the id, project and priority columns."""
+
+    __slots__ = ("strings", "_codes")
+
+    def __init__(self) -> None:
+        self.strings: list[str] = []
+        self._codes: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def code(self, s: str) -> int:
+        """Code for s, adding it if new."""
+        c = self._codes.get(s)
+        if c is None:
+            c = self._codes[s] = len(self.strings)
+            self.strings.append(s)
+        return c
+
+    def get(self, s: str) -> int:
+        """Code for s, or -1 if it was never added."""
+        return self._codes.get(s, -1)
+
+
+class ContextColumns:
+    """
+    Rows of insights (kind INSIGHT, with their project) and notes (kind NOTE), keyed by
+    (kind, id). Records stay with the caller; only the fields filters need are stored.
+    """
+
+    def __init__(self) -> None:
+        self.strings = StringTable()
+        self.kind = array("b")
+        self.ids = array("i")
+        self.project = array("i")  # -1 for notes
+        self.day = array("i")  # YYYYMMDD, 0 if unknown
+        self.priority = array("i")  # -1 if none
+        self.tag_words = 1
+        self.tags = array("Q")  # tag_words per row; bit b of word w is tag code 64 * w + b
+        self.live = bytearray()  # 1 per live row, 0 per tombstone
+        self.tag_codes: dict[str, int] = {}  # lowercased tag -> code
+        self.tag_labels: list[str] = []  # code -> tag as first written
+        self._rows: tuple[dict[str, int], dict[str, int]] = ({}, {})  # per kind: id -> row
+        self._dead = 0
+        self._cache: dict[Any, Any] = {}
+        # Building caches: tag tuple -> tag words, created -> day
+        self._tag_rows: dict[tuple[str, ...], list[int]] = {}
+        self._days: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.kind) - self._dead
+
+    # --- Building ---
+
+    def _tag_row(self, tags: tuple[str, ...]) -> list[int]:
+        """Tag column words for a tag tuple (records share interned tuples, so this is cached)."""
+        row = self._tag_rows.get(tags)
+        if row is None:
+            if len(self._tag_rows) >= _BUILD_CACHE_MAX:
+                self._tag_rows.clear()
+            bits = self._tag_bits(tags)
+            row = self._tag_rows[tags] = [(bits >> (64 * w)) & _WORD for w in range(self.tag_words)]
+        return row
+
+    def _tag_bits(self, tags: Iterable[str]) -> int:
+        bits = 0
+        for label in tags:
+            tag = label.lower()
+            code = self.tag_codes.get(tag)
+            if code is None:
+                code = self.tag_codes[tag] = len(self.tag_labels)
+                self.tag_labels.append(label)
+                if code >= 64 * self.tag_words:
+                    self._widen_tags()
+                    self._tag_rows.clear()
+            bits |= 1 << code
+        return bits
+
+    def _widen_tags(self) -> None:
+        """Double the words per row in the tag column (rare: every 64 distinct tags)."""
+        old, words = self.tags, self.tag_words
+        self.tag_words = words * 2
+        self.tags = array("Q")
+        for r in range(len(self.kind)):
+            self.tags.extend(old[r * words:(r + 1) * words])
+            self.tags.extend([0] * words)
+
+    def add(self, kind: int, item: Union[InsightRecord, NoteRecord], project_id: str = "") -> int:
+        """Add (or replace) the row for item; returns its row."""
+        tag_words = self._tag_row(item.tags)
+        day = self._days.get(item.created)
+        if day is None:
+            if len(self._days) >= _BUILD_CACHE_MAX:
+                self._days.clear()
+            day = self._days[item.created] = day_number(item.created)
+        values = (
+            self.strings.code(item.id),
+            self.strings.code(project_id) if project_id else -1,
+            day,
+            self.strings.code(item.priority) if item.priority else -1,
+        )
+        rows = self._rows[kind]
+        row = rows.get(item.id)
+        if row is None:
+            row = rows[item.id] = len(self.kind)
+            self.kind.append(kind)
+            for column, value in zip((self.ids, self.project, self.day, self.priority), values):
+                column.append(value)
+            self.tags.extend(tag_words)
+            self.live.append(1)
+        else:
+            for column, value in zip((self.ids, self.project, self.day, self.priority), values):
+                column[row] = value
+            self.tags[row * self.tag_words:(row + 1) * self.tag_words] = array("Q", tag_words)
+            if not self.live[row]:
+                self.live[row] = 1
+                self._dead -= 1
+        self._cache.clear()
+        return row
+
+    def extend(self, kind: int, items: Iterable[Union[InsightRecord, NoteRecord]], project_id: str = "") -> None:
+        """add() for each of items, with new rows appended column by column in one pass."""
+        rows, start = self._rows[kind], len(self.kind)
+        new: list[Union[InsightRecord, NoteRecord]] = []
+        for item in items:
+            row = rows.get(item.id)
+            if row is None:
+                rows[item.id] = start + len(new)
+                new.append(item)
+            elif row >= start:
+                new[row - start] = item
+            else:
+                self.add(kind, item, project_id)
+        if not new:
+            return
+        # Register new tags first: widening the tag column while rows are appended would misalign them
+        for tags in dict.fromkeys(item.tags for item in new):
+            self._tag_bits(tags)
+        tag_row, days, code = self._tag_row, self._days, self.strings.code
+        for item in new:
+            if item.created not in days:
+                if len(days) >= _BUILD_CACHE_MAX:
+                    days.clear()
+                days[item.created] = day_number(item.created)
+        self.kind.frombytes(bytes([kind]) * len(new))
+        self.ids.extend([code(item.id) for item in new])
+        self.project.extend([code(project_id) if project_id else -1] * len(new))
+        self.day.extend([days.get(item.created) or day_number(item.created) for item in new])
+        self.priority.extend([code(item.priority) if item.priority else -1 for item in new])
+        for item in new:
+            self.tags.extend(tag_row(item.tags))
+        self.live.extend(b"\x01" * len(new))
+        self._cache.clear()
+
+    def remove(self, kind: int, item_ids: Iterable[str]) -> None:
+        """Tombstone the rows of item_ids (unknown ids ignored)."""
+        rows = self._rows[kind]
+        for item_id in item_ids:
+            row = rows.get(item_id)
+            if row is not None and self.live[row]:
+                self.live[row] = 0
+                self._dead += 1
+        self._cache.clear()
+        if self._dead >= _COMPACT_MIN_DEAD and self._dead > len(self):
+            self.compact()
+
+    def compact(self) -> None:
+        """Drop tombstoned rows (live rows keep their relative order)."""
+        keep = [r for r, alive in enumerate(self.live) if alive]
+        old_strings, words = self.strings.strings, self.tag_words
+        self.strings = StringTable()
+
+        def recode(codes: array) -> array:
+            return array("i", (self.strings.code(old_strings[codes[r]]) if codes[r] >= 0 else -1 for r in keep))
+
+        ids = recode(self.ids)
+        self.project, self.priority = recode(self.project), recode(self.priority)
+        self.ids = ids
+        self.kind = array("b", (self.kind[r] for r in keep))
+        self.day = array("i", (self.day[r] for r in keep))
+        tags = array("Q")
+        for r in keep:
+            tags.extend(self.tags[r * words:(r + 1) * words])
+        self.tags = tags
+        self.live = bytearray(b"\x01" * len(keep))
+        self._rows = ({}, {})
+        for row, (kind, code) in enumerate(zip(self.kind, self.ids)):
+            self._rows[kind][self.strings.strings[code]] = row
+        self._dead = 0
+        self._cache.clear()
+
+    # --- Lookups ---
+
+    def row(self, kind: int, item_id: str) -> Optional[int]:
+        """Row of a live item, or None."""
+        row = self._rows[kind].get(item_id)
+        return row if row is not None and self.live[row] else None
+
+    def item_id(self, row: int) -> str:
+        return self.strings.strings[self.ids[row]]
+
+    def item_ids(self, mask: int) -> list[str]:
+        """Ids of the rows in mask, in row order."""
+        strings, ids = self.strings.strings, self.ids
+        return [strings[ids[r]] for r in rows_from_mask(mask)]
+
+    def in_mask(self, kind: int, item_ids: Iterable[str], mask: int) -> list[str]:
+        """Those of item_ids (order kept) whose rows are in mask."""
+        bits = mask.to_bytes((len(self.kind) + 7) // 8, "little") if mask > 0 else b""
+        rows, out = self._rows[kind], []
+        for item_id in item_ids:
+            r = rows.get(item_id)
+            if r is not None and r >> 3 < len(bits) and bits[r >> 3] >> (r & 7) & 1:
+                out.append(item_id)
+        return out
+
+    def ordered(self, kind: int, item_ids: Iterable[str]) -> list[str]:
+        """The live ones of item_ids, in row order."""
+        rows = self._rows[kind]
+        found = [r for r in map(rows.get, item_ids) if r is not None]
+        return self.item_ids(mask_from_rows(found, len(self.kind)) & self.live_mask())
+
+    # --- Masks (live rows only) ---
+
+    def _cached(self, key: Any, build: Any) -> Any:
+        value = self._cache.get(key)
+        if value is None:
+            value = self._cache[key] = build()
+        return value
+
+    def _view(self, column: array) -> Any:
+        return np.frombuffer(column, dtype=column.typecode)
+
+    def live_mask(self) -> int:
+        def build() -> int:
+            if _use_numpy():
+                return _mask_from_bools(np.frombuffer(self.live, dtype=np.uint8).astype(bool))
+            # live holds 0/1 bytes: as a reversed "0"/"1" string it is the mask in base 2
+            return int(self.live[::-1].translate(_BINARY_DIGITS), 2)
+        return self._cached("live", build) if self.kind else 0
+
+    def _live_rows(self) -> Iterable[int]:
+        return compress(range(len(self.live)), self.live)
+
+    def _value_masks(self, name: str) -> dict[int, int]:
+        """code -> mask of live rows holding it, for the kind/project/priority column (stdlib path)."""
+        def build() -> dict[int, int]:
+            rows: dict[int, list[int]] = {}
+            column = getattr(self, name)
+            for r in self._live_rows():
+                rows.setdefault(column[r], []).append(r)
+            n = len(self.kind)
+            return {value: mask_from_rows(rs, n) for value, rs in rows.items()}
+        return self._cached(("values", name), build)
+
+    def _equal_mask(self, name: str, value: int) -> int:
+        if not self.kind:
+            return 0
+        if _use_numpy():
+            return _mask_from_bools(self._view(getattr(self, name)) == value) & self.live_mask()
+        return self._value_masks(name).get(value, 0)
+
+    def kind_mask(self, kind: int) -> int:
+        def build() -> int:
+            # kind holds 0/1 bytes, read as base-2 digits like live
+            notes = int(self.kind.tobytes()[::-1].translate(_BINARY_DIGITS), 2) & self.live_mask()
+            return notes if kind == NOTE else self.live_mask() & ~notes
+        return self._cached(("kind", kind), build) if self.kind else 0
+
+    def project_mask(self, project_id: str) -> int:
+        code = self.strings.get(project_id)
+        return self._equal_mask("project", code) if code >= 0 else 0
+
+    def priority_mask(self, priority: str) -> int:
+        code = self.strings.get(priority.strip().lower())
+        return self._equal_mask("priority", code) if code >= 0 else 0
+
+    def _tag_masks(self) -> dict[int, int]:
+        """tag code -> mask of live rows carrying it (stdlib path)."""
+        def build() -> dict[int, int]:
+            # Rows grouped by tag combination first: most rows share a handful of them
+            by_combo: dict[Any, list[int]] = {}
+            tags, words = self.tags, self.tag_words
+            for r in self._live_rows():
+                combo = tags[r] if words == 1 else tuple(tags[r * words:(r + 1) * words])
+                if combo:
+                    by_combo.setdefault(combo, []).append(r)
+            masks: dict[int, int] = {}
+            n = len(self.kind)
+            for combo, rows in by_combo.items():
+                rows_mask = mask_from_rows(rows, n)
+                bits = combo if words == 1 else sum(w << (64 * i) for i, w in enumerate(combo))
+                while bits:
+                    low = bits & -bits
+                    code = low.bit_length() - 1
+                    masks[code] = masks.get(code, 0) | rows_mask
+                    bits ^= low
+            return masks
+        return self._cached("tags", build)
+
+    def tag_mask(self, tags: Iterable[str]) -> int:
+        """Rows carrying any of tags (case-insensitive)."""
+        codes = {c for c in (self.tag_codes.get(t.strip().lower()) for t in tags) if c is not None}
+        if not codes or not self.kind:
+            return 0
+        if _use_numpy():
+            query = np.zeros(self.tag_words, dtype=np.uint64)
+            for c in codes:
+                query[c // 64] |= np.uint64(1 << (c % 64))
+            table = self._view(self.tags).reshape(-1, self.tag_words)
+            return _mask_from_bools((table & query).any(axis=1)) & self.live_mask()
+        masks = self._tag_masks()
+        mask = 0
+        for c in codes:
+            mask |= masks.get(c, 0)
+        return mask
+
+    def day_mask(self, date_from: str = "", date_to: str = "") -> int:
+        """Rows created within [date_from, date_to] (YYYY-MM-DD, either bound optional)."""
+        lo, hi = day_number(date_from) or 1, day_number(date_to) or 99999999
+        if not self.kind:
+            return 0
+        if _use_numpy():
+            days = self._view(self.day)
+            return _mask_from_bools((days >= lo) & (days <= hi)) & self.live_mask()
+
+        def build() -> tuple[array, array]:
+            day = self.day
+            rows = array("i", sorted((r for r in self._live_rows() if day[r]), key=day.__getitem__))
+            return array("i", (day[r] for r in rows)), rows
+        days, rows = self._cached("by_day", build)
+        return mask_from_rows(rows[bisect.bisect_left(days, lo):bisect.bisect_right(days, hi)], len(self.kind))
+
+    def filter_mask(self, filters: Optional[DataSourceFilters]) -> Optional[int]:
+        """Rows passing filters (any of the tags, date range, priority); None when no filter is active."""
+        if filters is None or not filters.is_active():
+            return None
+
+        def build() -> int:
+            mask = self.live_mask()
+            if filters.tags:
+                mask &= self.tag_mask(filters.tags)
+            if filters.priority:
+                mask &= self.priority_mask(filters.priority)
+            if filters.date_from or filters.date_to:
+                mask &= self.day_mask(filters.date_from, filters.date_to)
+            return mask
+        # Cached: a Step 2 rerun applies the same filters once per project
+        if len(self._cache) >= _CACHE_MAX:
+            self._cache.clear()
+        key = ("filters", tuple(sorted(t.strip().lower() for t in filters.tags)), filters.date_from, filters.date_to, filters.priority.strip().lower())
+        return self._cached(key, build)
+
+    # --- Facets ---
+
+    def tag_counts(self) -> dict[str, int]:
+        """Live rows per tag (as first written), tags on no live row left out."""
+        if not self.kind:
+            return {}
+        if _use_numpy():
+            table = self._view(self.tags).reshape(-1, self.tag_words)
+            live = np.frombuffer(self.live, dtype=np.uint8).astype(bool)
+            counts = {}
+            for code, label in enumerate(self.tag_labels):
+                n = int(((table[live, code // 64] >> np.uint64(code % 64)) & np.uint64(1)).sum())
+                if n:
+                    counts[label] = n
+            return counts
+        return {self.tag_labels[c]: m.bit_count() for c, m in self._tag_masks().items() if m}
+
+    def priority_names(self) -> list[str]:
+        """Priorities on live rows, sorted."""
+        if not self.kind:
+            return []
+        if _use_numpy():
+            codes = np.unique(self._view(self.priority)[np.frombuffer(self.live, dtype=np.uint8).astype(bool)])
+            return sorted(self.strings.strings[c] for c in codes.tolist() if c >= 0)
+        return sorted(self.strings.strings[c] for c, m in self._value_masks("priority").items() if c >= 0 and m)
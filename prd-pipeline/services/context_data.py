@@ -4,59 +4,45 @@ with a unified normalized structure. API logic is separate from UI.
 """
 from __future__ import annotations
 
+import hashlib
 import logging
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Any
-
-from api import dovetail, productboard
+from typing import Any, Callable, Iterable, Iterator, Optional, Union
+
+from api import dovetail, dovetail_async, productboard
+from app.config import SEARCH_RESULT_LIMIT
+from app.run_async import run_async
+from core.models import DataSourceFilters
+from services.columnar import INSIGHT, NOTE, ContextColumns
+from services.extractors import HighlightExtractor
+from services.records import (
+    RAW_STORE,
+    InsightRecord,
+    NoteRecord,
+    intern_tags,
+    raw_body,
+    raw_date,
+    raw_priority,
+    raw_summary,
+)
+from services.search_index import SHARED_INDEXES, SearchHit, SearchIndex, highlight
 
 logger = logging.getLogger(__name__)
 
-
-def _project_id_from_insight(insight: dict[str, Any]) -> str | None:
-    """Extract project_id from an insight (may be in project.id, project_id, or relationships)."""
-    pid = insight.get("project_id")
-    if pid is not None and str(pid).strip():
-        return str(pid).strip()
-    proj = insight.get("project")
-    if isinstance(proj, dict) and proj.get("id") is not None:
-        return str(proj["id"]).strip()
-    if isinstance(proj, str) and proj.strip():
-        return proj.strip()
-    rel = insight.get("relationships") or {}
-    proj_rel = (rel.get("project") or {}).get("data") if isinstance(rel.get("project"), dict) else None
-    if isinstance(proj_rel, dict) and proj_rel.get("id"):
-        return str(proj_rel["id"]).strip()
-    attrs = insight.get("attributes") or {}
-    if attrs.get("project_id"):
-        return str(attrs["project_id"]).strip()
-    return None
-
-
-def _insight_summary(insight: dict[str, Any], max_len: int = 300) -> str:
-    """Derive a short summary from insight body/content/text."""
-    for key in ("body", "content", "text", "summary", "description"):
-        val = insight.get(key)
-        if val and isinstance(val, str) and val.strip():
-            s = " ".join(val.split())
-            return s[:max_len] + ("..." if len(s) > max_len else "")
-    return ""
+ContextItem = Union[InsightRecord, NoteRecord]
 
 
 def _normalize_dovetail(projects: list[dict], insights: list[dict]) -> dict[str, Any]:
     """Group insights by project_id and attach to projects. Returns dovetail part of context."""
-    pid_to_insights: dict[str, list[dict[str, Any]]] = {}
+    pid_to_insights: dict[str, list[InsightRecord]] = {}
+    extractor = HighlightExtractor(title_from_tags=False)
     for ins in insights:
         if not isinstance(ins, dict):
             continue
-        pid = _project_id_from_insight(ins)
+        pid = extractor.project_id(ins)
         if not pid:
             continue
-        pid_to_insights.setdefault(pid, []).append({
-            "id": str(ins.get("id", "")),
-            "title": (ins.get("title") or ins.get("name") or "(No title)").strip(),
-            "summary": _insight_summary(ins),
-        })
+        pid_to_insights.setdefault(pid, []).append(extractor.record(ins))
     project_list: list[dict[str, Any]] = []
     seen_ids: set[str] = set()
     for p in projects:
@@ -98,65 +84,350 @@ def _normalize_productboard(products: list[dict]) -> dict[str, Any]:
     return {"products": out}
 
 
+def _normalize_note(n: dict[str, Any]) -> Optional[NoteRecord]:
+    """NoteRecord for a raw Productboard note (None without an id); the payload goes to RAW_STORE."""
+    nid = n.get("id")
+    if nid is None:
+        return None
+    name = (n.get("title") or n.get("name") or "")
+    if not name and n.get("content"):
+        raw = n["content"]
+        if isinstance(raw, str):
+            name = raw[:80].strip() + ("..." if len(raw) > 80 else "")
+        elif isinstance(raw, dict) and raw.get("body"):
+            name = str(raw["body"])[:80].strip() + ("..." if len(str(raw.get("body", ""))) > 80 else "")
+    name = (name or str(nid)).strip()
+    return NoteRecord(
+        id=str(nid),
+        name=name,
+        tags=intern_tags(n.get("tags")),
+        created=raw_date(n),
+        priority=raw_priority(n),
+        raw_key=RAW_STORE.put(n),
+        summary=raw_summary(n),
+    )
+
+
 def _normalize_notes(notes: list[dict]) -> dict[str, Any]:
-    """Normalize Productboard notes to { id, name, raw } for list display and JSON view."""
+    """Normalize Productboard notes to NoteRecords (raw payload in RAW_STORE for the JSON view)."""
     out = []
     for n in notes:
-        if not isinstance(n, dict):
-            continue
-        nid = n.get("id")
-        if nid is None:
-            continue
-        name = (n.get("title") or n.get("name") or "")
-        if not name and n.get("content"):
-            raw = n["content"]
-            if isinstance(raw, str):
-                name = raw[:80].strip() + ("..." if len(raw) > 80 else "")
-            elif isinstance(raw, dict) and raw.get("body"):
-                name = str(raw["body"])[:80].strip() + ("..." if len(str(raw.get("body", ""))) > 80 else "")
-        name = (name or str(nid)).strip()
-        out.append({"id": str(nid), "name": name, "raw": dict(n)})
+        if isinstance(n, dict) and (record := _normalize_note(n)) is not None:
+            out.append(record)
     return {"notes": out}
 
 
-def _normalize_insights_for_project(raw_insights: list[dict]) -> list[dict[str, Any]]:
-    """Convert raw insight/highlight dicts to { id, title, summary, raw }.
-    Title is from tags[].title joined (e.g. "General cost, Utilization") or truncated text if no tags.
+def _normalize_insights_for_project(raw_insights: list[dict]) -> list[InsightRecord]:
+    """Convert raw insight/highlight dicts to InsightRecords (title from tags, else text)."""
+    record = HighlightExtractor().record
+    return [record(ins) for ins in raw_insights if isinstance(ins, dict)]
+
+
+def _search_fields(item: ContextItem) -> dict[str, str]:
+    """Searchable text of an insight/note record: title, tags and raw body (or summary)."""
+    raw = item.raw or {}
+    body = raw_body(raw)
+    return {
+        "title": item.title if isinstance(item, InsightRecord) else item.name,
+        # The summary is a truncated copy of the body; index it only when there is no body
+        # (or the payload was evicted from RAW_STORE)
+        "summary": "" if body else item.summary,
+        "tags": " ".join(item.tags),
+        "content": body,
+    }
+
+
+def highlight_filter_params(filters: Optional[DataSourceFilters]) -> dict[str, Any]:
+    """The part of filters Dovetail can apply server-side (created_at range)."""
+    if filters is None:
+        return {}
+    return dovetail.highlight_filter_params(filters.date_from, filters.date_to)
+
+
+def note_filter_params(filters: Optional[DataSourceFilters]) -> dict[str, Any]:
+    """The part of filters Productboard can apply server-side (createdFrom/createdTo, anyTag)."""
+    if filters is None:
+        return {}
+    return productboard.note_filter_params(filters.date_from, filters.date_to, filters.tags)
+
+
+class ContextIndex:
     """
-    out = []
-    for ins in raw_insights:
-        if not isinstance(ins, dict):
-            continue
-        tags = ins.get("tags")
-        if isinstance(tags, list) and tags:
-            titles = []
-            for t in tags:
-                if isinstance(t, dict) and t.get("title"):
-                    titles.append(str(t["title"]).strip())
-            if titles:
-                title = ", ".join(titles)
-            else:
-                text = (ins.get("text") or ins.get("title") or ins.get("name") or "")
-                title = (text.strip()[:100] + "...") if isinstance(text, str) and len(text.strip()) > 100 else (text.strip() or "(No title)")
+    Indexed view over a context_data tree: id -> item maps, project -> insight adjacency,
+    a columnar store for tag / date / priority filters and facets (services.columnar), a
+    full-text SearchIndex, and set-based selection. Items are the same records as in the
+    tree (no copies), so the tree stays the source of truth for display. Lookups and
+    selection changes are O(1); filters and counts are row-mask operations over the columns.
+    The SearchIndex is built on the first search, not as items are indexed (tokenizing every
+    body is most of the build, and many sessions never search), and comes from SHARED_INDEXES
+    by a fingerprint of the loaded projects, insights and notes: sessions over the same data
+    share one index. After the loaded data changes, the next search builds (or finds) the
+    index for the new data.
+    """
+
+    def __init__(self, context_data: Optional[dict[str, Any]] = None) -> None:
+        self.projects: dict[str, dict[str, Any]] = {}
+        self.insights: dict[str, InsightRecord] = {}
+        self.notes: dict[str, NoteRecord] = {}
+        self.project_insights: dict[str, list[str]] = {}
+        self.insight_project: dict[str, str] = {}
+        # Tags, created day and priority of every insight and note, one row each in tree order
+        self.columns = ContextColumns()
+        # Full-text index (shared, read-only); doc ids are "<kind>:<id>" (kinds: project, insight, note)
+        self.search_index: Optional[SearchIndex] = None
+        # search_index no longer matches the loaded data
+        self._search_stale = True
+        # Selection state
+        self.selected_insights: set[str] = set()
+        self.selected_notes: set[str] = set()
+        self._selected_per_project: dict[str, int] = {}
+        if context_data:
+            for proj in (context_data.get("dovetail") or {}).get("projects") or []:
+                self.add_project(proj)
+            self.set_notes((context_data.get("productboard") or {}).get("notes") or [])
+
+    # --- Building ---
+
+    def set_projects(self, projects: list[dict[str, Any]]) -> None:
+        """Replace all projects and their insights (e.g. after Fetch Dovetail). Selections are kept."""
+        self.columns.remove(INSIGHT, self.insights)
+        self._search_stale = True
+        self.projects, self.insights, self.project_insights, self.insight_project = {}, {}, {}, {}
+        self._selected_per_project = {}
+        for proj in projects:
+            self.add_project(proj)
+
+    def add_project(self, project: dict[str, Any]) -> None:
+        """Index a project dict and its insights (replacing any previous entry for its id)."""
+        pid = str(project.get("id", ""))
+        if not pid:
+            return
+        self.projects[pid] = project
+        self._search_stale = True
+        self.set_project_insights(pid, project.get("insights") or [])
+
+    def set_project_insights(self, project_id: str, insights: list[InsightRecord]) -> None:
+        """Replace a project's insights (e.g. after Load insights). Keeps selections that still exist."""
+        removed: list[str] = []
+        for iid in self.project_insights.pop(project_id, []):
+            self.insight_project.pop(iid, None)
+            if self.insights.pop(iid, None) is not None:
+                removed.append(iid)
+                self._search_stale = True
+        self.columns.remove(INSIGHT, removed)
+        self._selected_per_project.pop(project_id, None)
+        self.project_insights[project_id] = []
+        self.columns.extend(INSIGHT, [ins for ins in insights if self._add_insight(project_id, ins)], project_id)
+        if project_id in self.projects:
+            self.projects[project_id]["insights"] = insights
+
+    def append_project_insights(self, project_id: str, insights: list[InsightRecord]) -> list[InsightRecord]:
+        """Add another page of a project's insights, skipping ids already loaded. Returns the new ones."""
+        added = [ins for ins in insights if self._add_insight(project_id, ins)]
+        self.columns.extend(INSIGHT, added, project_id)
+        if project_id in self.projects:
+            self.projects[project_id].setdefault("insights", []).extend(added)
+        return added
+
+    def _add_insight(self, project_id: str, ins: InsightRecord) -> bool:
+        iid = ins.id
+        if not iid or iid in self.insights:
+            return False
+        self.insights[iid] = ins
+        self.insight_project[iid] = project_id
+        self.project_insights.setdefault(project_id, []).append(iid)
+        self._search_stale = True
+        if iid in self.selected_insights:
+            self._selected_per_project[project_id] = self._selected_per_project.get(project_id, 0) + 1
+        return True
+
+    def add_insight_page(
+        self,
+        project_id: str,
+        insights: list[InsightRecord],
+        next_cursor: Optional[str],
+        first_page: bool = False,
+    ) -> None:
+        """
+        Apply one fetched page of a project's insights and remember where to resume.
+        first_page replaces what was loaded; later pages append. The cursor lives on the
+        project dict in the tree ("insights_cursor"), so it survives reruns with context_data.
+        """
+        if first_page:
+            self.set_project_insights(project_id, insights)
         else:
-            text = (ins.get("text") or ins.get("title") or ins.get("name") or "")
-            title = (text.strip()[:100] + "...") if isinstance(text, str) and len(text.strip()) > 100 else (text.strip() or "(No title)")
-        out.append({
-            "id": str(ins.get("id", "")),
-            "title": title,
-            "summary": _insight_summary(ins),
-            "raw": dict(ins),  # full API response for "View full data"
-        })
-    return out
+            self.append_project_insights(project_id, insights)
+        if project_id in self.projects:
+            self.projects[project_id]["insights_cursor"] = next_cursor
+
+    def insights_cursor(self, project_id: str) -> Optional[str]:
+        """Cursor for the project's next insights page, or None when fully loaded (or never loaded)."""
+        return (self.projects.get(project_id) or {}).get("insights_cursor")
+
+    def set_notes(self, notes: list[NoteRecord]) -> None:
+        """Replace all notes (e.g. after Fetch Productboard)."""
+        self.columns.remove(NOTE, self.notes)
+        self.notes = {}
+        for n in notes:
+            nid = n.id
+            if nid and nid not in self.notes:
+                self.notes[nid] = n
+        self.columns.extend(NOTE, self.notes.values())
+        self._search_stale = True
+
+    def _search_key(self) -> str:
+        """Fingerprint of the searchable data: project names and insight/note payload keys."""
+        entries = [f"p{pid}\x00{p.get('name') or ''}" for pid, p in self.projects.items()]
+        entries += [f"i{iid}\x00{ins.raw_key or ins.title}" for iid, ins in self.insights.items()]
+        entries += [f"n{nid}\x00{n.raw_key or n.name}" for nid, n in self.notes.items()]
+        entries.sort()
+        return hashlib.sha1("\x01".join(entries).encode("utf-8", "surrogatepass")).hexdigest()
+
+    def _build_search_index(self) -> SearchIndex:
+        index = SearchIndex()
+        for pid, project in self.projects.items():
+            index.add(f"project:{pid}", "project", {"title": str(project.get("name") or "")})
+        for iid, ins in self.insights.items():
+            index.add(f"insight:{iid}", "insight", _search_fields(ins))
+        for nid, note in self.notes.items():
+            index.add(f"note:{nid}", "note", _search_fields(note))
+        return index
+
+    def _current_search_index(self) -> SearchIndex:
+        """The shared SearchIndex for the loaded data (built on first use)."""
+        if self._search_stale or self.search_index is None:
+            self.search_index = SHARED_INDEXES.get(self._search_key(), self._build_search_index)
+            self._search_stale = False
+        return self.search_index
+
+    # --- Lookups ---
+
+    def insights_for_project(
+        self, project_id: str, filters: Optional[DataSourceFilters] = None
+    ) -> list[InsightRecord]:
+        """The project's insights in load order; with active filters, only those passing them."""
+        ids = self.project_insights.get(project_id, [])
+        mask = self.columns.filter_mask(filters)
+        if mask is not None:
+            ids = self.columns.in_mask(INSIGHT, ids, mask)
+        return [self.insights[i] for i in ids]
+
+    def notes_matching(self, filters: Optional[DataSourceFilters] = None) -> list[NoteRecord]:
+        """Notes passing filters (all notes when none is active), in tree order."""
+        mask = self.columns.filter_mask(filters)
+        if mask is None:
+            return list(self.notes.values())
+        return [self.notes[i] for i in self.columns.item_ids(mask & self.columns.kind_mask(NOTE))]
+
+    def with_tag(self, tag: str) -> set[str]:
+        """Insight and note ids carrying tag (case-insensitive)."""
+        return set(self.columns.item_ids(self.columns.tag_mask([tag])))
+
+    def between(self, date_from: str = "", date_to: str = "") -> list[str]:
+        """Insight and note ids created within [date_from, date_to] (YYYY-MM-DD, either bound optional)."""
+        return self.columns.item_ids(self.columns.day_mask(date_from, date_to))
+
+    def matching_ids(self, filters: Optional[DataSourceFilters]) -> Optional[set[str]]:
+        """
+        Insight and note ids passing filters (any of the tags, created within the date range,
+        priority). None when no filter is active.
+        """
+        mask = self.columns.filter_mask(filters)
+        return None if mask is None else set(self.columns.item_ids(mask))
+
+    def count_matching(self, filters: Optional[DataSourceFilters]) -> tuple[int, int]:
+        """(insights, notes) passing filters; all of them when no filter is active."""
+        mask = self.columns.filter_mask(filters)
+        if mask is None:
+            return len(self.insights), len(self.notes)
+        return (mask & self.columns.kind_mask(INSIGHT)).bit_count(), (mask & self.columns.kind_mask(NOTE)).bit_count()
+
+    def tag_names(self) -> list[str]:
+        """Indexed tags as written, most used first (facet options)."""
+        counts = self.columns.tag_counts()
+        return sorted(counts, key=lambda t: (-counts[t], t.lower()))
+
+    def priority_names(self) -> list[str]:
+        return self.columns.priority_names()
+
+    def search(
+        self,
+        query: str,
+        kinds: Iterable[str] = ("project", "insight", "note"),
+        limit: Optional[int] = SEARCH_RESULT_LIMIT,
+    ) -> list[tuple[str, str]]:
+        """Ranked (kind, id) full-text matches over titles, summaries, tags and raw content."""
+        hits: list[SearchHit] = self._current_search_index().search(query, kinds=kinds, limit=limit)
+        return [(h.kind, h.doc_id.split(":", 1)[1]) for h in hits]
+
+    def snippet(self, kind: str, item_id: str, query: str, max_len: int = 200) -> str:
+        """Body text of an insight/note around its first match for query, matches in bold."""
+        item = (self.insights if kind == "insight" else self.notes).get(item_id)
+        if item is None:
+            return ""
+        fields = _search_fields(item)
+        return highlight(fields["content"] or fields["summary"], query, max_len=max_len)
+
+    # --- Selection ---
+
+    def select_insight(self, insight_id: str, selected: bool = True) -> None:
+        iid = str(insight_id)
+        if selected == (iid in self.selected_insights):
+            return
+        pid = self.insight_project.get(iid)
+        if selected:
+            self.selected_insights.add(iid)
+            if pid is not None:
+                self._selected_per_project[pid] = self._selected_per_project.get(pid, 0) + 1
+        else:
+            self.selected_insights.discard(iid)
+            if pid is not None:
+                remaining = self._selected_per_project.get(pid, 0) - 1
+                if remaining > 0:
+                    self._selected_per_project[pid] = remaining
+                else:
+                    self._selected_per_project.pop(pid, None)
+
+    def select_note(self, note_id: str, selected: bool = True) -> None:
+        if selected:
+            self.selected_notes.add(str(note_id))
+        else:
+            self.selected_notes.discard(str(note_id))
+
+    def set_selection(self, insight_ids: Iterable[str] = (), note_ids: Iterable[str] = ()) -> None:
+        """Replace both selections (e.g. restored from session state)."""
+        for iid in list(self.selected_insights):
+            self.select_insight(iid, False)
+        for iid in insight_ids:
+            self.select_insight(iid)
+        self.selected_notes = {str(n) for n in note_ids}
+
+    def selected_project_ids(self) -> list[str]:
+        """Projects with at least one selected insight."""
+        return list(self._selected_per_project)
+
+    def selected_insight_items(self, insight_ids: Optional[Iterable[str]] = None) -> list[InsightRecord]:
+        """Selected (or given) insights that exist in the index, in tree order."""
+        ids = self.selected_insights if insight_ids is None else set(map(str, insight_ids))
+        return [self.insights[i] for i in self.columns.ordered(INSIGHT, ids)]
 
+    def note_items(self, note_ids: Iterable[str]) -> list[NoteRecord]:
+        """Notes for note_ids (unknown ids skipped), in tree order."""
+        return [self.notes[i] for i in self.columns.ordered(NOTE, note_ids)]
 
-def fetch_dovetail_projects_only(dovetail_key: str) -> dict[str, Any]:
+    def selected_note_items(self, note_ids: Optional[Iterable[str]] = None) -> list[NoteRecord]:
+        """Selected (or given) notes that exist in the index, in tree order."""
+        return self.note_items(self.selected_notes if note_ids is None else set(map(str, note_ids)))
+
+
+def fetch_dovetail_projects_only(dovetail_key: str, use_cache: bool = True) -> dict[str, Any]:
     """
     Fetch only Dovetail projects (no insights). Returns dovetail slice for context_data.
+    use_cache=False re-downloads instead of reading the response cache (Step 2 Refresh).
     """
     if not (dovetail_key or "").strip():
         return {"projects": []}
-    raw = dovetail.get_projects(dovetail_key)
+    raw = dovetail.get_projects(dovetail_key, use_cache=use_cache)
     project_list: list[dict[str, Any]] = []
     for p in raw:
         if not isinstance(p, dict):
@@ -169,27 +440,64 @@ def fetch_dovetail_projects_only(dovetail_key: str) -> dict[str, Any]:
     return {"projects": project_list}
 
 
-def fetch_productboard_notes_only(productboard_key: str) -> dict[str, Any]:
+def iter_productboard_notes(
+    productboard_key: str,
+    filters: Optional[DataSourceFilters] = None,
+    full_fidelity: bool = False,
+    use_cache: bool = True,
+) -> Iterator[list[NoteRecord]]:
     """
-    Fetch only Productboard notes. Returns productboard slice for context_data.
+    Yield Productboard NoteRecords one upstream page at a time, so callers can
+    render progress before the last page lands. Date range and tags in filters are
+    applied upstream; everything else is left to ContextIndex.matching_ids.
+    full_fidelity keeps whole note payloads (e.g. company, followers) for the prompt.
+    use_cache=False skips the response cache.
     """
     if not (productboard_key or "").strip():
-        return {"notes": []}
-    raw = productboard.get_notes(productboard_key)
-    return _normalize_notes(raw)
-
-
-def fetch_projects_and_products_only(dovetail_key: str, productboard_key: str) -> dict[str, Any]:
+        return
+    # Each note becomes a NoteRecord as it is parsed, so a page never exists as dicts
+    yield from productboard.iter_notes(
+        productboard_key, note_filter_params(filters), full_fidelity, transform=_normalize_note, use_cache=use_cache
+    )
+
+
+def fetch_productboard_notes_only(
+    productboard_key: str,
+    on_page: Optional[Callable[[int], None]] = None,
+    filters: Optional[DataSourceFilters] = None,
+    full_fidelity: bool = False,
+    use_cache: bool = True,
+) -> dict[str, Any]:
+    """
+    Fetch only Productboard notes (all pages). Returns productboard slice for context_data.
+    on_page, if given, is called with the running note count after each page.
+    filters narrow the download where Productboard supports it (see iter_productboard_notes).
+    use_cache=False re-downloads instead of reading the response cache (Step 2 Refresh).
+    """
+    notes: list[NoteRecord] = []
+    for page in iter_productboard_notes(productboard_key, filters, full_fidelity, use_cache):
+        notes.extend(page)
+        if on_page:
+            on_page(len(notes))
+    return {"notes": notes}
+
+
+def fetch_projects_and_products_only(
+    dovetail_key: str,
+    productboard_key: str,
+    filters: Optional[DataSourceFilters] = None,
+) -> dict[str, Any]:
     """
     Fetch only Dovetail projects and Productboard notes (no insights).
     Use this for initial Step 2 load; then call fetch_insights_for_project_ids for selected projects.
+    filters narrow the notes download where Productboard supports it.
     """
     result: dict[str, Any] = {
         "dovetail": {"projects": []},
         "productboard": {"notes": []},
     }
     projects: list[dict] = []
-    notes: list[dict] = []
+    notes: list[NoteRecord] = []
 
     def fetch_projects() -> None:
         nonlocal projects
@@ -198,8 +506,7 @@ def fetch_projects_and_products_only(dovetail_key: str, productboard_key: str) -
 
     def fetch_notes() -> None:
         nonlocal notes
-        if productboard_key and productboard_key.strip():
-            notes = productboard.get_notes(productboard_key)
+        notes = [n for page in iter_productboard_notes(productboard_key, filters) for n in page]
 
     with ThreadPoolExecutor(max_workers=2) as executor:
         futures = [
@@ -223,19 +530,24 @@ def fetch_projects_and_products_only(dovetail_key: str, productboard_key: str) -
         name = (p.get("name") or p.get("title") or pid).strip()
         project_list.append({"id": pid, "name": name, "insights": []})
     result["dovetail"] = {"projects": project_list}
-    result["productboard"] = _normalize_notes(notes)
+    result["productboard"] = {"notes": notes}
     return result
 
 
-def fetch_insights_for_project_ids(dovetail_key: str, project_ids: list[str]) -> dict[str, list[dict[str, Any]]]:
+def fetch_insights_for_project_ids(
+    dovetail_key: str,
+    project_ids: list[str],
+    filters: Optional[DataSourceFilters] = None,
+) -> dict[str, list[InsightRecord]]:
     """
-    Fetch highlights/insights only for the given Dovetail project IDs (in parallel).
-    Returns mapping project_id -> list of normalized insights { id, title, summary }.
+    Fetch highlights/insights only for the given Dovetail project IDs (concurrently, on one event loop).
+    The date range in filters is applied upstream; tags and priority are left to ContextIndex.matching_ids.
+    Returns mapping project_id -> list of InsightRecords.
     """
     if not dovetail_key or not dovetail_key.strip() or not project_ids:
         return {}
 
-    result: dict[str, list[dict[str, Any]]] = {}
+    result: dict[str, list[InsightRecord]] = {}
     # Deduplicate so we never fetch the same project twice
     seen: set[str] = set()
     unique_ids: list[str] = []
@@ -246,28 +558,59 @@ def fetch_insights_for_project_ids(dovetail_key: str, project_ids: list[str]) ->
             unique_ids.append(p)
     project_ids = unique_ids
 
-    def fetch_one(pid: str) -> tuple[str, list[dict[str, Any]]]:
-        raw = dovetail.get_insights(dovetail_key, project_id=pid)
-        return pid, _normalize_insights_for_project(raw)
-
-    with ThreadPoolExecutor(max_workers=min(len(project_ids), 5)) as executor:
-        future_to_pid = {executor.submit(fetch_one, pid): pid for pid in project_ids}
-        for f in as_completed(future_to_pid):
-            pid = future_to_pid[f]
-            try:
-                _, insights = f.result()
-                result[pid] = insights
-            except Exception as e:
-                logger.warning("Fetch insights for project %s failed: %s", pid, e)
-                result[pid] = []
+    try:
+        # Highlights are normalized into InsightRecords as each page is parsed
+        by_project = run_async(
+            dovetail_async.get_insights_for_projects(
+                dovetail_key, project_ids, filters=highlight_filter_params(filters), transform=HighlightExtractor().record
+            )
+        )
+    except Exception as e:
+        logger.warning("Fetch insights for projects %s failed: %s", project_ids, e)
+        by_project = {}
+    for pid in project_ids:
+        result[pid] = by_project.get(pid) or []
 
     return result
 
 
-def fetch_context_data(dovetail_key: str, productboard_key: str) -> dict[str, Any]:
+def fetch_insight_pages(
+    dovetail_key: str,
+    cursors: dict[str, Optional[str]],
+    filters: Optional[DataSourceFilters] = None,
+    use_cache: bool = True,
+) -> dict[str, tuple[list[InsightRecord], Optional[str]]]:
+    """
+    Fetch the next insights page for each project in cursors (project_id -> resume cursor,
+    None for the first page), concurrently. Pages already loaded are never refetched.
+    Returns project_id -> (InsightRecords, next cursor or None when exhausted).
+    use_cache=False re-downloads instead of reading the response cache (Step 2 Refresh).
+    """
+    cursors = {str(pid).strip(): cursor for pid, cursor in cursors.items() if str(pid).strip()}
+    if not dovetail_key or not dovetail_key.strip() or not cursors:
+        return {}
+    try:
+        return run_async(
+            dovetail_async.get_insight_pages(
+                dovetail_key,
+                cursors,
+                filters=highlight_filter_params(filters),
+                transform=HighlightExtractor().record,
+                use_cache=use_cache,
+            )
+        )
+    except Exception as e:
+        logger.warning("Fetch insight pages for projects %s failed: %s", list(cursors), e)
+        return {pid: ([], cursor) for pid, cursor in cursors.items()}
+
+
+def fetch_context_data(dovetail_key: str, productboard_key: str, full_sync: bool = False) -> dict[str, Any]:
     """
     Fetch all context in parallel (Dovetail projects, Dovetail insights, Productboard notes),
-    then normalize into a unified structure. Avoids N+1 by fetching all insights once.
+    then normalize into a unified structure. Avoids N+1 by fetching all insights once; highlights
+    are delta-synced against the local store, so repeat loads only download what changed.
+    full_sync re-reads every highlight page and drops highlights deleted upstream (this also
+    happens on its own once a project's last full sync is HIGHLIGHT_FULL_SYNC_INTERVAL old).
     """
     result: dict[str, Any] = {
         "dovetail": {"projects": []},
@@ -285,7 +628,7 @@ def fetch_context_data(dovetail_key: str, productboard_key: str) -> dict[str, An
     def fetch_insights() -> None:
         nonlocal insights
         if dovetail_key and dovetail_key.strip():
-            insights = dovetail.get_all_insights(dovetail_key, page_size=100)
+            insights = dovetail.get_all_insights(dovetail_key, page_size=100, incremental=True, full_sync=full_sync)
 
     def fetch_notes() -> None:
         nonlocal notes
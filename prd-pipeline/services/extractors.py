@@ -0,0 +1,263 @@
+"""
+Schema-sniffed extraction of Step 2 records from raw Dovetail highlight payloads.
+
+Highlights come in several shapes (project in project_id, project.id, project,
+relationships.project.data.id or attributes.project_id; created_at or createdAt; tags as
+[{title}], [{name}] or [str]; ...) and the generic helpers walk every fallback for every item.
+Items of one page share a shape, so HighlightExtractor sniffs the first item it sees, picks
+the field paths that item answers and compiles them into a _Shape; later items read only
+those paths. An item the sniffed paths do not fit goes through the generic helpers instead,
+and after RESNIFF_AFTER such items the next one is sniffed again (the shape changed, e.g.
+pages from another project or workspace).
+
+Where an item carries a field earlier in a fallback chain than the one its page was sniffed
+on (e.g. created_at on a page sniffed as createdAt), the sniffed field wins.
+"""
+from __future__ import annotations
+
+import sys
+from typing import Any, Callable, Optional
+
+from services.records import (
+    RAW_STORE,
+    InsightRecord,
+    intern_tags,
+    raw_date,
+    raw_priority,
+    raw_project_id,
+    raw_summary,
+)
+
+# Field paths to a highlight's project id, in the order raw_project_id tries them
+_PROJECT_ID_PATHS: tuple[tuple[str, ...], ...] = (
+    ("project_id",),
+    ("project", "id"),
+    ("project",),
+    ("relationships", "project", "data", "id"),
+    ("attributes", "project_id"),
+)
+_DATE_KEYS = ("created_at", "createdAt", "updated_at", "updatedAt")
+_PRIORITY_KEYS = ("priority", "importance")
+_TEXT_KEYS = ("text", "title", "name")  # tag-less title fallback
+_TITLE_KEYS = ("title", "name")  # plain title (fetch_context_data)
+NO_TITLE = "(No title)"
+
+# Cache sizes for the small value sets shared by many highlights (cleared when full)
+_TAGS_CACHE_MAX = 10_000
+_PRIORITY_CACHE_MAX = 1_000
+
+
+def text_title(text: Any) -> str:
+    """Title from a highlight's text: stripped, cut to 100 characters, or NO_TITLE."""
+    if not isinstance(text, str):
+        return NO_TITLE
+    text = text.strip()
+    return text[:100] + "..." if len(text) > 100 else (text or NO_TITLE)
+
+
+def tag_title(ins: dict[str, Any]) -> str:
+    """Title from tags[].title joined (e.g. "General cost, Utilization"), else from the text."""
+    tags = ins.get("tags")
+    if isinstance(tags, list) and tags:
+        titles = [str(t["title"]).strip() for t in tags if isinstance(t, dict) and t.get("title")]
+        if titles:
+            return ", ".join(titles)
+    return text_title(ins.get("text") or ins.get("title") or ins.get("name") or "")
+
+
+def plain_title(ins: dict[str, Any]) -> str:
+    """Title from title / name, or NO_TITLE."""
+    return (ins.get("title") or ins.get("name") or NO_TITLE).strip()
+
+
+def _compile_path(path: tuple[str, ...]) -> Callable[[dict[str, Any]], Any]:
+    """Getter for a nested field path; raises KeyError/TypeError where the item does not fit."""
+    if len(path) == 1:
+        (a,) = path
+        return lambda d: d[a]
+    if len(path) == 2:
+        a, b = path
+        return lambda d: d[a][b]
+
+    def get(d: Any) -> Any:
+        for key in path:
+            d = d[key]
+        return d
+    return get
+
+
+def _has_path(item: dict[str, Any], path: tuple[str, ...]) -> bool:
+    try:
+        value = _compile_path(path)(item)
+    except (KeyError, TypeError, IndexError):
+        return False
+    return isinstance(value, (str, int)) and bool(str(value).strip())
+
+
+def _first_key(item: dict[str, Any], keys: tuple[str, ...], types: tuple[type, ...] = (str,)) -> Optional[str]:
+    """First of keys whose value in item is a non-empty value of types (None if none is)."""
+    for key in keys:
+        value = item.get(key)
+        if value and isinstance(value, types):
+            return key
+    return None
+
+
+class _Shape:
+    """Field paths sniffed from one item. A None key means the sample had no such field."""
+
+    __slots__ = ("project_path", "date_key", "priority_key", "tag_field", "text_key", "title_key")
+
+    def __init__(self, sample: dict[str, Any]) -> None:
+        self.project_path = next((p for p in _PROJECT_ID_PATHS if _has_path(sample, p)), None)
+        self.date_key = _first_key(sample, _DATE_KEYS)
+        self.priority_key = _first_key(sample, _PRIORITY_KEYS, (str, int))
+        self.tag_field: Optional[str] = None  # "" for [str] tags
+        tags = sample.get("tags")
+        if isinstance(tags, list) and tags:
+            first = tags[0]
+            if isinstance(first, str):
+                self.tag_field = ""
+            elif isinstance(first, dict):
+                self.tag_field = _first_key(first, ("title", "name"))
+        self.text_key = _first_key(sample, _TEXT_KEYS)
+        self.title_key = _first_key(sample, _TITLE_KEYS)
+
+
+class HighlightExtractor:
+    """
+    Builds InsightRecords (and reads project ids) from raw highlights of one fetch, sniffing
+    the payload shape from the first item. title_from_tags selects the Step 2 title (tag
+    titles, else text; see tag_title) or the plain title/name (see plain_title).
+    Not shared across fetches: each keeps the shape of the pages it has seen.
+    """
+
+    RESNIFF_AFTER = 16
+
+    def __init__(self, title_from_tags: bool = True) -> None:
+        self.title_from_tags = title_from_tags
+        self._misses = 0
+        # raw tag names -> (interned tag tuple, title joined from tag titles or "")
+        self._tags: dict[tuple[Any, ...], tuple[tuple[str, ...], str]] = {}
+        self._priorities: dict[Any, str] = {}
+        self._record: Optional[Callable[[dict[str, Any]], InsightRecord]] = None
+        self._project_id: Optional[Callable[[dict[str, Any]], Optional[str]]] = None
+
+    def record(self, ins: dict[str, Any]) -> InsightRecord:
+        """InsightRecord for a raw highlight; the payload itself goes to RAW_STORE."""
+        if self._record is None or self._misses >= self.RESNIFF_AFTER:
+            self._sniff(ins)
+        return self._record(ins)
+
+    def project_id(self, ins: dict[str, Any]) -> Optional[str]:
+        """Project id of a raw highlight (see records.raw_project_id)."""
+        if self._project_id is None or self._misses >= self.RESNIFF_AFTER:
+            self._sniff(ins)
+        return self._project_id(ins)
+
+    def _miss(self) -> None:
+        self._misses += 1
+
+    def _sniff(self, sample: dict[str, Any]) -> None:
+        shape = _Shape(sample)
+        self._record = self._compile_record(shape)
+        self._project_id = self._compile_project_id(shape)
+        self._misses = 0
+
+    def _compile_project_id(self, shape: _Shape) -> Callable[[dict[str, Any]], Optional[str]]:
+        if shape.project_path is None:
+            return raw_project_id
+        get, miss = _compile_path(shape.project_path), self._miss
+
+        def project_id(ins: dict[str, Any]) -> Optional[str]:
+            try:
+                value = get(ins)
+            except (KeyError, TypeError, IndexError):
+                value = None
+            if isinstance(value, str):
+                value = value.strip()
+                if value:
+                    return value
+            elif isinstance(value, int):
+                return str(value)
+            miss()
+            return raw_project_id(ins)
+        return project_id
+
+    def _tags_slow(self, field: Optional[str], ins: dict[str, Any]) -> tuple[tuple[str, ...], str]:
+        """Tags and tag title for an item the cache did not answer (caching them if it can)."""
+        tags = ins.get("tags")
+        if field is not None and isinstance(tags, list):
+            names = tuple(tags) if field == "" else tuple(t.get(field) if isinstance(t, dict) else None for t in tags)
+            if all(isinstance(n, str) and n.strip() for n in names):
+                interned = intern_tags(names)
+                hit = (interned, ", ".join(interned) if field == "title" else "")
+                if len(self._tags) >= _TAGS_CACHE_MAX:
+                    self._tags.clear()
+                self._tags[names] = hit
+                return hit
+        if field is not None and tags:
+            self._misses += 1
+        titles = [str(t["title"]).strip() for t in tags or () if isinstance(t, dict) and t.get("title")]
+        return intern_tags(tags), ", ".join(titles)
+
+    def _priority_slow(self, key: Optional[str], ins: dict[str, Any]) -> str:
+        value = ins.get(key) if key is not None else None
+        if value and isinstance(value, (str, int)):
+            if len(self._priorities) >= _PRIORITY_CACHE_MAX:
+                self._priorities.clear()
+            hit = self._priorities[value] = raw_priority({key: value})
+            return hit
+        if key is not None:
+            self._misses += 1
+        return raw_priority(ins)
+
+    def _compile_record(self, shape: _Shape) -> Callable[[dict[str, Any]], InsightRecord]:
+        """Record builder reading shape's paths, with the generic helpers as fallback."""
+        from_tags = self.title_from_tags
+        tag_field, date_key, priority_key = shape.tag_field, shape.date_key, shape.priority_key
+        text_key = shape.text_key if from_tags else shape.title_key
+        tag_cache, priority_cache = self._tags, self._priorities
+        tags_slow, priority_slow, miss = self._tags_slow, self._priority_slow, self._miss
+        generic_title = tag_title if from_tags else plain_title
+        put, intern = RAW_STORE.put, sys.intern
+
+        def record(ins: dict[str, Any]) -> InsightRecord:
+            hit = None
+            if tag_field is not None:
+                try:
+                    tags = ins["tags"]
+                    hit = tag_cache.get(tuple(tags) if tag_field == "" else tuple([t[tag_field] for t in tags]))
+                except (KeyError, TypeError):  # not this shape, or unhashable names
+                    pass
+            tags, title = hit if hit is not None else tags_slow(tag_field, ins)
+            if not (from_tags and title):
+                value = ins.get(text_key) if text_key is not None else None
+                if value and isinstance(value, str):
+                    title = text_title(value) if from_tags else value.strip()
+                else:
+                    if text_key is not None:
+                        miss()
+                    title = generic_title(ins)
+            value = ins.get(date_key) if date_key is not None else None
+            if value and isinstance(value, str):
+                created = intern(value[:10])
+            else:
+                if date_key is not None:
+                    miss()
+                created = raw_date(ins)
+            value = ins.get(priority_key) if priority_key is not None else None
+            priority = priority_cache.get(value) if value and isinstance(value, (str, int)) else None
+            if priority is None:
+                priority = priority_slow(priority_key, ins)
+            iid = ins.get("id", "")
+            return InsightRecord(
+                iid if isinstance(iid, str) else str(iid),
+                intern(title),
+                tags,
+                created,
+                priority,
+                put(ins),
+                raw_summary(ins),
+            )
+        return record
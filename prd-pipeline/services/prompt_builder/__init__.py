@@ -4,6 +4,7 @@ Prompt builder: modular service to produce structured PRD generation prompts.
 Public API:
 - build_prompt(...)       : raw insight/feedback dicts -> PromptResult
 - build_prompt_from_summaries(...) : pre-aggregated text -> PromptResult
+- estimate_tokens(text)   : dependency-free token estimate (default count_tokens)
 
 No Streamlit, FastAPI, or API client imports; safe to use from pipeline or API.
 """
@@ -18,6 +19,7 @@ from services.prompt_builder.models import (
 )
 from services.prompt_builder.strategies import get_strategy
 from services.prompt_builder.strategies.base import PromptStrategy
+from services.prompt_builder.tokens import TokenCounter, estimate_tokens
 
 __all__ = [
     "build_prompt",
@@ -30,4 +32,6 @@ __all__ = [
     "FeedbackItem",
     "PromptStrategy",
     "get_strategy",
+    "estimate_tokens",
+    "TokenCounter",
 ]
@@ -6,7 +6,8 @@ Caller (pipeline or API) provides raw insights and feedback dicts plus config.
 """
 from __future__ import annotations
 
-from typing import Any
+import logging
+from typing import Any, Optional
 
 from services.prompt_builder.models import (
     NormalizedFeedback,
@@ -14,8 +15,20 @@ from services.prompt_builder.models import (
     PromptBuilderConfig,
     PromptResult,
 )
-from services.prompt_builder.normalizer import normalize_feedback, normalize_insights
+from services.prompt_builder.normalizer import (
+    NO_FEEDBACK,
+    NO_INSIGHTS,
+    fit_to_budget,
+    normalize_feedback,
+    normalize_insights,
+)
 from services.prompt_builder.strategies import get_strategy
+from services.prompt_builder.tokens import TokenCounter, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Refits after assembly when the whole prompt still exceeds max_tokens (separators, headings)
+_MAX_REFITS = 3
 
 
 def build_prompt(
@@ -24,26 +37,81 @@ def build_prompt(
     productboard_raw: list[dict[str, Any]],
     config: PromptBuilderConfig,
     strategy_id: str | None = None,
+    count_tokens: Optional[TokenCounter] = None,
 ) -> PromptResult:
     """
     Build a PRD generation prompt from raw Dovetail/Productboard data and config.
 
-    Flow: normalize and dedupe insights and feedback -> select strategy -> build
-    prompt string -> return PromptResult with prompt and metadata.
+    Flow: normalize and dedupe insights and feedback (exact and near-duplicates), keeping
+    those most relevant to the product context and business goals -> select strategy ->
+    with config.max_tokens, cut insights and feedback to what fits next to the strategy's
+    instructions (truncating the item that only partly fits), re-counting the assembled
+    prompt and cutting again while it is over -> build prompt string -> return PromptResult
+    with prompt and metadata. If the instructions alone exceed max_tokens, the context is
+    kept uncut and PromptResult.budget_warning says so.
+    count_tokens (str -> token count) defaults to tokens.estimate_tokens.
     """
-    insights = normalize_insights(dovetail_raw)
-    feedback = normalize_feedback(productboard_raw)
+    count_tokens = count_tokens or estimate_tokens
+    query = "\n".join(filter(None, [config.product_context, config.business_goals]))
+    insights = normalize_insights(dovetail_raw, query=query)
+    feedback = normalize_feedback(productboard_raw, query=query)
     sid = strategy_id or config.prd_template_id or "default"
     strategy = get_strategy(sid)
-    prompt_text = strategy.build(insights, feedback, config)
+    dropped: list[str] = []
+    truncated: list[str] = []
+    budget_warning = ""
+    prompt_text = ""
+    if config.max_tokens:
+        # Instructions alone (sections as if empty) take their share of the budget first
+        bare = strategy.build(
+            NormalizedInsights(summary_text=NO_INSIGHTS),
+            NormalizedFeedback(summary_text=NO_FEEDBACK),
+            config,
+        )
+        bare_tokens = count_tokens(bare)
+        budget = config.max_tokens - bare_tokens
+        if budget <= 0:
+            budget_warning = (
+                f"max_tokens ({config.max_tokens}) is less than the prompt instructions alone "
+                f"({bare_tokens} tokens); insights and feedback were not cut to fit."
+            )
+            logger.warning(budget_warning)
+        else:
+            all_insights, all_feedback = insights, feedback
+            for _ in range(_MAX_REFITS):
+                insights, feedback, dropped, truncated = fit_to_budget(
+                    all_insights, all_feedback, budget, count_tokens
+                )
+                prompt_text = strategy.build(insights, feedback, config)
+                over = count_tokens(prompt_text) - config.max_tokens
+                if over <= 0:
+                    break
+                budget = max(budget - over, 0)
+            else:
+                budget_warning = f"Prompt is still over max_tokens ({config.max_tokens}) after cutting its context."
+                logger.warning(budget_warning)
+    prompt_text = prompt_text or strategy.build(insights, feedback, config)
     word_count = len(prompt_text.split())
+    token_count = count_tokens(prompt_text)
+    insight_tokens = count_tokens(insights.summary_text)
+    feedback_tokens = count_tokens(feedback.summary_text)
     return PromptResult(
         prompt=prompt_text,
         strategy_id=strategy.strategy_id,
         template_id=config.prd_template_id,
         word_count=word_count,
+        token_count=token_count,
+        section_tokens={
+            "instructions": max(token_count - insight_tokens - feedback_tokens, 0),
+            "insights": insight_tokens,
+            "feedback": feedback_tokens,
+        },
         sections=list(strategy.sections),
         template_version="1",
+        merged_duplicates={"insights": insights.merged, "feedback": feedback.merged},
+        dropped_for_budget=dropped,
+        truncated_for_budget=truncated,
+        budget_warning=budget_warning,
     )
 
 
@@ -53,6 +121,7 @@ def build_prompt_from_summaries(
     productboard_summary: str,
     config: PromptBuilderConfig,
     strategy_id: str | None = None,
+    count_tokens: Optional[TokenCounter] = None,
 ) -> PromptResult:
     """
     Build prompt when caller has already aggregated text (e.g. pipeline summaries).
@@ -66,4 +135,5 @@ def build_prompt_from_summaries(
         productboard_raw=productboard_raw,
         config=config,
         strategy_id=strategy_id,
+        count_tokens=count_tokens,
     )
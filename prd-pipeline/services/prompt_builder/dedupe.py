@@ -0,0 +1,127 @@
+"""
+Near-duplicate detection for prompt items (e.g. one quote highlighted in several projects
+with small edits).
+
+Texts are cut into word shingles (SHINGLE_WORDS consecutive words, hashed). Each text gets a
+MinHash signature of SLOTS values by one-permutation hashing: one hash per shingle, whose top
+bits pick a slot and whose other bits compete for that slot's minimum. Signatures are split
+into BANDS bands of ROWS values; texts sharing any band with a filled slot are candidates,
+and a candidate is a duplicate when the Jaccard similarity of the two shingle sets reaches
+the threshold. Only cluster representatives are indexed, so each add() is one pass over the
+text plus a few set comparisons.
+"""
+from __future__ import annotations
+
+import re
+import zlib
+from typing import Iterable, Iterator, Optional
+
+SHINGLE_WORDS = 3
+BANDS, ROWS = 16, 4
+SLOTS = BANDS * ROWS  # power of two
+DEFAULT_THRESHOLD = 0.6
+# Shingles a text needs to be matched as a near-duplicate: in a short quote one changed word
+# ("two days" / "two weeks") leaves too few shingles for the Jaccard similarity to mean much
+MIN_SHINGLES = 4
+# Representatives compared one by one before switching to LSH buckets
+_SCAN_MAX = 64
+# Representatives kept per bucket; later ones are still found through their other bands
+_BUCKET_MAX = 16
+
+_WORD = re.compile(r"\w+")
+_SLOT_SHIFT = 32 - (SLOTS.bit_length() - 1)
+_VALUE_MASK = (1 << _SLOT_SHIFT) - 1
+_EMPTY_BAND = (None,) * ROWS
+
+
+def shingles(text: str, k: int = SHINGLE_WORDS) -> frozenset[int]:
+    """crc32s of the k-word shingles of text (lowercased words); one shingle for texts of k words or fewer."""
+    words = _WORD.findall(text.lower())
+    if len(words) <= k:
+        return frozenset({zlib.crc32(" ".join(words).encode("utf-8"))}) if words else frozenset()
+    grams = map(" ".join, zip(*(words[i:] for i in range(k))))
+    return frozenset(map(zlib.crc32, map(str.encode, grams)))
+
+
+def minhash(hashed: frozenset[int]) -> list[Optional[int]]:
+    """SLOTS-value signature of a shingle set (see module docstring); None for empty slots."""
+    # Multiplicative mix (its top bits pick the slot); descending order, so the last write per slot is its minimum
+    mixed = sorted([(h * 0x9E3779B1) & 0xFFFFFFFF for h in hashed], reverse=True)
+    slots = {m >> _SLOT_SHIFT: m & _VALUE_MASK for m in mixed}
+    return list(map(slots.get, range(SLOTS)))
+
+
+def jaccard(a: frozenset[int], b: frozenset[int]) -> float:
+    if not a or not b:
+        return 0.0
+    common = len(a & b)
+    return common / (len(a) + len(b) - common)
+
+
+def _bands(hashed: frozenset[int]) -> list[tuple[int, tuple[Optional[int], ...]]]:
+    """(band number, band values) of the signature, leaving out bands with no filled slot."""
+    signature = minhash(hashed)
+    return [band for band in enumerate(zip(*[iter(signature)] * ROWS)) if band[1] != _EMPTY_BAND]
+
+
+class NearDuplicateIndex:
+    """
+    Incremental near-duplicate clustering. add() items in priority order: the first item of
+    a cluster is its representative, later near-duplicates are merged into it (see merged).
+    Up to _SCAN_MAX representatives, a new item is compared with each of them directly
+    (cheaper than signing it); past that, representatives are bucketed by LSH band.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, min_shingles: int = MIN_SHINGLES) -> None:
+        self.threshold = threshold
+        self.min_shingles = min_shingles
+        self.merged: dict[str, list[str]] = {}  # representative key -> merged keys, in add order
+        self._keys: list[str] = []
+        self._shingles: list[frozenset[int]] = []
+        self._buckets: Optional[dict[tuple[int, tuple[Optional[int], ...]], list[int]]] = None
+
+    def add(self, key: str, text: str) -> Optional[str]:
+        """
+        Add text under key. Returns the representative key when it is a near-duplicate of an
+        earlier item (and records the merge), else None (key is a new representative).
+        Texts with fewer than min_shingles shingles are neither duplicates nor indexed
+        (exact repeats are left to the caller).
+        """
+        hashed = shingles(text)
+        if len(hashed) < self.min_shingles:
+            return None
+        bands = None
+        candidates: Iterable[int] = range(len(self._keys))
+        if len(self._keys) >= _SCAN_MAX:
+            if self._buckets is None:
+                self._buckets = {}
+                for rep, rep_hashed in enumerate(self._shingles):
+                    self._bucket(rep, _bands(rep_hashed))
+            bands = _bands(hashed)
+            candidates = self._candidates(bands)
+        for rep in candidates:
+            if jaccard(hashed, self._shingles[rep]) >= self.threshold:
+                rep_key = self._keys[rep]
+                self.merged.setdefault(rep_key, []).append(key)
+                return rep_key
+        rep = len(self._keys)
+        self._keys.append(key)
+        self._shingles.append(hashed)
+        if bands is not None:
+            self._bucket(rep, bands)
+        return None
+
+    def _candidates(self, bands: list[tuple[int, tuple[Optional[int], ...]]]) -> Iterator[int]:
+        """Representatives sharing a band, each once."""
+        seen: set[int] = set()
+        for band in bands:
+            for rep in self._buckets.get(band, ()):
+                if rep not in seen:
+                    seen.add(rep)
+                    yield rep
+
+    def _bucket(self, rep: int, bands: list[tuple[int, tuple[Optional[int], ...]]]) -> None:
+        for band in bands:
+            bucket = self._buckets.setdefault(band, [])
+            if len(bucket) < _BUCKET_MAX:
+                bucket.append(rep)
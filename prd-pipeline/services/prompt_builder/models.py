@@ -6,7 +6,7 @@ validation and JSON serialization for the API layer.
 """
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, Optional
 
 from pydantic import BaseModel, Field
 
@@ -48,6 +48,10 @@ class PromptBuilderConfig(BaseModel):
     audience_type: str = Field(default="internal_stakeholders", description="Target audience")
     output_tone: str = Field(default="professional", description="Tone of the PRD")
     include_roadmap: bool = Field(default=True, description="Include roadmap section")
+    max_tokens: Optional[int] = Field(
+        default=None,
+        description="Token budget for the whole prompt; insights and feedback are cut to fit. None = no limit",
+    )
 
     class Config:
         extra = "forbid"
@@ -60,12 +64,24 @@ class NormalizedInsights(BaseModel):
     """Cleaned and deduplicated research insights."""
     items: list[InsightItem] = Field(default_factory=list)
     summary_text: str = Field(default="", description="Aggregated text for prompt")
+    parts: list[str] = Field(default_factory=list, description="Prompt text of each item; summary_text joins them")
+    separator: str = Field(default="\n", description="Joins parts into summary_text")
+    merged: dict[str, list[str]] = Field(
+        default_factory=dict,
+        description='Kept id -> ids of duplicates dropped for it (items without an id: "(no id) <title>")',
+    )
 
 
 class NormalizedFeedback(BaseModel):
     """Cleaned and deduplicated customer feedback."""
     items: list[FeedbackItem] = Field(default_factory=list)
     summary_text: str = Field(default="", description="Aggregated text for prompt")
+    parts: list[str] = Field(default_factory=list, description="Prompt text of each item; summary_text joins them")
+    separator: str = Field(default="\n", description="Joins parts into summary_text")
+    merged: dict[str, list[str]] = Field(
+        default_factory=dict,
+        description='Kept id -> ids of duplicates dropped for it (items without an id: "(no id) <title>")',
+    )
 
 
 # --- Output model ---
@@ -77,8 +93,32 @@ class PromptResult(BaseModel):
     strategy_id: str = Field(default="default", description="Strategy used")
     template_id: str = Field(default="default", description="Template id")
     word_count: int = Field(default=0, description="Approximate word count of prompt")
+    token_count: int = Field(default=0, description="Token count of prompt (estimated unless a tokenizer was given)")
+    section_tokens: dict[str, int] = Field(
+        default_factory=dict,
+        description="Tokens per part of the prompt: instructions, insights, feedback",
+    )
+    dropped_for_budget: list[str] = Field(
+        default_factory=list,
+        description="Insight/feedback ids left out to fit config.max_tokens",
+    )
+    truncated_for_budget: list[str] = Field(
+        default_factory=list,
+        description="Insight/feedback ids whose prompt text was cut short to fit config.max_tokens",
+    )
+    budget_warning: str = Field(
+        default="",
+        description="Set when the prompt could not be fit to config.max_tokens (e.g. instructions alone exceed it)",
+    )
     sections: list[str] = Field(default_factory=list, description="Section names included")
     template_version: str = Field(default="1", description="For future prompt versioning")
+    merged_duplicates: dict[str, dict[str, list[str]]] = Field(
+        default_factory=dict,
+        description=(
+            'Per source ("insights", "feedback"): id kept in the prompt -> ids of exact or near-duplicates '
+            'merged into it (items without an id: "(no id) <title>")'
+        ),
+    )
 
     class Config:
         extra = "forbid"
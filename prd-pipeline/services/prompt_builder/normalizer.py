@@ -4,20 +4,39 @@ Clean, normalize, and deduplicate raw insights and feedback.
 Pure in-memory logic; no API calls. Used by the builder before passing
 data to a prompt strategy. Separation of concerns: this layer only
 handles data quality; strategies handle prompt structure.
+
+Items are kept in input order, or most relevant first when a query (product context and
+business goals) is given (see ranking); exact repeats and near-duplicates (see dedupe)
+collapse into the first item of their cluster, and the merged ids are reported.
+fit_to_budget then cuts both sections down to a token budget, in that priority order,
+truncating the item that only partly fits.
 """
 from __future__ import annotations
 
 import hashlib
 import json
 import re
-from typing import Any
+from typing import Any, Callable, Iterable, Optional
 
+from services.prompt_builder.dedupe import DEFAULT_THRESHOLD, NearDuplicateIndex
 from services.prompt_builder.models import (
     FeedbackItem,
     InsightItem,
     NormalizedFeedback,
     NormalizedInsights,
 )
+from services.prompt_builder.ranking import BM25Ranker
+from services.prompt_builder.tokens import TokenCounter, estimate_tokens
+
+# Raw items walked for max_items distinct ones (the first ones, or with a query the most relevant of all)
+MAX_CANDIDATES = 2000
+# summary_text of a section with no items
+NO_INSIGHTS = "No Dovetail insights selected."
+NO_FEEDBACK = "No Productboard feedback selected."
+# merged key prefix for items without an id (followed by the item's title)
+NO_ID = "(no id)"
+# Fewest tokens left for fit_to_budget to keep a truncated copy of an item that does not fit
+MIN_PARTIAL_TOKENS = 16
 
 
 def _normalize_text(text: str, max_len: int = 0) -> str:
@@ -36,34 +55,89 @@ def _content_hash(item: dict[str, Any], keys: list[str]) -> str:
     return hashlib.sha256("|".join(parts).encode()).hexdigest()
 
 
+def _merge_key(item_id: str, title: str) -> str:
+    """Key of an item in merged: its id, or NO_ID and its title when it has none."""
+    return item_id or f"{NO_ID} {title}"
+
+
+class _Deduper:
+    """Exact (content hash) then near-duplicate matching of items, recording merged keys (_merge_key)."""
+
+    def __init__(self, near_duplicate_threshold: Optional[float]) -> None:
+        self._exact: dict[str, str] = {}
+        self._near = NearDuplicateIndex(near_duplicate_threshold) if near_duplicate_threshold else None
+        self.merged: dict[str, list[str]] = {}
+
+    def is_duplicate(self, merge_key: str, title: str, text: str) -> bool:
+        key = _content_hash({"title": title, "text": text}, ["title", "text"])
+        rep = self._exact.get(key)
+        if rep is None and self._near is not None:
+            # Body only: titles are often shared tag names, whose words would pull unrelated quotes together
+            rep = self._near.add(merge_key, text or title)
+        if rep is None:
+            self._exact[key] = merge_key
+            return False
+        self.merged.setdefault(rep, []).append(merge_key)
+        return True
+
+
+def _candidates(
+    raw: list[dict[str, Any]],
+    max_candidates: int,
+    fields: Callable[[dict[str, Any]], tuple[str, str]],
+    query: str,
+    text_max_len: int,
+) -> Iterable[tuple[dict[str, Any], str, str]]:
+    """
+    Up to max_candidates (raw dict, title, text), with fields() giving the uncleaned title
+    and text. Without a query, the dicts in raw[:max_candidates] in input order. With one,
+    every dict in raw is scored by BM25 relevance of title and (the first text_max_len
+    characters of) text, and the max_candidates most relevant come first (ties in input
+    order), so a relevant item late in raw is not cut before ranking.
+    Cleaning is left to the caller, so only candidates actually walked are cleaned.
+    """
+    if not query:
+        return ((r, *fields(r)) for r in raw[:max_candidates] if isinstance(r, dict))
+    candidates = [(r, *fields(r)) for r in raw if isinstance(r, dict)]
+    order = BM25Ranker(query).order(f"{title} {text[:text_max_len]}" for _, title, text in candidates)
+    return [candidates[i] for i in order[:max_candidates]]
+
+
 def normalize_insights(
     raw: list[dict[str, Any]],
     *,
     max_items: int = 30,
     body_max_len: int = 800,
     title_max_len: int = 200,
+    max_candidates: int = MAX_CANDIDATES,
+    near_duplicate_threshold: Optional[float] = DEFAULT_THRESHOLD,
+    query: str = "",
 ) -> NormalizedInsights:
     """
     Clean and deduplicate raw insight dicts (e.g. from Dovetail).
-    Returns normalized items and a summary text block for the prompt.
+    Returns normalized items, a summary text block for the prompt and the merged
+    duplicate ids. near_duplicate_threshold=None only drops exact repeats; near-duplicates
+    are matched on the body (the title when it is empty), never on short texts (see dedupe).
+    With a query, the max_items kept are the most relevant to it, most relevant first.
     """
-    seen: set[str] = set()
-    items: list[InsightItem] = []
-    for r in raw[: max_items * 2]:  # allow extra for dedupe
-        if not isinstance(r, dict):
-            continue
-        title = _normalize_text(str(r.get("name") or r.get("title") or r.get("id", "")), title_max_len)
-        body = _normalize_text(
+
+    def fields(r: dict[str, Any]) -> tuple[str, str]:
+        return (
+            str(r.get("name") or r.get("title") or r.get("id", "")),
             str(r.get("body") or r.get("content") or r.get("text") or ""),
-            body_max_len,
         )
-        key = _content_hash({"title": title, "body": body}, ["title", "body"])
-        if key in seen:
+
+    dedupe = _Deduper(near_duplicate_threshold)
+    items: list[InsightItem] = []
+    for r, title, body in _candidates(raw, max_candidates, fields, query, body_max_len):
+        title = _normalize_text(title, title_max_len)
+        body = _normalize_text(body, body_max_len)
+        item_id = str(r.get("id", ""))
+        if dedupe.is_duplicate(_merge_key(item_id, title or "Insight"), title, body):
             continue
-        seen.add(key)
         items.append(
             InsightItem(
-                id=str(r.get("id", "")),
+                id=item_id,
                 title=title or "Insight",
                 body=body,
                 source="dovetail",
@@ -73,8 +147,8 @@ def normalize_insights(
             break
 
     lines = [f"- {i.title}. {i.body}" for i in items]
-    summary_text = "\n".join(lines) if lines else "No Dovetail insights selected."
-    return NormalizedInsights(items=items, summary_text=summary_text)
+    summary_text = "\n".join(lines) if lines else NO_INSIGHTS
+    return NormalizedInsights(items=items, summary_text=summary_text, parts=lines, merged=dedupe.merged)
 
 
 def normalize_feedback(
@@ -84,32 +158,38 @@ def normalize_feedback(
     content_max_len: int = 600,
     title_max_len: int = 200,
     full_json_per_note: bool = True,
+    max_candidates: int = MAX_CANDIDATES,
+    near_duplicate_threshold: Optional[float] = DEFAULT_THRESHOLD,
+    query: str = "",
 ) -> NormalizedFeedback:
     """
     Clean and deduplicate raw feedback dicts (e.g. from Productboard).
     When full_json_per_note is True (default), summary_text includes the full JSON
     of each note (id, title, content, createdAt, updatedAt, state, displayUrl, tags,
     company, followers, createdBy, etc.) so the PRD prompt has whole detail.
+    Near-duplicates are matched on content (title when it is empty) and relevance to query
+    scored on title and content, as for insights.
     """
-    seen: set[str] = set()
-    items: list[FeedbackItem] = []
-    summary_parts: list[str] = []
 
-    for r in raw[: max_items * 2]:
-        if not isinstance(r, dict):
-            continue
-        title = _normalize_text(str(r.get("name") or r.get("title") or r.get("id", "")), title_max_len)
-        content = _normalize_text(
+    def fields(r: dict[str, Any]) -> tuple[str, str]:
+        return (
+            str(r.get("name") or r.get("title") or r.get("id", "")),
             str(r.get("content") or r.get("description") or ""),
-            content_max_len,
         )
-        key = _content_hash({"title": title, "content": content}, ["title", "content"])
-        if key in seen:
+
+    dedupe = _Deduper(near_duplicate_threshold)
+    items: list[FeedbackItem] = []
+    summary_parts: list[str] = []
+
+    for r, title, content in _candidates(raw, max_candidates, fields, query, content_max_len):
+        title = _normalize_text(title, title_max_len)
+        content = _normalize_text(content, content_max_len)
+        item_id = str(r.get("id", ""))
+        if dedupe.is_duplicate(_merge_key(item_id, title or "Feedback"), title, content):
             continue
-        seen.add(key)
         items.append(
             FeedbackItem(
-                id=str(r.get("id", "")),
+                id=item_id,
                 title=title or "Feedback",
                 content=content,
                 source="productboard",
@@ -125,8 +205,89 @@ def normalize_feedback(
             break
 
     if full_json_per_note and summary_parts:
-        summary_text = "\n\n---\n\n".join(summary_parts)
+        separator = "\n\n---\n\n"
     else:
-        lines = [f"- {i.title}. {i.content}" for i in items]
-        summary_text = "\n".join(lines) if lines else "No Productboard feedback selected."
-    return NormalizedFeedback(items=items, summary_text=summary_text)
+        summary_parts = [f"- {i.title}. {i.content}" for i in items]
+        separator = "\n"
+    summary_text = separator.join(summary_parts) if summary_parts else NO_FEEDBACK
+    return NormalizedFeedback(
+        items=items,
+        summary_text=summary_text,
+        parts=summary_parts,
+        separator=separator,
+        merged=dedupe.merged,
+    )
+
+
+def _truncate_to(text: str, budget: int, count_tokens: TokenCounter) -> str:
+    """Longest prefix of text, cut at a word and ended with "...", within budget tokens ("" if none)."""
+    lo, hi = 0, len(text)
+    while lo < hi:  # longest character prefix that fits
+        mid = (lo + hi + 1) // 2
+        if count_tokens(text[:mid].rstrip() + "...") <= budget:
+            lo = mid
+        else:
+            hi = mid - 1
+    cut = text[:lo]
+    space = cut.rfind(" ")
+    if lo < len(text) and space > lo // 2:
+        cut = cut[:space]
+    cut = cut.rstrip()
+    return cut + "..." if cut else ""
+
+
+def fit_to_budget(
+    insights: NormalizedInsights,
+    feedback: NormalizedFeedback,
+    budget: int,
+    count_tokens: TokenCounter = estimate_tokens,
+) -> tuple[NormalizedInsights, NormalizedFeedback, list[str], list[str]]:
+    """
+    Keep the insight and feedback items whose prompt text fits in budget tokens. The two
+    sections are filled in turns, each in its own priority order (relevance, else input
+    order). An item too large for what is left is truncated to it (at least
+    MIN_PARTIAL_TOKENS), so a section of one long item (e.g. build_prompt_from_summaries)
+    keeps its start rather than nothing; with less left it is skipped and smaller later
+    ones may still fit. Returns both sections rebuilt from the kept items, the ids left
+    out and the ids truncated.
+    """
+    sections = (insights, feedback)
+    kept: tuple[list[int], list[int]] = ([], [])
+    partial: tuple[dict[int, str], dict[int, str]] = ({}, {})
+    separator_costs = [count_tokens(s.separator) for s in sections]
+    costs = [[count_tokens(part) for part in s.parts[:len(s.items)]] for s in sections]
+    remaining = budget
+    for rank in range(max(map(len, costs))):
+        for n in (0, 1):
+            if rank < len(costs[n]):
+                separator = separator_costs[n] if kept[n] else 0
+                if costs[n][rank] + separator <= remaining:
+                    kept[n].append(rank)
+                    remaining -= costs[n][rank] + separator
+                elif remaining - separator >= MIN_PARTIAL_TOKENS:
+                    part = _truncate_to(sections[n].parts[rank], remaining - separator, count_tokens)
+                    if part:
+                        kept[n].append(rank)
+                        partial[n][rank] = part
+                        remaining -= count_tokens(part) + separator
+
+    dropped: list[str] = []
+    truncated: list[str] = []
+    rebuilt = []
+    for section, keep, cut, empty in zip(sections, kept, partial, (NO_INSIGHTS, NO_FEEDBACK)):
+        if len(keep) == len(section.items) and not cut:
+            rebuilt.append(section)
+            continue
+        keep_set = set(keep)
+        dropped.extend(item.id for n, item in enumerate(section.items) if n not in keep_set)
+        truncated.extend(section.items[n].id for n in cut)
+        items = [section.items[n] for n in keep]
+        parts = [cut.get(n, section.parts[n]) for n in keep]
+        ids = {_merge_key(item.id, item.title) for item in items}
+        rebuilt.append(section.model_copy(update={
+            "items": items,
+            "parts": parts,
+            "summary_text": section.separator.join(parts) if parts else empty,
+            "merged": {k: v for k, v in section.merged.items() if k in ids},
+        }))
+    return rebuilt[0], rebuilt[1], dropped, truncated
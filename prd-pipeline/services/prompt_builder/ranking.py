@@ -0,0 +1,85 @@
+"""
+BM25 relevance of prompt candidates (insights, feedback) to the PRD's product context and
+business goals, so the items that reach the prompt are the most relevant ones rather than
+the first to arrive.
+
+Scoring is mostly C-level string work: each batch of BATCH_SIZE texts is joined, lowercased,
+punctuation blanked and split into words in one pass, and a set filter keeps only query-term
+hits and text separators, which are then counted per text. Only those counts and lengths are
+kept, so memory does not grow with the corpus' text; term statistics (document frequency,
+idf, average length) are then taken over all texts. Document length is measured in
+characters, which orders texts as word counts would without splitting every text.
+"""
+from __future__ import annotations
+
+import math
+import re
+import string
+from collections import Counter
+from itertools import islice
+from typing import Iterable
+
+from services.search_index import tokenize
+
+K1 = 1.2
+B = 0.75
+# Query words that carry no relevance signal
+STOPWORDS = frozenset(
+    "a about all also an and any are as at be been but by can do for from has have how i if in "
+    "into is it its more must new no not of on or our should so than that the their them there "
+    "these they this to up us was we what when which who will with within without you your".split()
+)
+_TAG_RE = re.compile(r"<[^>]+>")
+# Punctuation -> space, so words split cleanly ("_" stays a word character, as in tokenize)
+_PUNCT = str.maketrans(dict.fromkeys(string.punctuation.replace("_", "") + "“”‘’«»–—…", " "))
+_SEP = "\x00"
+# Texts joined and split per pass
+BATCH_SIZE = 2000
+_NO_HITS: dict[str, int] = {}  # shared term counts of texts without a query term (never mutated)
+
+
+def _plain(text: str) -> str:
+    """text without HTML tags or separator characters."""
+    if "<" in text:
+        text = _TAG_RE.sub(" ", text)
+    return text.replace(_SEP, " ") if _SEP in text else text
+
+
+class BM25Ranker:
+    """Ranks texts against a query (e.g. product context + business goals) with BM25."""
+
+    def __init__(self, query: str) -> None:
+        self.terms = [t for t in dict.fromkeys(tokenize(query)) if len(t) > 1 and t not in STOPWORDS]
+        # Query terms plus the text separator, so one filter over all words yields hits and text ends
+        self._is_hit = frozenset(self.terms + [_SEP]).__contains__
+
+    def scores(self, texts: Iterable[str]) -> list[float]:
+        """BM25 score of each text (0.0 when it has no query term), statistics taken over texts."""
+        if not self.terms:
+            return [0.0] * sum(1 for _ in texts)
+        tfs: list[dict[str, int]] = []
+        lengths: list[int] = []
+        texts = iter(texts)
+        while batch := list(islice(texts, BATCH_SIZE)):
+            joined = _SEP.join(map(_plain, batch)).lower().translate(_PUNCT)
+            # Query-term hits of each text, as one string per text
+            hits = " ".join(filter(self._is_hit, joined.replace(_SEP, f" {_SEP} ").split()))
+            for text_hits in hits.split(_SEP):
+                words = text_hits.split()
+                tfs.append(Counter(words) if len(words) > 1 else {words[0]: 1} if words else _NO_HITS)
+            lengths += [len(text) or 1 for text in joined.split(_SEP)]
+        if not lengths:
+            return []
+        n, avg = len(lengths), sum(lengths) / len(lengths)
+        df = Counter(term for tf in tfs for term in tf)
+        idf = {term: math.log(1 + (n - d + 0.5) / (d + 0.5)) for term, d in df.items()}
+        out = []
+        for tf, length in zip(tfs, lengths):
+            norm = K1 * (1 - B + B * length / avg)
+            out.append(sum((idf[term] * f * (K1 + 1) / (f + norm) for term, f in tf.items()), 0.0))
+        return out
+
+    def order(self, texts: Iterable[str]) -> list[int]:
+        """Indices of texts, most relevant first; equal scores (e.g. no match) keep input order."""
+        scores = self.scores(texts)
+        return sorted(range(len(scores)), key=lambda i: -scores[i])
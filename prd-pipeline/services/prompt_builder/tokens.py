@@ -0,0 +1,44 @@
+"""
+Token counting for prompt budgets.
+
+estimate_tokens approximates what a BPE tokenizer (cl100k-style) would produce from a
+few C-level string measurements, with no tokenizer or vocabulary download:
+- words (punctuation removed) at TOKENS_PER_WORD each, or word characters at
+  CHARS_PER_TOKEN per token when that is more (long identifiers, URLs, numbers);
+- ASCII punctuation at TOKENS_PER_PUNCT each (in JSON, quotes, colons and commas are
+  mostly their own tokens or merged in pairs);
+- extra UTF-8 bytes of non-ASCII characters at NON_ASCII_BYTES_PER_TOKEN per token
+  (accented letters cost a little more, CJK about a token per character).
+It is a budgeting estimate, not an exact count. Any str -> int callable (e.g. a tiktoken
+encoding's len(encode(text))) can be passed to build_prompt as count_tokens instead.
+"""
+from __future__ import annotations
+
+import math
+import string
+from typing import Callable
+
+TokenCounter = Callable[[str], int]
+
+CHARS_PER_TOKEN = 4.0
+TOKENS_PER_WORD = 1.1
+TOKENS_PER_PUNCT = 0.75
+NON_ASCII_BYTES_PER_TOKEN = 2.0
+
+_DROP_PUNCT = str.maketrans("", "", string.punctuation)
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate BPE token count of text (see module docstring); 0 for empty text."""
+    if not text:
+        return 0
+    stripped = text.translate(_DROP_PUNCT)
+    punct = len(text) - len(stripped)
+    words = stripped.split()
+    chars = sum(map(len, words))
+    extra_bytes = len(text.encode("utf-8")) - len(text)
+    return math.ceil(
+        max(chars / CHARS_PER_TOKEN, len(words) * TOKENS_PER_WORD)
+        + punct * TOKENS_PER_PUNCT
+        + extra_bytes / NON_ASCII_BYTES_PER_TOKEN
+    )
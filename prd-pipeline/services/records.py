@@ -0,0 +1,247 @@
+"""
+Compact normalized records for Step 2 context, and the shared store for their raw payloads.
+
+Insight and note records are frozen, slotted dataclasses holding what lists, filters and
+prompts need (id, title, interned tags, created day, priority, a short summary). The full
+API payload is kept once per process in RAW_STORE, content-addressed and compressed, and is
+only decoded when something asks for record.raw (e.g. "View full data (JSON)"). RAW_STORE
+is bounded, so record.raw can be None after eviction; everything else stays on the record.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import marshal
+import sys
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+
+from app.config import RAW_STORE_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+
+class RawStore:
+    """
+    Content-addressed payload store shared by all sessions: key = sha1 of the encoded payload.
+    Identical payloads (e.g. two users loading the same workspace) are stored once. Least
+    recently used payloads are evicted past max_bytes; get() then returns None (logged the
+    first time after each eviction) and callers fall back to the record fields.
+
+    Payloads are marshal-encoded (they are JSON-decoded API data and never leave the process),
+    and only compressed from COMPRESS_MIN_BYTES: zlib's per-call setup costs more than it
+    saves on a typical 500-byte highlight. Payloads read back from a snapshot
+    (services.snapshot) are kept as the JSON bytes they were saved as until first get().
+    """
+
+    COMPRESS_MIN_BYTES = 2048
+
+    def __init__(self, max_bytes: int = RAW_STORE_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self._blobs: OrderedDict[str, bytes] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Lookups of evicted (or unknown) keys, and whether one was logged since the last eviction
+        self.misses = 0
+        self._miss_logged = True
+
+    def __len__(self) -> int:
+        return len(self._blobs)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def put(self, payload: dict[str, Any]) -> str:
+        """Store payload (if new) and return its key ("" if it cannot be encoded)."""
+        try:
+            encoded = marshal.dumps(payload)
+        except ValueError as e:
+            logger.warning("RawStore: could not encode payload: %s", e)
+            return ""
+        key = hashlib.sha1(encoded).hexdigest()
+        with self._lock:
+            if key in self._blobs:
+                self._blobs.move_to_end(key)
+                return key
+        blob = b"z" + zlib.compress(encoded, 1) if len(encoded) >= self.COMPRESS_MIN_BYTES else b"m" + encoded
+        with self._lock:
+            if key not in self._blobs:
+                self._blobs[key] = blob
+                self._bytes += len(blob)
+                self._evict()
+        return key
+
+    def put_json(self, payloads: Iterable[tuple[str, bytes]]) -> None:
+        """Store (key, JSON-encoded payload) pairs as they are (keys from an earlier put())."""
+        with self._lock:
+            blobs, size = self._blobs, self._bytes
+            for key, encoded in payloads:
+                if key in blobs:
+                    blobs.move_to_end(key)
+                else:
+                    blob = blobs[key] = b"j" + encoded
+                    size += len(blob)
+            self._bytes = size
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used blobs past max_bytes. Caller holds the lock."""
+        while self._bytes > self.max_bytes and len(self._blobs) > 1:
+            _, evicted = self._blobs.popitem(last=False)
+            self._bytes -= len(evicted)
+            self._miss_logged = False
+
+    def get(self, key: str) -> Optional[dict[str, Any]]:
+        """Decoded payload for key, or None if unknown/evicted."""
+        if not key:
+            return None
+        with self._lock:
+            blob = self._blobs.get(key)
+            if blob is not None:
+                self._blobs.move_to_end(key)
+            else:
+                self.misses += 1
+                log_miss, self._miss_logged = not self._miss_logged, True
+        if blob is None:
+            if log_miss:
+                logger.warning(
+                    "RawStore: payload %s was evicted (store is capped at %d bytes, RAW_STORE_MAX_BYTES); "
+                    "using record fields instead", key, self.max_bytes,
+                )
+            return None
+        try:
+            if blob[:1] == b"j":
+                return json.loads(blob[1:])
+            return marshal.loads(zlib.decompress(blob[1:]) if blob[:1] == b"z" else blob[1:])
+        except (zlib.error, ValueError, EOFError, TypeError) as e:
+            logger.warning("RawStore: could not decode payload %s: %s", key, e)
+            return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._blobs.clear()
+            self._bytes = 0
+            self._miss_logged = True
+
+
+RAW_STORE = RawStore()
+
+
+# Distinct tag tuples seen so far; most records share a handful of tag combinations
+_TAG_TUPLES: dict[tuple[str, ...], tuple[str, ...]] = {}
+_TAG_TUPLES_MAX = 100_000
+
+
+def intern_tags(tags: Any) -> tuple[str, ...]:
+    """Tag names from raw tags ([{title|name}] or [str]), stripped and interned (as written)."""
+    out = []
+    for t in tags or []:
+        name = t.get("title") or t.get("name") if isinstance(t, dict) else t
+        if isinstance(name, str) and name.strip():
+            out.append(sys.intern(name.strip()))
+    key = tuple(out)
+    if len(_TAG_TUPLES) >= _TAG_TUPLES_MAX:
+        _TAG_TUPLES.clear()
+    return _TAG_TUPLES.setdefault(key, key)
+
+
+def raw_date(raw: dict[str, Any]) -> str:
+    """YYYY-MM-DD the payload was created (created_at / createdAt, else updated), or ""."""
+    value = raw.get("created_at") or raw.get("createdAt") or raw.get("updated_at") or raw.get("updatedAt")
+    return sys.intern(value[:10]) if isinstance(value, str) else ""
+
+
+def raw_priority(raw: dict[str, Any]) -> str:
+    """Lowercased priority (priority / importance as str or {name}), or ""."""
+    value = raw.get("priority") or raw.get("importance")
+    if isinstance(value, dict):
+        value = value.get("name") or value.get("title") or value.get("label")
+    return sys.intern(str(value).strip().lower()) if isinstance(value, (str, int)) and str(value).strip() else ""
+
+
+def raw_project_id(raw: dict[str, Any]) -> Optional[str]:
+    """Project id of a highlight (project_id, project.id, project, relationships or attributes)."""
+    pid = raw.get("project_id")
+    if pid is not None and str(pid).strip():
+        return str(pid).strip()
+    proj = raw.get("project")
+    if isinstance(proj, dict) and proj.get("id") is not None:
+        return str(proj["id"]).strip()
+    if isinstance(proj, str) and proj.strip():
+        return proj.strip()
+    rel = raw.get("relationships") or {}
+    proj_rel = (rel.get("project") or {}).get("data") if isinstance(rel.get("project"), dict) else None
+    if isinstance(proj_rel, dict) and proj_rel.get("id"):
+        return str(proj_rel["id"]).strip()
+    attrs = raw.get("attributes") or {}
+    if attrs.get("project_id"):
+        return str(attrs["project_id"]).strip()
+    return None
+
+
+def raw_body(raw: dict[str, Any]) -> str:
+    """Main text of a highlight/note payload (text, content or body), or ""."""
+    body = raw.get("text") or raw.get("content") or raw.get("body") or ""
+    if isinstance(body, dict):
+        body = body.get("body") or ""
+    return body if isinstance(body, str) else ""
+
+
+def raw_summary(raw: dict[str, Any], max_len: int = 300) -> str:
+    """
+    Short summary from the payload's body/content/text, whitespace collapsed. Only the start
+    of the text is read, so long transcripts cost no more than short highlights.
+    """
+    for key in ("body", "content", "text", "summary", "description"):
+        val = raw.get(key)
+        if val and isinstance(val, str) and val.strip():
+            head = val[:max_len + 1]
+            if head.isprintable() and "  " not in head and head[0] != " " and head[-1] != " ":
+                # Nothing to collapse up to the cut (the common case): slice, no split/join
+                return val if len(val) <= max_len else val[:max_len] + "..."
+            head = val[:4 * max_len]
+            s = " ".join(head.split())
+            more = len(s) > max_len or (len(val) > len(head) and not val[len(head):].isspace())
+            return s[:max_len] + ("..." if more else "")
+    return ""
+
+
+@dataclass(frozen=True, slots=True)
+class InsightRecord:
+    """
+    A Dovetail insight (highlight) in Step 2. The summary (raw_summary of the payload) is kept
+    on the record, not derived from RAW_STORE, so prompts and snapshots keep the insight's
+    text after its payload is evicted.
+    """
+    id: str
+    title: str
+    tags: tuple[str, ...] = ()
+    created: str = ""  # YYYY-MM-DD
+    priority: str = ""
+    raw_key: str = ""  # RAW_STORE key of the full payload
+    summary: str = ""
+
+    @property
+    def raw(self) -> Optional[dict[str, Any]]:
+        return RAW_STORE.get(self.raw_key)
+
+
+@dataclass(frozen=True, slots=True)
+class NoteRecord:
+    """A Productboard note in Step 2 (summary: as on InsightRecord)."""
+    id: str
+    name: str
+    tags: tuple[str, ...] = ()
+    created: str = ""  # YYYY-MM-DD
+    priority: str = ""
+    raw_key: str = ""  # RAW_STORE key of the full payload
+    summary: str = ""
+
+    @property
+    def raw(self) -> Optional[dict[str, Any]]:
+        return RAW_STORE.get(self.raw_key)
@@ -0,0 +1,379 @@
+"""
+In-memory full-text search for Step 2: a tokenized inverted index with prefix matching,
+BM25 ranking (title and tags weighted above body text) and match highlighting.
+
+Pure Python, no dependencies. Documents are (doc_id, kind, fields); only postings are
+stored, so highlighting takes the display text from the caller. SHARED_INDEXES keeps built
+indexes by a fingerprint of their documents, so sessions over the same data share one.
+
+Latency: with a term's ranked postings cached, a query over 50k documents takes a few
+milliseconds. The first query on a term scores and sorts all of its postings, which for a
+word in most documents (45k postings) is ~40 ms in pure Python, above the 10 ms target; the
+cache is per shared index, so that cost is paid once per term across sessions, not per session.
+"""
+from __future__ import annotations
+
+import bisect
+import heapq
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, Optional
+
+from app.config import SEARCH_SCORED_POSTINGS, SEARCH_SHARED_INDEXES
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_TAG_RE = re.compile(r"<[^>]+>")
+
+# Field -> term-frequency weight (BM25F-style: a title hit counts as 3 body hits)
+FIELD_WEIGHTS = {"title": 3, "tags": 2, "summary": 1, "content": 1}
+# Most frequent vocabulary terms a prefix may expand to; keeps 1-2 letter prefixes fast
+MAX_PREFIX_EXPANSIONS = 64
+_K1 = 1.2
+_B = 0.75
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased word tokens (HTML tags stripped)."""
+    if not text:
+        return []
+    if "<" in text:
+        text = _TAG_RE.sub(" ", text)
+    return _TOKEN_RE.findall(text.lower())
+
+
+# (scores by doc_id, impact-ordered doc ids by kind, weight factor) for one matched term
+TermSource = tuple[dict[str, float], dict[str, list[str]], float]
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    doc_id: str
+    kind: str
+    score: float
+
+
+class SearchIndex:
+    """
+    Inverted index over documents of several kinds (e.g. project, insight, note). Searching
+    is safe from several threads once documents are no longer added or removed.
+    """
+
+    def __init__(self, scored_postings: int = SEARCH_SCORED_POSTINGS) -> None:
+        # term -> {doc_id: weighted tf}; integer weights keep tf values as shared small ints
+        self._postings: dict[str, dict[str, int]] = {}
+        self._doc_terms: dict[str, tuple[str, ...]] = {}  # doc_id -> distinct terms (for removal)
+        self._doc_len: dict[str, int] = {}
+        self._doc_kind: dict[str, str] = {}
+        self._total_len = 0
+        self._vocab: list[str] = []  # sorted terms, rebuilt lazily for prefix lookups
+        self._vocab_dirty = False
+        # doc_id -> BM25 length normalization; cleared on change
+        self._norms: Optional[dict[str, float]] = None
+        # term -> ({doc_id: bm25 weight}, {kind: [doc_id] best first}); LRU up to
+        # scored_postings postings in total, cleared on change
+        self._scored: OrderedDict[str, tuple[dict[str, float], dict[str, list[str]]]] = OrderedDict()
+        self._scored_size = 0
+        self._scored_postings = scored_postings
+        self._scored_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._doc_kind)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_kind
+
+    def add(self, doc_id: str, kind: str, fields: dict[str, str]) -> None:
+        """Index (or re-index) a document. fields keys are FIELD_WEIGHTS names; others weigh 1."""
+        if doc_id in self._doc_kind:
+            self.remove(doc_id)
+        tf: dict[str, int] = {}
+        length = 0
+        for field, text in fields.items():
+            if not text:
+                continue
+            weight = FIELD_WEIGHTS.get(field, 1)
+            tokens = tokenize(text)
+            length += weight * len(tokens)
+            for term, count in Counter(tokens).items():
+                tf[term] = tf.get(term, 0) + weight * count
+        if not tf:
+            return
+        all_postings = self._postings
+        for term, freq in tf.items():
+            postings = all_postings.get(term)
+            if postings is None:
+                postings = all_postings[term] = {}
+                self._vocab_dirty = True
+            postings[doc_id] = freq
+        self._doc_terms[doc_id] = tuple(tf)
+        self._doc_len[doc_id] = length
+        self._doc_kind[doc_id] = kind
+        self._total_len += length
+        self._changed()
+
+    def remove(self, doc_id: str) -> None:
+        if doc_id not in self._doc_kind:
+            return
+        for term in self._doc_terms.pop(doc_id, ()):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+                    self._vocab_dirty = True
+        self._total_len -= self._doc_len.pop(doc_id, 0)
+        del self._doc_kind[doc_id]
+        self._changed()
+
+    def _changed(self) -> None:
+        self._norms = None
+        with self._scored_lock:
+            self._scored.clear()
+            self._scored_size = 0
+
+    def remove_kind(self, kind: str) -> None:
+        for doc_id in [d for d, k in self._doc_kind.items() if k == kind]:
+            self.remove(doc_id)
+
+    # --- Querying ---
+
+    def _expand(self, token: str, prefix: bool) -> list[str]:
+        """Vocabulary terms matching token (exactly, or as a prefix), most frequent first."""
+        if not prefix:
+            return [token] if token in self._postings else []
+        if self._vocab_dirty:
+            self._vocab = sorted(self._postings)
+            self._vocab_dirty = False
+        lo = bisect.bisect_left(self._vocab, token)
+        hi = bisect.bisect_left(self._vocab, token + "\uffff", lo)
+        terms = self._vocab[lo:hi]
+        if len(terms) > MAX_PREFIX_EXPANSIONS:
+            terms = heapq.nlargest(MAX_PREFIX_EXPANSIONS, terms, key=lambda t: len(self._postings[t]))
+        return terms
+
+    def _doc_norms(self) -> dict[str, float]:
+        """BM25 length normalization of every document (K1 * (1 - B + B * len / avg))."""
+        norms = self._norms
+        if norms is None:
+            avg = self._total_len / len(self._doc_len) if self._doc_len else 1.0
+            a, b = _K1 * (1 - _B), _K1 * _B / (avg or 1.0)
+            norms = self._norms = {d: a + b * length for d, length in self._doc_len.items()}
+        return norms
+
+    def _bm25(self, term: str) -> tuple[dict[str, float], dict[str, list[str]]]:
+        """
+        Per-document BM25 weight of term, as a lookup dict and as impact-ordered doc ids
+        (best first) per document kind. Cached (LRU, up to scored_postings postings) until
+        the index changes.
+        """
+        with self._scored_lock:
+            cached = self._scored.get(term)
+            if cached is not None:
+                self._scored.move_to_end(term)
+                return cached
+        postings = self._postings[term]
+        n = len(self._doc_kind)
+        c = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5)) * (_K1 + 1)
+        norms = self._doc_norms()
+        scores = {d: c * tf / (tf + norms[d]) for d, tf in postings.items()}
+        by_kind: dict[str, list[str]] = {}
+        doc_kind = self._doc_kind
+        for d in sorted(scores, key=scores.__getitem__, reverse=True):
+            ordered = by_kind.get(doc_kind[d])
+            if ordered is None:
+                ordered = by_kind[doc_kind[d]] = []
+            ordered.append(d)
+        cached = (scores, by_kind)
+        with self._scored_lock:
+            if term not in self._scored:
+                self._scored[term] = cached
+                self._scored_size += len(scores)
+                while self._scored_size > self._scored_postings and len(self._scored) > 1:
+                    _, (evicted, _) = self._scored.popitem(last=False)
+                    self._scored_size -= len(evicted)
+        return cached
+
+    def _token_sources(self, token: str) -> list[TermSource]:
+        """TermSource per vocabulary term the query word matches. Prefix-only matches count half."""
+        return [(*self._bm25(term), 1.0 if term == token else 0.5) for term in self._expand(token, prefix=True)]
+
+    @staticmethod
+    def _token_score(sources: list[TermSource], doc_id: str) -> float:
+        """Score of one query word for doc_id: its best matching term (0 when none matches)."""
+        best = 0.0
+        for scores, _, factor in sources:
+            w = scores.get(doc_id)
+            if w is not None and w * factor > best:
+                best = w * factor
+        return best
+
+    @staticmethod
+    def _token_stream(sources: list[TermSource], kinds: Optional[set[str]]) -> Iterator[tuple[float, str]]:
+        """(score, doc_id) for one query word, best first (documents may repeat via several terms)."""
+        return heapq.merge(
+            *(
+                _weighted(ordered, scores, factor)
+                for scores, by_kind, factor in sources
+                for kind, ordered in by_kind.items()
+                if kinds is None or kind in kinds
+            ),
+            reverse=True,
+        )
+
+    def search(
+        self,
+        query: str,
+        kinds: Optional[Iterable[str]] = None,
+        limit: Optional[int] = 50,
+    ) -> list[SearchHit]:
+        """
+        Documents matching every query word, best first. Each word also matches as a prefix
+        ("onb" finds "onboarding"); exact matches outrank prefix-only ones. kinds restricts
+        document kinds; limit=None returns all matches.
+
+        With a limit, words are read best-first from impact-ordered postings and reading
+        stops once no unseen document can beat the current top `limit` (threshold algorithm),
+        so common words do not cost a full postings scan.
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        sources = [self._token_sources(t) for t in tokens]
+        if not all(sources):
+            return []
+        wanted = set(kinds) if kinds is not None else None
+        doc_kind = self._doc_kind
+
+        # Single-term words (the common case) score with one dict lookup
+        direct = [src[0][0] if len(src) == 1 and src[0][2] == 1.0 else None for src in sources]
+        token_score = self._token_score
+
+        def total(doc_id: str, skip: int = -1, known: float = 0.0) -> Optional[float]:
+            score = known
+            for i, src in enumerate(sources):
+                if i == skip:
+                    continue
+                scores = direct[i]
+                w = scores.get(doc_id) if scores is not None else token_score(src, doc_id)
+                if not w:
+                    return None
+                score += w
+            return score
+
+        if limit is None:
+            candidates: set[str] = set()
+            for i, src in enumerate(sorted(sources, key=lambda s: sum(len(sc) for sc, _, _ in s))):
+                docs = set().union(*(sc.keys() for sc, _, _ in src))
+                candidates = docs if i == 0 else candidates & docs
+            if wanted is not None:
+                candidates = {d for d in candidates if doc_kind[d] in wanted}
+            totals = {d: t for d in candidates if (t := total(d)) is not None}
+            ranked = sorted(totals.items(), key=lambda kv: kv[1], reverse=True)
+            return [SearchHit(d, doc_kind[d], s) for d, s in ranked]
+        if limit <= 0:
+            return []
+
+        streams = [self._token_stream(src, wanted) for src in sources]
+        frontier = [math.inf] * len(streams)
+        seen: set[str] = set()
+        top: list[tuple[float, str]] = []  # min-heap of the best `limit` (score, doc_id)
+        while True:
+            for i, stream in enumerate(streams):
+                entry = next(stream, None)
+                if entry is None:
+                    # Every document matching all words appears in this stream: all were scored
+                    return [SearchHit(d, doc_kind[d], s) for s, d in sorted(top, reverse=True)]
+                w, d = entry
+                frontier[i] = w
+                if d in seen:
+                    continue
+                seen.add(d)
+                score = total(d, skip=i, known=w if direct[i] is not None else token_score(sources[i], d))
+                if score is None:
+                    continue
+                if len(top) < limit:
+                    heapq.heappush(top, (score, d))
+                elif score > top[0][0]:
+                    heapq.heapreplace(top, (score, d))
+            if len(top) == limit and top[0][0] >= sum(frontier):
+                return [SearchHit(d, doc_kind[d], s) for s, d in sorted(top, reverse=True)]
+
+
+def _weighted(ordered: list[str], scores: dict[str, float], factor: float) -> Iterator[tuple[float, str]]:
+    """(weight, doc_id) along impact-ordered doc ids, read lazily (searches stop early)."""
+    return ((scores[d] * factor, d) for d in ordered)
+
+
+class SharedIndexes:
+    """
+    Built SearchIndexes kept per process by a fingerprint of their documents, so sessions
+    that load the same data (e.g. several users on one workspace) search one index instead
+    of each holding a copy (~150 MB at 50k documents). Up to max_entries indexes, least
+    recently used dropped first; a session still holding a dropped index keeps using it.
+    Indexes from here are shared: never add or remove documents on them.
+    """
+
+    def __init__(self, max_entries: int = SEARCH_SHARED_INDEXES) -> None:
+        self.max_entries = max_entries
+        self._indexes: OrderedDict[str, SearchIndex] = OrderedDict()
+        self._building: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._indexes)
+
+    def get(self, key: str, build: Callable[[], SearchIndex]) -> SearchIndex:
+        """The index for key, built with build() if it is not kept (once, however many callers wait)."""
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+                return index
+            building = self._building.setdefault(key, threading.Lock())
+        with building:
+            with self._lock:
+                index = self._indexes.get(key)
+            if index is not None:
+                return index
+            index = build()
+            with self._lock:
+                self._building.pop(key, None)
+                if self.max_entries > 0:
+                    self._indexes[key] = index
+                    while len(self._indexes) > self.max_entries:
+                        self._indexes.popitem(last=False)
+        return index
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indexes.clear()
+
+
+SHARED_INDEXES = SharedIndexes()
+
+
+def highlight(text: str, query: str, max_len: int = 200, marker: str = "**") -> str:
+    """
+    Snippet of text around the first query match with matching words wrapped in marker
+    (Markdown bold by default). Prefix matches are highlighted too. Returns the start of
+    text (truncated) when nothing matches.
+    """
+    text = " ".join(_TAG_RE.sub(" ", text or "").split())
+    tokens = [t for t in dict.fromkeys(tokenize(query)) if t]
+    if not text:
+        return ""
+    if not tokens:
+        return text[:max_len] + ("..." if len(text) > max_len else "")
+    pattern = re.compile(r"\b(" + "|".join(re.escape(t) for t in sorted(tokens, key=len, reverse=True)) + r")\w*", re.IGNORECASE)
+    first = pattern.search(text)
+    start = 0
+    if first and len(text) > max_len:
+        start = max(0, first.start() - max_len // 4)
+        space = text.rfind(" ", 0, start)
+        start = space + 1 if space >= 0 and start > 0 else start
+    snippet = text[start:start + max_len]
+    marked = pattern.sub(lambda m: f"{marker}{m.group(0)}{marker}", snippet)
+    return ("..." if start > 0 else "") + marked + ("..." if start + max_len < len(text) else "")
@@ -0,0 +1,225 @@
+"""
+Step 2 context snapshots: a normalized context_data tree (projects with their insights and
+resume cursors, notes, the raw payloads behind them) plus the Step 2 selections, saved to
+one file and opened again without the network.
+
+File layout: MAGIC, a codec byte pair (records: b"m" msgpack / b"j" JSON; compression:
+b"s" zstd / b"z" zlib), then length-prefixed frames (4-byte little-endian length, then the
+compressed body): meta, projects, insights, notes, payload index, payloads. Records are
+stored column-wise (ids, titles, tag set numbers, days, priorities, payload numbers), which
+both compresses and decodes fast. Payloads are stored as JSON bytes and handed to RAW_STORE
+undecoded, so opening a snapshot decodes only what Step 2 lists show.
+
+msgpack and zstandard are optional: without them snapshots are written as JSON + zlib.
+A snapshot written with them cannot be opened where they are missing (load_snapshot logs
+it and returns None).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from app.config import SNAPSHOT_DIR
+from services.records import RAW_STORE, InsightRecord, NoteRecord, intern_tags
+
+try:
+    import msgpack
+except ImportError:  # JSON records
+    msgpack = None
+try:
+    import zstandard
+except ImportError:  # zlib frames
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"PRDSNAP1"
+SUFFIX = ".prdsnap"
+_LENGTH = struct.Struct("<I")
+_FRAMES = ("meta", "projects", "insights", "notes", "payload_index", "payloads")
+
+
+@dataclass
+class Snapshot:
+    """An opened snapshot: the context_data tree, the saved selections and when it was saved."""
+    context_data: dict[str, Any]
+    selections: dict[str, list[str]] = field(default_factory=dict)
+    saved_at: str = ""
+
+
+def _codecs(records: bytes, compression: bytes) -> Optional[tuple[Callable, Callable, Callable, Callable]]:
+    """(dumps, loads, compress, decompress) for a codec byte pair, or None if one is not installed."""
+    if records == b"m" and msgpack is not None:
+        dumps, loads = msgpack.packb, msgpack.unpackb
+    elif records == b"j":
+        dumps, loads = lambda v: json.dumps(v, ensure_ascii=False).encode("utf-8"), json.loads
+    else:
+        return None
+    if compression == b"s" and zstandard is not None:
+        return dumps, loads, zstandard.ZstdCompressor(level=3).compress, zstandard.ZstdDecompressor().decompress
+    if compression == b"z":
+        return dumps, loads, lambda body: zlib.compress(body, 6), zlib.decompress
+    return None
+
+
+def _record_columns(items: list[Any], title: str, payload_number: Callable[[str], int]) -> dict[str, Any]:
+    """Insight/note records as columns; tag tuples are numbered into tag_sets."""
+    tag_sets: dict[tuple[str, ...], int] = {}
+    return {
+        "id": [r.id for r in items],
+        title: [getattr(r, title) for r in items],
+        "tags": [tag_sets.setdefault(r.tags, len(tag_sets)) for r in items],
+        "tag_sets": [list(t) for t in tag_sets],
+        "created": [r.created for r in items],
+        "priority": [r.priority for r in items],
+        "raw": [payload_number(r.raw_key) for r in items],
+        "summary": [r.summary for r in items],
+    }
+
+
+def _records(cols: dict[str, Any], cls: type, title: str, keys: list[str]) -> list[Any]:
+    tag_sets = [intern_tags(t) for t in cols["tag_sets"]]
+    intern, keys = sys.intern, keys + [""]  # raw -1 -> no payload
+    return list(map(
+        cls,
+        cols["id"],
+        cols[title],
+        [tag_sets[t] for t in cols["tags"]],
+        map(intern, cols["created"]),
+        map(intern, cols["priority"]),
+        [keys[r] for r in cols["raw"]],
+        cols.get("summary") or [""] * len(cols["id"]),  # not in snapshots saved before summaries
+    ))
+
+
+def save_snapshot(
+    context_data: dict[str, Any],
+    selections: Optional[dict[str, list[str]]] = None,
+    name: Optional[str] = None,
+    directory: Path = SNAPSHOT_DIR,
+) -> Optional[Path]:
+    """
+    Write context_data and selections to <directory>/<name>.prdsnap (name defaults to the
+    current local time to the microsecond, so back-to-back saves never overwrite each other).
+    Payloads evicted from RAW_STORE are saved without raw data; their records keep title,
+    tags and summary. Returns the path, or None if writing failed.
+    """
+    records, compression = b"m" if msgpack is not None else b"j", b"s" if zstandard is not None else b"z"
+    dumps, _, compress, _ = _codecs(records, compression)
+    now = datetime.now(timezone.utc)
+    saved_at = now.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    projects = (context_data.get("dovetail") or {}).get("projects") or []
+    notes = (context_data.get("productboard") or {}).get("notes") or []
+
+    payload_keys: dict[str, int] = {}
+    payloads: list[bytes] = []
+    ends: list[int] = []
+
+    def payload_number(key: str) -> int:
+        number = payload_keys.get(key)
+        if number is None:
+            raw = RAW_STORE.get(key)
+            if raw is None:
+                return -1
+            number = payload_keys[key] = len(payloads)
+            payloads.append(json.dumps(raw, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+            ends.append((ends[-1] if ends else 0) + len(payloads[-1]))
+        return number
+
+    insights = [i for p in projects for i in p.get("insights") or []]
+    frames = {
+        "meta": {"saved_at": saved_at, "insights": len(insights), "notes": len(notes), "selections": selections or {}},
+        "projects": {
+            "projects": [{k: v for k, v in p.items() if k != "insights"} for p in projects],
+            "counts": [len(p.get("insights") or []) for p in projects],
+        },
+        "insights": _record_columns(insights, "title", payload_number),
+        "notes": _record_columns(notes, "name", payload_number),
+    }
+    frames["payload_index"] = {"keys": list(payload_keys), "ends": ends}
+    path = directory / f"{name or now.astimezone().strftime('%Y%m%d-%H%M%S-%f')}{SUFFIX}"
+    tmp = path.with_suffix(".tmp")
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "wb") as f:
+            f.write(MAGIC + records + compression)
+            for frame in _FRAMES:
+                body = compress(b"".join(payloads) if frame == "payloads" else dumps(frames[frame]))
+                f.write(_LENGTH.pack(len(body)))
+                f.write(body)
+        os.replace(tmp, path)
+    except (OSError, TypeError, ValueError) as e:
+        logger.exception("Failed to save snapshot %s: %s", path, e)
+        tmp.unlink(missing_ok=True)
+        return None
+    return path
+
+
+def load_snapshot(path: Path) -> Optional[Snapshot]:
+    """
+    Open a snapshot written by save_snapshot. Records are rebuilt from the frames and the
+    payloads go to RAW_STORE as JSON bytes (decoded on first record.raw). The file is
+    memory-mapped, so frames are decompressed straight from the page cache.
+    Returns None (and logs why) if the file is missing, damaged or needs an uninstalled codec.
+    """
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:len(MAGIC)] != MAGIC:
+                logger.warning("Not a snapshot file: %s", path)
+                return None
+            pos = len(MAGIC)
+            codecs = _codecs(mm[pos:pos + 1], mm[pos + 1:pos + 2])
+            if codecs is None:
+                logger.warning("Snapshot %s needs msgpack/zstandard, which are not installed", path)
+                return None
+            _, loads, _, decompress = codecs
+            pos += 2
+            frames: dict[str, Any] = {}
+            with memoryview(mm) as view:
+                for frame in _FRAMES:
+                    (length,) = _LENGTH.unpack_from(mm, pos)
+                    pos += _LENGTH.size
+                    if pos + length > len(mm):
+                        raise ValueError(f"frame {frame} is truncated")
+                    with view[pos:pos + length] as body:
+                        raw = decompress(body)
+                    frames[frame] = raw if frame == "payloads" else loads(raw)
+                    pos += length
+    except Exception as e:  # I/O, truncated frames, codec errors (zlib, msgpack, zstandard)
+        logger.warning("Failed to open snapshot %s: %s", path, e)
+        return None
+
+    keys, ends = frames["payload_index"]["keys"], frames["payload_index"]["ends"]
+    with memoryview(frames["payloads"]) as data:
+        RAW_STORE.put_json(zip(keys, map(data.__getitem__, map(slice, [0] + ends, ends))))
+    insights = _records(frames["insights"], InsightRecord, "title", keys)
+    projects = []
+    start = 0
+    for project, count in zip(frames["projects"]["projects"], frames["projects"]["counts"]):
+        projects.append({**project, "insights": insights[start:start + count]})
+        start += count
+    meta = frames["meta"]
+    return Snapshot(
+        context_data={
+            "dovetail": {"projects": projects},
+            "productboard": {"notes": _records(frames["notes"], NoteRecord, "name", keys)},
+        },
+        selections={k: [str(i) for i in v] for k, v in (meta.get("selections") or {}).items()},
+        saved_at=meta.get("saved_at", ""),
+    )
+
+
+def list_snapshots(directory: Path = SNAPSHOT_DIR) -> list[Path]:
+    """Snapshot files in directory, newest first."""
+    if not directory.exists():
+        return []
+    return sorted(directory.glob(f"*{SUFFIX}"), key=lambda p: p.stat().st_mtime, reverse=True)